@@ -1,9 +1,11 @@
-import { useState, useRef } from 'react'
+import { useState, useRef, useEffect } from 'react'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Alert, AlertDescription } from '@/components/ui/alert'
 import { Progress } from '@/components/ui/progress'
 import { Badge } from '@/components/ui/badge'
+import { Label } from '@/components/ui/label'
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select'
 import { 
   Upload, 
   Download, 
@@ -20,19 +22,30 @@ export default function ImportacaoTab() {
   const [uploading, setUploading] = useState(false)
   const [resultado, setResultado] = useState(null)
   const [downloadingTemplate, setDownloadingTemplate] = useState(false)
+  const [job, setJob] = useState(null)
+  const [politicaDuplicadas, setPoliticaDuplicadas] = useState('skip')
   const fileInputRef = useRef(null)
+  const pollingRef = useRef(null)
+
+  useEffect(() => {
+    // Interromper o acompanhamento ao sair da tela
+    return () => clearTimeout(pollingRef.current)
+  }, [])
 
   const handleFileSelect = (e) => {
     const file = e.target.files[0]
     if (file) {
-      // Verificar se é arquivo Excel
+      // Verificar se é arquivo Excel, CSV ou NDJSON
       const validTypes = [
         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        'application/vnd.ms-excel'
+        'application/vnd.ms-excel',
+        'text/csv',
+        'application/x-ndjson'
       ]
+      const validExtensions = ['.xlsx', '.xls', '.csv', '.ndjson']
       
-      if (!validTypes.includes(file.type) && !file.name.toLowerCase().endsWith('.xlsx') && !file.name.toLowerCase().endsWith('.xls')) {
-        toast.error('Por favor, selecione um arquivo Excel (.xlsx ou .xls)')
+      if (!validTypes.includes(file.type) && !validExtensions.some(ext => file.name.toLowerCase().endsWith(ext))) {
+        toast.error('Por favor, selecione um arquivo Excel (.xlsx ou .xls), CSV (.csv) ou NDJSON (.ndjson)')
         return
       }
       
@@ -57,33 +70,24 @@ export default function ImportacaoTab() {
   const downloadTemplate = async () => {
     setDownloadingTemplate(true)
     try {
-      // Primeiro gerar o template
-      const response = await fetch('/api/importacao/template', {
-        method: 'GET'
-      })
-
-      if (response.ok) {
-        // Depois fazer download
-        const downloadResponse = await fetch('/api/importacao/template/download')
+      // O servidor gera o template sob demanda (e o mantém em cache) no próprio download
+      const downloadResponse = await fetch('/api/importacao/template/download')
+      
+      if (downloadResponse.ok) {
+        const blob = await downloadResponse.blob()
+        const url = window.URL.createObjectURL(blob)
+        const a = document.createElement('a')
+        a.style.display = 'none'
+        a.href = url
+        a.download = 'template_vendas.xlsx'
+        document.body.appendChild(a)
+        a.click()
+        window.URL.revokeObjectURL(url)
+        document.body.removeChild(a)
         
-        if (downloadResponse.ok) {
-          const blob = await downloadResponse.blob()
-          const url = window.URL.createObjectURL(blob)
-          const a = document.createElement('a')
-          a.style.display = 'none'
-          a.href = url
-          a.download = 'template_vendas.xlsx'
-          document.body.appendChild(a)
-          a.click()
-          window.URL.revokeObjectURL(url)
-          document.body.removeChild(a)
-          
-          toast.success('Template baixado com sucesso!')
-        } else {
-          throw new Error('Erro ao baixar template')
-        }
+        toast.success('Template baixado com sucesso!')
       } else {
-        throw new Error('Erro ao gerar template')
+        throw new Error('Erro ao baixar template')
       }
     } catch (error) {
       toast.error('Erro ao baixar template: ' + error.message)
@@ -93,7 +97,45 @@ export default function ImportacaoTab() {
     }
   }
 
-  const uploadFile = async () => {
+  const acompanharJob = async (jobId) => {
+    try {
+      const response = await fetch(`/api/importacao/jobs/${jobId}`)
+      const data = await response.json()
+
+      if (!response.ok) {
+        throw new Error(data.erro || 'Erro ao consultar importação')
+      }
+
+      setJob(data)
+
+      if (data.status === 'concluido') {
+        setResultado(data.resumo)
+        setUploading(false)
+        if (data.resumo.simulacao) {
+          toast.success(`Validação concluída! ${data.resumo.linhas_validas} linhas válidas, ${data.resumo.erros_encontrados} com erro.`)
+        } else {
+          toast.success(`Importação concluída! ${data.resumo.vendas_criadas} vendas criadas.`)
+        }
+      } else if (data.status === 'erro') {
+        setResultado({ erro: data.mensagem_erro })
+        setUploading(false)
+        toast.error(data.mensagem_erro || 'Erro na importação')
+      } else if (data.status === 'cancelado') {
+        setResultado({ erro: `Importação cancelada. ${data.progresso.vendas_inseridas} vendas já haviam sido gravadas.` })
+        setUploading(false)
+        toast.info('Importação cancelada')
+      } else {
+        pollingRef.current = setTimeout(() => acompanharJob(jobId), 1000)
+      }
+    } catch (error) {
+      toast.error('Erro de conexão ao acompanhar a importação')
+      console.error('Erro ao acompanhar importação:', error)
+      setResultado({ erro: 'Erro de conexão' })
+      setUploading(false)
+    }
+  }
+
+  const uploadFile = async (simular = false) => {
     if (!arquivo) {
       toast.error('Selecione um arquivo primeiro')
       return
@@ -101,12 +143,16 @@ export default function ImportacaoTab() {
 
     setUploading(true)
     setResultado(null)
+    setJob(null)
 
     try {
       const formData = new FormData()
       formData.append('arquivo', arquivo)
+      formData.append('politica_duplicadas', politicaDuplicadas)
+      formData.append('simular', simular ? 'true' : 'false')
 
-      const response = await fetch('/api/importacao/vendas', {
+      // O servidor agenda a importação e devolve o id do job imediatamente
+      const response = await fetch('/api/importacao/jobs', {
         method: 'POST',
         body: formData
       })
@@ -114,24 +160,42 @@ export default function ImportacaoTab() {
       const data = await response.json()
 
       if (response.ok) {
-        setResultado(data)
-        toast.success(`Importação concluída! ${data.vendas_criadas} vendas criadas.`)
+        setJob(data.job)
+        acompanharJob(data.job.id)
       } else {
         toast.error(data.erro || 'Erro na importação')
         setResultado({ erro: data.erro })
+        setUploading(false)
       }
     } catch (error) {
       toast.error('Erro de conexão durante a importação')
       console.error('Erro na importação:', error)
       setResultado({ erro: 'Erro de conexão' })
-    } finally {
       setUploading(false)
     }
   }
 
+  const cancelarImportacao = async () => {
+    if (!job) return
+
+    try {
+      const response = await fetch(`/api/importacao/jobs/${job.id}/cancelar`, { method: 'POST' })
+      const data = await response.json()
+
+      if (!response.ok) {
+        toast.error(data.erro || 'Erro ao cancelar importação')
+      }
+    } catch (error) {
+      toast.error('Erro de conexão ao cancelar a importação')
+      console.error('Erro ao cancelar importação:', error)
+    }
+  }
+
   const resetForm = () => {
+    clearTimeout(pollingRef.current)
     setArquivo(null)
     setResultado(null)
+    setJob(null)
     if (fileInputRef.current) {
       fileInputRef.current.value = ''
     }
@@ -141,7 +205,7 @@ export default function ImportacaoTab() {
     <div className="space-y-6">
       <div>
         <h2 className="text-2xl font-bold mb-2">Importação de Vendas</h2>
-        <p className="text-gray-600">Importe vendas em lote através de planilha Excel</p>
+        <p className="text-gray-600">Importe vendas em lote através de planilha Excel, CSV ou NDJSON</p>
       </div>
 
       {/* Download do Template */}
@@ -187,7 +251,7 @@ export default function ImportacaoTab() {
             Upload do Arquivo
           </CardTitle>
           <CardDescription>
-            Selecione ou arraste o arquivo Excel com as vendas
+            Selecione ou arraste o arquivo Excel, CSV ou NDJSON com as vendas
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -200,7 +264,7 @@ export default function ImportacaoTab() {
             <input
               ref={fileInputRef}
               type="file"
-              accept=".xlsx,.xls"
+              accept=".xlsx,.xls,.csv,.ndjson"
               onChange={handleFileSelect}
               className="hidden"
             />
@@ -212,8 +276,25 @@ export default function ImportacaoTab() {
                 <p className="text-sm text-gray-500">
                   {(arquivo.size / 1024 / 1024).toFixed(2)} MB
                 </p>
+                <div className="max-w-xs mx-auto text-left mt-4" onClick={(e) => e.stopPropagation()}>
+                  <Label htmlFor="politica_duplicadas">Vendas já cadastradas</Label>
+                  <Select value={politicaDuplicadas} onValueChange={setPoliticaDuplicadas} disabled={uploading}>
+                    <SelectTrigger>
+                      <SelectValue />
+                    </SelectTrigger>
+                    <SelectContent>
+                      <SelectItem value="skip">Ignorar</SelectItem>
+                      <SelectItem value="update">Atualizar</SelectItem>
+                      <SelectItem value="fail">Interromper a importação</SelectItem>
+                    </SelectContent>
+                  </Select>
+                </div>
                 <div className="flex justify-center space-x-2 mt-4">
-                  <Button onClick={uploadFile} disabled={uploading}>
+                  <Button variant="outline" onClick={() => uploadFile(true)} disabled={uploading}>
+                    <CheckCircle className="mr-2 h-4 w-4" />
+                    Apenas Validar
+                  </Button>
+                  <Button onClick={() => uploadFile(false)} disabled={uploading}>
                     {uploading ? (
                       <>
                         <Loader2 className="mr-2 h-4 w-4 animate-spin" />
@@ -236,7 +317,7 @@ export default function ImportacaoTab() {
                 <FileSpreadsheet className="h-12 w-12 text-gray-400 mx-auto" />
                 <p className="text-lg font-medium">Clique ou arraste o arquivo aqui</p>
                 <p className="text-sm text-gray-500">
-                  Formatos aceitos: .xlsx, .xls (máximo 10MB)
+                  Formatos aceitos: .xlsx, .xls, .csv, .ndjson
                 </p>
               </div>
             )}
@@ -244,8 +325,19 @@ export default function ImportacaoTab() {
 
           {uploading && (
             <div className="mt-4">
-              <Progress value={50} className="w-full" />
-              <p className="text-sm text-center mt-2">Processando arquivo...</p>
+              <Progress value={job?.status === 'processando' ? 50 : 10} className="w-full" />
+              <p className="text-sm text-center mt-2">
+                {job?.status === 'processando'
+                  ? `Processando arquivo... ${job.progresso.linhas_lidas} linhas lidas, ${job.progresso.vendas_inseridas} vendas gravadas, ${job.progresso.linhas_rejeitadas} rejeitadas`
+                  : 'Aguardando processamento...'}
+              </p>
+              {job && (
+                <div className="flex justify-center mt-2">
+                  <Button variant="outline" size="sm" onClick={cancelarImportacao} disabled={job.cancelamento_solicitado}>
+                    {job.cancelamento_solicitado ? 'Cancelando...' : 'Cancelar Importação'}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </CardContent>
@@ -272,13 +364,30 @@ export default function ImportacaoTab() {
               </Alert>
             ) : (
               <div className="space-y-4">
-                <div className="grid grid-cols-2 gap-4">
+                {resultado.simulacao && (
+                  <Alert>
+                    <AlertTriangle className="h-4 w-4" />
+                    <AlertDescription>{resultado.mensagem}</AlertDescription>
+                  </Alert>
+                )}
+
+                <div className="grid grid-cols-3 gap-4">
                   <div className="text-center p-4 bg-green-50 rounded-lg">
                     <div className="text-2xl font-bold text-green-600">
-                      {resultado.vendas_criadas}
+                      {resultado.simulacao ? resultado.linhas_validas : resultado.vendas_criadas}
                     </div>
-                    <div className="text-sm text-green-700">Vendas Criadas</div>
+                    <div className="text-sm text-green-700">{resultado.simulacao ? 'Linhas Válidas' : 'Vendas Criadas'}</div>
                   </div>
+                  {!resultado.simulacao && (
+                    <div className="text-center p-4 bg-yellow-50 rounded-lg">
+                      <div className="text-2xl font-bold text-yellow-600">
+                        {resultado.vendas_duplicadas ?? 0}
+                      </div>
+                      <div className="text-sm text-yellow-700">
+                        {resultado.politica_duplicadas === 'update' ? 'Vendas Atualizadas' : 'Duplicadas Ignoradas'}
+                      </div>
+                    </div>
+                  )}
                   <div className="text-center p-4 bg-red-50 rounded-lg">
                     <div className="text-2xl font-bold text-red-600">
                       {resultado.erros_encontrados}
@@ -318,6 +427,21 @@ export default function ImportacaoTab() {
                   </div>
                 )}
 
+                {resultado.detalhes?.truncados && (
+                  <p className="text-sm text-gray-500">
+                    Apenas os primeiros itens são exibidos. A lista completa de erros está no relatório.
+                  </p>
+                )}
+
+                {resultado.relatorio_erros && (
+                  <Button variant="outline" className="w-full" asChild>
+                    <a href={resultado.relatorio_erros.url} download>
+                      <Download className="mr-2 h-4 w-4" />
+                      Baixar Relatório de Erros ({resultado.relatorio_erros.erros} linhas)
+                    </a>
+                  </Button>
+                )}
+
                 <Button onClick={resetForm} className="w-full">
                   Importar Novo Arquivo
                 </Button>
@@ -335,9 +459,9 @@ export default function ImportacaoTab() {
         <CardContent>
           <div className="space-y-2 text-sm">
             <p><strong>1.</strong> Baixe o template Excel clicando no botão acima</p>
-            <p><strong>2.</strong> Preencha os dados das vendas seguindo o formato do template</p>
+            <p><strong>2.</strong> Preencha os dados das vendas seguindo o formato do template (arquivos CSV e NDJSON usam as mesmas colunas; CSV é o formato mais rápido para arquivos grandes)</p>
             <p><strong>3.</strong> Certifique-se de que os vendedores e tabelas de comissão existem no sistema</p>
-            <p><strong>4.</strong> Faça upload do arquivo preenchido</p>
+            <p><strong>4.</strong> Faça upload do arquivo preenchido (use "Apenas Validar" para conferir o arquivo sem gravar nenhuma venda)</p>
             <p><strong>5.</strong> Aguarde o processamento e verifique os resultados</p>
           </div>
           
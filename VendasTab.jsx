@@ -10,18 +10,25 @@ import { toast } from 'sonner'
 const VendasTab = () => {
   const [vendas, setVendas] = useState([])
   const [carregando, setCarregando] = useState(false)
+  const [nextCursor, setNextCursor] = useState(null)
 
   // Carregar vendas ao montar o componente
   useEffect(() => {
     carregarVendas()
   }, [])
 
-  const carregarVendas = async () => {
+  // Sem cursor carrega a primeira página; com cursor acrescenta a próxima página à lista
+  const carregarVendas = async (cursor = null) => {
     try {
       setCarregando(true)
-      const response = await fetch('/api/vendas')
+      const params = new URLSearchParams()
+      if (cursor) params.append('cursor', cursor)
+      const response = await fetch(`/api/vendas?${params}`)
       const data = await response.json()
-      setVendas(data)
+      // A API paginada responde { vendas, next_cursor }; a versão antiga responde a lista completa
+      const pagina = Array.isArray(data) ? data : data.vendas
+      setVendas(cursor ? [...vendas, ...pagina] : pagina)
+      setNextCursor(Array.isArray(data) ? null : data.next_cursor)
     } catch (error) {
       console.error('Erro ao carregar vendas:', error)
       toast.error('Erro ao carregar vendas')
@@ -72,7 +79,7 @@ const VendasTab = () => {
                 </TableRow>
               </TableHeader>
               <TableBody>
-                {carregando ? (
+                {carregando && vendas.length === 0 ? (
                   <TableRow>
                     <TableCell colSpan={7} className="text-center py-8">
                       Carregando...
@@ -104,6 +111,13 @@ const VendasTab = () => {
               </TableBody>
             </Table>
           </div>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={() => carregarVendas(nextCursor)} disabled={carregando}>
+                {carregando ? 'Carregando...' : 'Carregar mais'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>
@@ -14,26 +14,34 @@ import {
   Calendar, 
   Filter,
   User,
-  RefreshCw
+  RefreshCw,
+  Download
 } from 'lucide-react'
 import { toast } from 'sonner'
 
 export default function VendedorDashboard({ vendedor, token, onLogout }) {
   const [dashboardData, setDashboardData] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [carregandoMais, setCarregandoMais] = useState(false)
+  const [exportando, setExportando] = useState(null)
   const [filtros, setFiltros] = useState({
     data_inicio: '',
     data_fim: '',
     comissao_paga: ''
   })
 
+  const parametrosFiltros = () => {
+    const params = new URLSearchParams()
+    if (filtros.data_inicio) params.append('data_inicio', filtros.data_inicio)
+    if (filtros.data_fim) params.append('data_fim', filtros.data_fim)
+    if (filtros.comissao_paga) params.append('comissao_paga', filtros.comissao_paga)
+    return params
+  }
+
   const carregarDashboard = async () => {
     setLoading(true)
     try {
-      const params = new URLSearchParams()
-      if (filtros.data_inicio) params.append('data_inicio', filtros.data_inicio)
-      if (filtros.data_fim) params.append('data_fim', filtros.data_fim)
-      if (filtros.comissao_paga) params.append('comissao_paga', filtros.comissao_paga)
+      const params = parametrosFiltros()
 
       const response = await fetch(`/api/auth/dashboard?${params}`, {
         headers: {
@@ -59,6 +67,82 @@ export default function VendedorDashboard({ vendedor, token, onLogout }) {
     }
   }
 
+  // Próxima página de vendas (paginação por cursor); as estatísticas já vêm completas na primeira
+  const carregarMaisVendas = async () => {
+    if (!dashboardData?.next_cursor) return
+
+    setCarregandoMais(true)
+    try {
+      const params = parametrosFiltros()
+      params.append('cursor', dashboardData.next_cursor)
+
+      const response = await fetch(`/api/auth/dashboard?${params}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+
+      if (response.ok) {
+        const data = await response.json()
+        setDashboardData({
+          ...dashboardData,
+          vendas: [...dashboardData.vendas, ...data.vendas],
+          next_cursor: data.next_cursor
+        })
+      } else if (response.status === 401) {
+        toast.error('Sessão expirada. Faça login novamente.')
+        onLogout()
+      } else {
+        const errorData = await response.json()
+        toast.error(errorData.erro || 'Erro ao carregar vendas')
+      }
+    } catch (error) {
+      toast.error('Erro de conexão')
+      console.error('Erro ao carregar vendas:', error)
+    } finally {
+      setCarregandoMais(false)
+    }
+  }
+
+  // Exportação completa (todas as páginas) gerada em streaming pelo servidor
+  const exportarVendas = async (formato) => {
+    setExportando(formato)
+    try {
+      const params = parametrosFiltros()
+      params.append('formato', formato)
+
+      const response = await fetch(`/api/exportacao/vendas?${params}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+
+      if (response.ok) {
+        const blob = await response.blob()
+        const url = window.URL.createObjectURL(blob)
+        const a = document.createElement('a')
+        a.style.display = 'none'
+        a.href = url
+        a.download = `minhas_vendas_${new Date().toISOString().split('T')[0]}.${formato}`
+        document.body.appendChild(a)
+        a.click()
+        window.URL.revokeObjectURL(url)
+        document.body.removeChild(a)
+      } else if (response.status === 401) {
+        toast.error('Sessão expirada. Faça login novamente.')
+        onLogout()
+      } else {
+        const errorData = await response.json()
+        toast.error(errorData.erro || 'Erro ao exportar vendas')
+      }
+    } catch (error) {
+      toast.error('Erro de conexão')
+      console.error('Erro ao exportar vendas:', error)
+    } finally {
+      setExportando(null)
+    }
+  }
+
   useEffect(() => {
     carregarDashboard()
   }, [])
@@ -218,6 +302,14 @@ export default function VendedorDashboard({ vendedor, token, onLogout }) {
             <div className="flex items-end space-x-2">
               <Button onClick={aplicarFiltros}>Aplicar</Button>
               <Button variant="outline" onClick={limparFiltros}>Limpar</Button>
+              <Button variant="outline" onClick={() => exportarVendas('csv')} disabled={!!exportando}>
+                <Download className="mr-2 h-4 w-4" />
+                {exportando === 'csv' ? 'Exportando...' : 'Exportar CSV'}
+              </Button>
+              <Button variant="outline" onClick={() => exportarVendas('xlsx')} disabled={!!exportando}>
+                <Download className="mr-2 h-4 w-4" />
+                {exportando === 'xlsx' ? 'Exportando...' : 'Exportar Excel'}
+              </Button>
             </div>
           </div>
         </CardContent>
@@ -270,6 +362,13 @@ export default function VendedorDashboard({ vendedor, token, onLogout }) {
                   ))}
                 </TableBody>
               </Table>
+              {dashboardData.next_cursor && (
+                <div className="flex justify-center mt-4">
+                  <Button variant="outline" onClick={carregarMaisVendas} disabled={carregandoMais}>
+                    {carregandoMais ? 'Carregando...' : `Carregar mais (${vendas.length} de ${estatisticas.total_vendas})`}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </CardContent>
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from functools import wraps
 from src.models.user import db
 from src.models.vendedor import Vendedor
 from src.models.venda import Venda
 from src.models.vendedor_comissao import VendedorComissao
+from src.services.paginacao import paginar_vendas, parametros_paginacao, CursorInvalido
+from src.services.serializadores import carregar_vendas
+from src.services.resumo_vendas import totalizar_resumo
+from src.services.cache_tokens import obter_cache, dados_vendedor, geracao_vendedor, vendedor_da_sessao
+from src.services.banco import ler_da_replica
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -25,15 +30,26 @@ def token_required(f):
             return jsonify({'erro': 'Token de acesso necessário'}), 401
         
         try:
-            # Verificar e decodificar o token
-            payload = Vendedor.verificar_token(token)
-            if not payload:
-                return jsonify({'erro': 'Token inválido ou expirado'}), 401
+            cache = obter_cache(current_app)
+            em_cache = cache.obter(token)
             
-            # Buscar o vendedor
-            vendedor_atual = Vendedor.query.get(payload['vendedor_id'])
-            if not vendedor_atual or not vendedor_atual.ativo:
-                return jsonify({'erro': 'Vendedor não encontrado ou inativo'}), 401
+            if em_cache:
+                # Token já verificado e vendedor ativo: sem decodificar o JWT nem consultar o banco
+                vendedor_atual = vendedor_da_sessao(em_cache[1])
+            else:
+                # Verificar e decodificar o token
+                payload = Vendedor.verificar_token(token)
+                if not payload:
+                    return jsonify({'erro': 'Token inválido ou expirado'}), 401
+                
+                # Buscar o vendedor (a geração é lida antes: uma alteração durante a consulta invalida a entrada)
+                geracao = geracao_vendedor(payload['vendedor_id'])
+                vendedor_atual = db.session.get(Vendedor, payload['vendedor_id'])
+                if not vendedor_atual or not vendedor_atual.ativo:
+                    return jsonify({'erro': 'Vendedor não encontrado ou inativo'}), 401
+                
+                # Só tokens de vendedores ativos entram no cache
+                cache.guardar(token, payload, dados_vendedor(vendedor_atual), geracao)
             
         except Exception as e:
             return jsonify({'erro': 'Token inválido'}), 401
@@ -120,6 +136,7 @@ def perfil(vendedor_atual):
 
 @auth_bp.route('/auth/dashboard', methods=['GET'])
 @token_required
+@ler_da_replica
 def dashboard(vendedor_atual):
     """Dashboard do vendedor com suas vendas e comissões"""
     try:
@@ -132,6 +149,7 @@ def dashboard(vendedor_atual):
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         comissao_paga = request.args.get('comissao_paga')
+        data_inicio_obj = data_fim_obj = paga = None
         
         if data_inicio:
             from datetime import datetime
@@ -147,27 +165,25 @@ def dashboard(vendedor_atual):
             paga = comissao_paga.lower() == 'true'
             vendas_query = vendas_query.filter(Venda.comissao_paga == paga)
         
-        vendas = vendas_query.all()
+        # Estatísticas lidas da tabela de resumo (uma linha por dia/tabela), sem percorrer as vendas
+        estatisticas = totalizar_resumo(vendedor_atual.id, data_inicio_obj, data_fim_obj, paga)
         
-        # Calcular estatísticas
-        total_vendas = len(vendas)
-        total_valor_vendas = sum(venda.valor_venda for venda in vendas)
-        total_comissoes = sum(venda.valor_comissao for venda in vendas)
-        comissoes_pagas = sum(venda.valor_comissao for venda in vendas if venda.comissao_paga)
-        comissoes_pendentes = total_comissoes - comissoes_pagas
-        
-        return jsonify({
+        resposta = {
             'vendedor': vendedor_atual.to_dict_publico(),
-            'vendas': [venda.to_dict() for venda in vendas],
-            'estatisticas': {
-                'total_vendas': total_vendas,
-                'total_valor_vendas': total_valor_vendas,
-                'total_comissoes': total_comissoes,
-                'comissoes_pagas': comissoes_pagas,
-                'comissoes_pendentes': comissoes_pendentes
-            }
-        }), 200
+            'estatisticas': estatisticas
+        }
+        
+        # A lista de vendas é opcional e paginada por cursor (cursor/limite na query string)
+        if request.args.get('incluir_vendas', 'true').lower() != 'false':
+            cursor, limite = parametros_paginacao(request.args)
+            vendas, next_cursor = paginar_vendas(carregar_vendas(vendas_query), cursor, limite)
+            resposta['vendas'] = [venda.to_dict() for venda in vendas]
+            resposta['next_cursor'] = next_cursor
         
+        return jsonify(resposta), 200
+        
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -195,3 +211,11 @@ def alterar_senha(vendedor_atual):
         db.session.rollback()
         return jsonify({'erro': str(e)}), 500
 
+@auth_bp.route('/auth/cache', methods=['GET'])
+@token_required
+def estatisticas_cache(vendedor_atual):
+    """Estatísticas do cache de tokens deste processo (apenas admin)"""
+    if vendedor_atual.email != 'admin@admin.com':
+        return jsonify({'erro': 'Apenas administradores podem consultar o cache'}), 403
+    
+    return jsonify(obter_cache(current_app).estatisticas()), 200
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Script para comparar o desempenho da leitura/validação de importações em XLSX, CSV e NDJSON
+
+Gera arquivos sintéticos com o mesmo conteúdo nos três formatos e mede o tempo
+de leitura + validação de cada um (sem gravar no banco).
+
+Uso: python benchmark_importacao.py [quantidade_linhas] [--memoria] [--processos=N]
+
+Com --processos=N a validação também é medida em paralelo com N processos.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import tempfile
+import tracemalloc
+import openpyxl
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.importacao_pipeline import COLUNAS_OBRIGATORIAS, abrir_leitor, validar_linhas, validar_linhas_paralelo
+
+def gerar_linhas(quantidade):
+    """Linhas sintéticas no contrato de colunas do template"""
+    for i in range(quantidade):
+        yield [
+            f'{100000000 + i:09d}{i % 100:02d}',
+            f'Cliente {i}',
+            f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+            round(100 + (i % 1000) * 1.5, 2),
+            f'Vendedor {i % 50}',
+            'Gold' if i % 2 else 'Silver',
+            'benchmark'
+        ]
+
+def gerar_arquivos(diretorio, quantidade):
+    headers = COLUNAS_OBRIGATORIAS + ['usuario_cadastro']
+    arquivos = {}
+
+    # XLSX em modo write_only para não depender da memória na geração
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Vendas')
+    ws.append(headers)
+    for linha in gerar_linhas(quantidade):
+        ws.append(linha)
+    arquivos['xlsx'] = os.path.join(diretorio, 'benchmark.xlsx')
+    wb.save(arquivos['xlsx'])
+
+    arquivos['csv'] = os.path.join(diretorio, 'benchmark.csv')
+    with open(arquivos['csv'], 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(gerar_linhas(quantidade))
+
+    arquivos['ndjson'] = os.path.join(diretorio, 'benchmark.ndjson')
+    with open(arquivos['ndjson'], 'w', encoding='utf-8') as f:
+        for linha in gerar_linhas(quantidade):
+            f.write(json.dumps(dict(zip(headers, linha))) + '\n')
+
+    return arquivos
+
+def ler_e_validar(arquivo_path, processos=1):
+    validas = 0
+    with abrir_leitor(arquivo_path) as leitor:
+        linhas_validadas = validar_linhas_paralelo(leitor, processos) if processos > 1 else validar_linhas(leitor)
+        for _, dados, erro in linhas_validadas:
+            if not erro:
+                validas += 1
+    return validas
+
+def medir(arquivo_path, memoria=False, processos=1):
+    """Lê e valida o arquivo inteiro; retorna (linhas válidas, segundos, pico de memória em MB)"""
+    inicio = time.perf_counter()
+    validas = ler_e_validar(arquivo_path, processos)
+    duracao = time.perf_counter() - inicio
+
+    # O tracemalloc deixa a leitura várias vezes mais lenta, então a memória é medida numa segunda passada
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        ler_e_validar(arquivo_path, processos)
+        pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    return validas, duracao, pico
+
+def benchmark(quantidade, memoria=False, processos=1):
+    print(f"Gerando arquivos com {quantidade} linhas...")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivos = gerar_arquivos(diretorio, quantidade)
+
+        resultados = {}
+        for formato, arquivo_path in arquivos.items():
+            validas, duracao, pico = medir(arquivo_path, memoria)
+            resultados[formato] = duracao
+            tamanho = os.path.getsize(arquivo_path) / 1024 / 1024
+            linha = (f"{formato:>7}: {duracao:7.2f}s  {quantidade / duracao:10.0f} linhas/s  "
+                     f"arquivo {tamanho:6.1f} MB  ({validas} válidas)")
+            if pico is not None:
+                linha += f"  pico {pico:6.1f} MB"
+            print(linha)
+
+        for formato in ('csv', 'ndjson'):
+            print(f"{formato} é {resultados['xlsx'] / resultados[formato]:.1f}x mais rápido que xlsx")
+
+        if processos > 1:
+            for formato, arquivo_path in arquivos.items():
+                _, duracao, _ = medir(arquivo_path, processos=processos)
+                print(f"{formato:>7} com {processos} processos: {duracao:7.2f}s  "
+                      f"({resultados[formato] / duracao:.1f}x em relação a 1 processo)")
+
+if __name__ == '__main__':
+    argumentos = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    processos = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--processos=')), 1)
+    benchmark(int(argumentos[0]) if argumentos else 100000, memoria='--memoria' in sys.argv, processos=processos)
@@ -0,0 +1,177 @@
+"""
+Cache dos tokens já verificados usado por `token_required`.
+
+Cada entrada guarda o payload do token e uma cópia das colunas do vendedor,
+então uma requisição autenticada com token em cache não decodifica o JWT nem
+consulta o banco. As entradas expiram pelo TTL (ou antes, no `exp` do token),
+o cache tem tamanho máximo com descarte LRU e todos os tokens de um vendedor
+são invalidados quando o vendedor é alterado (desativação, troca de senha)
+ou excluído.
+
+Cada worker tem o seu cache, mas a invalidação vale para todos: o commit que
+altera um vendedor incrementa a geração dele num vetor em memória
+compartilhada, criado na importação do módulo e herdado pelos workers que o
+servidor cria por fork (como os contadores de versoes.py). Cada entrada guarda
+a geração lida antes de o vendedor ser consultado, e uma entrada de geração
+antiga é descartada na leitura.
+"""
+import multiprocessing
+import time
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from src.models.user import db
+from src.models.vendedor import Vendedor
+
+TTL_PADRAO = 60
+MAX_ITENS_PADRAO = 10000
+
+# Gerações por vendedor em memória compartilhada (posição = id % POSICOES_GERACAO);
+# vendedores na mesma posição só invalidam um ao outro a mais, nunca a menos
+POSICOES_GERACAO = 4096
+_geracoes = multiprocessing.Array('q', POSICOES_GERACAO)
+
+def geracao_vendedor(vendedor_id):
+    with _geracoes.get_lock():
+        return _geracoes[vendedor_id % POSICOES_GERACAO]
+
+def incrementar_geracao(vendedor_id):
+    with _geracoes.get_lock():
+        _geracoes[vendedor_id % POSICOES_GERACAO] += 1
+
+class CacheTokens:
+    """Cache LRU com TTL de token -> (payload, colunas do vendedor)"""
+
+    def __init__(self, ttl=TTL_PADRAO, max_itens=MAX_ITENS_PADRAO):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+        self.tokens_por_vendedor = {}
+        self.lock = Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self, token):
+        """Retorna (payload, dados_vendedor) do token ou None se não estiver em cache"""
+        with self.lock:
+            item = self.itens.get(token)
+            # Geração diferente: o vendedor foi alterado (em qualquer worker) depois de a entrada ser guardada
+            if item is None or item[0] <= time.time() or item[3] != geracao_vendedor(item[2]['id']):
+                if item is not None:
+                    self._remover(token)
+                self.falhas += 1
+                return None
+
+            self.itens.move_to_end(token)
+            self.acertos += 1
+            return item[1], item[2]
+
+    def guardar(self, token, payload, dados_vendedor, geracao=None):
+        """`geracao`: geracao_vendedor() lida antes de consultar o vendedor (padrão: a atual)"""
+        expira_em = time.time() + self.ttl
+        if payload.get('exp'):
+            expira_em = min(expira_em, payload['exp'])
+        if geracao is None:
+            geracao = geracao_vendedor(dados_vendedor['id'])
+
+        with self.lock:
+            if token in self.itens:
+                self._remover(token)
+            self.itens[token] = (expira_em, payload, dados_vendedor, geracao)
+            self.tokens_por_vendedor.setdefault(dados_vendedor['id'], set()).add(token)
+
+            while len(self.itens) > self.max_itens:
+                self._remover(next(iter(self.itens)))
+
+    def invalidar_vendedor(self, vendedor_id):
+        """Remove todos os tokens em cache do vendedor"""
+        with self.lock:
+            for token in self.tokens_por_vendedor.pop(vendedor_id, set()):
+                self.itens.pop(token, None)
+            self.invalidacoes += 1
+
+    def limpar(self):
+        with self.lock:
+            self.itens.clear()
+            self.tokens_por_vendedor.clear()
+
+    def estatisticas(self):
+        with self.lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self.itens),
+                'max_itens': self.max_itens,
+                'ttl_segundos': self.ttl,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+                'invalidacoes': self.invalidacoes
+            }
+
+    def _remover(self, token):
+        _, _, dados_vendedor, _ = self.itens.pop(token)
+        tokens = self.tokens_por_vendedor.get(dados_vendedor['id'])
+        if tokens:
+            tokens.discard(token)
+            if not tokens:
+                del self.tokens_por_vendedor[dados_vendedor['id']]
+
+_cache = None
+_cache_lock = Lock()
+
+def obter_cache(app):
+    """Cache do processo, dimensionado por AUTH_CACHE_TTL e AUTH_CACHE_MAX_ITENS"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheTokens(
+                ttl=app.config.get('AUTH_CACHE_TTL', TTL_PADRAO),
+                max_itens=app.config.get('AUTH_CACHE_MAX_ITENS', MAX_ITENS_PADRAO)
+            )
+        return _cache
+
+def dados_vendedor(vendedor):
+    """Cópia das colunas do vendedor para guardar em cache"""
+    return {atributo.key: getattr(vendedor, atributo.key) for atributo in Vendedor.__mapper__.column_attrs}
+
+def vendedor_da_sessao(dados):
+    """
+    Reconstrói o vendedor em cache e o associa à sessão atual sem consultar o banco.
+
+    A instância volta como persistente: alterações feitas pela rota (ex.: troca
+    de senha) são gravadas normalmente no commit.
+    """
+    vendedor = Vendedor.__mapper__.class_manager.new_instance()
+    for campo, valor in dados.items():
+        setattr(vendedor, campo, valor)
+    make_transient_to_detached(vendedor)
+    return db.session.merge(vendedor, load=False)
+
+def invalidar_vendedor(vendedor_id):
+    if _cache is not None:
+        _cache.invalidar_vendedor(vendedor_id)
+
+@event.listens_for(Vendedor, 'after_update')
+@event.listens_for(Vendedor, 'after_delete')
+def _invalidar_ao_alterar(mapper, connection, target):
+    # Desativação, troca de senha, exclusão ou qualquer outra alteração do vendedor
+    invalidar_vendedor(target.id)
+
+    # Invalida de novo no commit: entre o flush e o commit outra requisição
+    # ainda lê a versão antiga do banco e pode devolvê-la ao cache
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info.setdefault('vendedores_alterados', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(sessao):
+    for vendedor_id in sessao.info.pop('vendedores_alterados', ()):
+        # A geração invalida as entradas dos outros workers; as deste são removidas já
+        incrementar_geracao(vendedor_id)
+        invalidar_vendedor(vendedor_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alterados(sessao):
+    sessao.info.pop('vendedores_alterados', None)
@@ -0,0 +1,260 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import csv
+import io
+import zlib
+from datetime import datetime
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.vendedor import Vendedor
+from src.routes.auth import token_required
+from src.services.banco import ler_da_replica
+from src.services.planilhas import gerar_xlsx, pedacos_arquivo, MIMETYPE_XLSX
+
+# Dependência opcional e pesada, usada apenas nos formatos colunares: carregada no primeiro pedido
+pa = pq = None
+
+def _carregar_pyarrow():
+    """Importa o pyarrow sob demanda; retorna False se ele não estiver instalado"""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+# Vendas lidas do banco por vez; o cursor do lado do servidor mantém só esse bloco em memória
+TAMANHO_BLOCO_EXPORTACAO = 2000
+
+# Tamanho aproximado de cada pedaço enviado na resposta
+TAMANHO_PEDACO_RESPOSTA = 64 * 1024
+
+# Linhas por row group (Parquet) ou record batch (Arrow) nos formatos colunares
+TAMANHO_GRUPO_COLUNAR = 50000
+
+# Compressão dos formatos colunares
+COMPRESSAO_COLUNAR = 'zstd'
+
+FORMATOS_EXPORTACAO = ('csv', 'xlsx', 'parquet', 'arrow')
+
+# Campo, cabeçalho do CSV e coluna de cada campo exportado (projeção, sem carregar objetos Venda)
+COLUNAS_EXPORTACAO = [
+    ('id', 'ID', Venda.id),
+    ('cpf_cliente', 'CPF Cliente', Venda.cpf_cliente),
+    ('nome_cliente', 'Nome Cliente', Venda.nome_cliente),
+    ('data_venda', 'Data Venda', Venda.data_venda),
+    ('valor_venda', 'Valor Venda', Venda.valor_venda),
+    ('valor_comissao', 'Valor Comissão', Venda.valor_comissao),
+    ('comissao_paga', 'Comissão Paga', Venda.comissao_paga),
+    ('nome_vendedor', 'Vendedor', Vendedor.nome_vendedor),
+    ('nome_tabela', 'Tabela Comissão', VendedorComissao.nome_tabela),
+    ('usuario_cadastro', 'Usuário Cadastro', Venda.usuario_cadastro)
+]
+
+def _consulta_exportacao(vendedor_atual):
+    """Consulta das vendas a exportar conforme filtros e permissões; retorna (query, erro)"""
+    query = db.session.query(*[coluna for _, _, coluna in COLUNAS_EXPORTACAO]) \
+        .select_from(Venda) \
+        .outerjoin(VendedorComissao, Venda.id_vendedor_comissao == VendedorComissao.id) \
+        .outerjoin(Vendedor, VendedorComissao.id_vendedor == Vendedor.id)
+
+    # Filtro por vendedor (apenas para admin ou se o vendedor logado for o mesmo)
+    id_vendedor = request.args.get('id_vendedor', type=int)
+    if id_vendedor:
+        if vendedor_atual.email == 'admin@admin.com' or vendedor_atual.id == id_vendedor:
+            query = query.filter(VendedorComissao.id_vendedor == id_vendedor)
+        else:
+            return None, 'Não autorizado a exportar vendas de outros vendedores'
+    elif vendedor_atual.email != 'admin@admin.com':  # Se não for admin, só exporta as próprias vendas
+        query = query.filter(VendedorComissao.id_vendedor == vendedor_atual.id)
+
+    # Filtro por data
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+    if data_inicio:
+        query = query.filter(Venda.data_venda >= datetime.strptime(data_inicio, '%Y-%m-%d').date())
+    if data_fim:
+        query = query.filter(Venda.data_venda <= datetime.strptime(data_fim, '%Y-%m-%d').date())
+
+    # Filtro por status de comissão
+    comissao_paga = request.args.get('comissao_paga')
+    if comissao_paga is not None:
+        query = query.filter(Venda.comissao_paga == (comissao_paga.lower() == 'true'))
+
+    # yield_per usa cursor do lado do servidor: as linhas chegam em blocos, nunca todas de uma vez
+    query = query.order_by(Venda.data_venda.desc(), Venda.id.desc()) \
+        .execution_options(yield_per=TAMANHO_BLOCO_EXPORTACAO)
+
+    return query, None
+
+def _valores_exportacao(query):
+    """Linhas da exportação com os valores formatados como no CSV (datas continuam como date)"""
+    for id_venda, cpf, nome, data_venda, valor, comissao, paga, vendedor, tabela, usuario in query:
+        yield [id_venda, cpf, nome, data_venda, valor, comissao, 'Sim' if paga else 'Não', vendedor or 'N/A', tabela or 'N/A', usuario]
+
+def _linhas_csv(query):
+    """Gera o CSV em pedaços de ~TAMANHO_PEDACO_RESPOSTA bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([cabecalho for _, cabecalho, _ in COLUNAS_EXPORTACAO])
+
+    for linha in _valores_exportacao(query):
+        linha[3] = linha[3].strftime('%Y-%m-%d') if linha[3] else ''
+        writer.writerow(linha)
+
+        if buffer.tell() >= TAMANHO_PEDACO_RESPOSTA:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _pedacos_xlsx(query):
+    """Planilha write_only: as linhas vão direto do cursor para o arquivo, enviado em pedaços depois de pronto"""
+    cabecalho = [cabecalho for _, cabecalho, _ in COLUNAS_EXPORTACAO]
+    yield from pedacos_arquivo(gerar_xlsx([('Vendas', _com_cabecalho(cabecalho, _valores_exportacao(query)))]))
+
+def _com_cabecalho(cabecalho, linhas):
+    yield cabecalho
+    yield from linhas
+
+def _schema_colunar():
+    """Tipos das colunas exportadas: datas como date, valores numéricos e comissão paga como booleano"""
+    tipos = {
+        'id': pa.int64(),
+        'data_venda': pa.date32(),
+        'valor_venda': pa.float64(),
+        'valor_comissao': pa.float64(),
+        'comissao_paga': pa.bool_()
+    }
+    return pa.schema([(campo, tipos.get(campo, pa.string())) for campo, _, _ in COLUNAS_EXPORTACAO])
+
+class _SaidaStreaming:
+    """Destino de escrita do pyarrow que acumula os bytes até serem enviados na resposta"""
+
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+        self.closed = False
+
+    def write(self, dados):
+        dados = bytes(dados)
+        self.partes.append(dados)
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drenar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+def _lotes_colunares(query, schema):
+    """Agrupa as linhas da consulta em RecordBatches de até TAMANHO_GRUPO_COLUNAR linhas"""
+    colunas = [[] for _ in schema.names]
+    for linha in query:
+        for valores, valor in zip(colunas, linha):
+            valores.append(valor)
+
+        if len(colunas[0]) >= TAMANHO_GRUPO_COLUNAR:
+            yield pa.record_batch(colunas, schema=schema)
+            colunas = [[] for _ in schema.names]
+
+    if colunas[0]:
+        yield pa.record_batch(colunas, schema=schema)
+
+def _pedacos_parquet(query):
+    """Parquet escrito um row group por vez; cada row group é enviado assim que fica pronto"""
+    schema = _schema_colunar()
+    saida = _SaidaStreaming()
+    writer = pq.ParquetWriter(saida, schema, compression=COMPRESSAO_COLUNAR)
+
+    for lote in _lotes_colunares(query, schema):
+        writer.write_batch(lote, row_group_size=TAMANHO_GRUPO_COLUNAR)
+        yield saida.drenar()
+
+    # O rodapé com os metadados só existe depois do último row group
+    writer.close()
+    yield saida.drenar()
+
+def _pedacos_arrow(query):
+    """Arrow IPC em formato stream, um record batch por vez"""
+    schema = _schema_colunar()
+    saida = _SaidaStreaming()
+    writer = pa.ipc.new_stream(saida, schema, options=pa.ipc.IpcWriteOptions(compression=COMPRESSAO_COLUNAR))
+
+    yield saida.drenar()
+    for lote in _lotes_colunares(query, schema):
+        writer.write_batch(lote)
+        yield saida.drenar()
+
+    writer.close()
+    yield saida.drenar()
+
+def _compactar_gzip(pedacos):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for pedaco in pedacos:
+        dados = compressor.compress(pedaco)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+def _aceita_gzip():
+    return 'gzip' in request.headers.get('Accept-Encoding', '').lower() \
+        and request.args.get('gzip', 'true').lower() != 'false'
+
+@exportacao_bp.route('/exportacao/vendas', methods=['GET'])
+@token_required
+@ler_da_replica
+def exportar_vendas(vendedor_atual):
+    """Exporta as vendas filtradas em CSV, XLSX, Parquet ou Arrow IPC, enviadas em streaming (o XLSX só depois de gerado)"""
+    try:
+        formato = request.args.get('formato', 'csv').lower()
+        if formato not in FORMATOS_EXPORTACAO:
+            return jsonify({'erro': f'formato deve ser um de: {", ".join(FORMATOS_EXPORTACAO)}'}), 400
+
+        if formato in ('parquet', 'arrow') and not _carregar_pyarrow():
+            return jsonify({'erro': 'Exportação em Parquet/Arrow requer o pacote pyarrow instalado no servidor'}), 501
+
+        query, erro = _consulta_exportacao(vendedor_atual)
+        if erro:
+            return jsonify({'erro': erro}), 403
+
+        if formato == 'xlsx':
+            pedacos, mimetype, extensao = _pedacos_xlsx(query), MIMETYPE_XLSX, 'xlsx'
+        elif formato == 'parquet':
+            pedacos, mimetype, extensao = _pedacos_parquet(query), 'application/vnd.apache.parquet', 'parquet'
+        elif formato == 'arrow':
+            pedacos, mimetype, extensao = _pedacos_arrow(query), 'application/vnd.apache.arrow.stream', 'arrows'
+        else:
+            pedacos, mimetype, extensao = _linhas_csv(query), 'text/csv', 'csv'
+
+        headers = {'Content-Disposition': f'attachment; filename=vendas_exportadas.{extensao}'}
+
+        # Compactação opcional do CSV, negociada pelo Accept-Encoding do cliente (os formatos colunares já vêm compactados)
+        if formato == 'csv' and _aceita_gzip():
+            pedacos = _compactar_gzip(pedacos)
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
+
+        return Response(stream_with_context(pedacos), mimetype=mimetype, headers=headers)
+
+    except ValueError as e:
+        # Datas fora do formato AAAA-MM-DD
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
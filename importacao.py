@@ -1,120 +1,24 @@
-from flask import Blueprint, request, jsonify
-import openpyxl
+from flask import Blueprint, request, jsonify, current_app
+import io
 import os
 from datetime import datetime
 from src.models.user import db
-from src.models.venda import Venda
-from src.models.vendedor_comissao import VendedorComissao
-from src.models.vendedor import Vendedor
+from src.models.importacao_job import ImportacaoJob
+from src.services.importacao_pipeline import LEITORES, ImportacaoVendas, ErroGravacaoLote, ErroVendasDuplicadas, TAMANHO_LOTE_PADRAO, POLITICAS_DUPLICADAS, POLITICA_DUPLICADAS_PADRAO, FORMATOS_RELATORIO, caminho_relatorio_erros
+from src.services.importacao_jobs import criar_job, cancelar_job, recuperar_job_orfao
+from src.services.planilhas import obter_template, MIMETYPE_XLSX
 
 importacao_bp = Blueprint('importacao', __name__)
 
-def validar_cpf(cpf):
-    """Validação básica de CPF (formato)"""
-    if not cpf:
-        return False
-    
-    # Remover caracteres especiais
-    cpf_limpo = ''.join(filter(str.isdigit, str(cpf)))
-    
-    # Verificar se tem 11 dígitos
-    if len(cpf_limpo) != 11:
-        return False
-    
-    # Verificar se não são todos os dígitos iguais
-    if cpf_limpo == cpf_limpo[0] * 11:
-        return False
-    
-    return True
-
-def formatar_cpf(cpf):
-    """Formatar CPF para o padrão XXX.XXX.XXX-XX"""
-    if not cpf:
-        return None
-    
-    cpf_limpo = ''.join(filter(str.isdigit, str(cpf)))
-    if len(cpf_limpo) == 11:
-        return f"{cpf_limpo[:3]}.{cpf_limpo[3:6]}.{cpf_limpo[6:9]}-{cpf_limpo[9:]}"
-    return cpf
-
 @importacao_bp.route('/importacao/template', methods=['GET'])
 def baixar_template():
-    """Gera e retorna um template Excel para importação de vendas"""
+    """Prepara o template Excel para importação de vendas"""
     try:
-        # Buscar vendedores e suas configurações de comissão para o exemplo
-        vendedores_comissoes = VendedorComissao.query.join(Vendedor).all()
-        
-        # Criar workbook
-        wb = openpyxl.Workbook()
-        
-        # Aba principal com dados de exemplo
-        ws_vendas = wb.active
-        ws_vendas.title = "Vendas"
-        
-        # Cabeçalhos
-        headers = ['cpf_cliente', 'nome_cliente', 'data_venda', 'valor_venda', 'vendedor', 'tabela_comissao', 'usuario_cadastro']
-        for col, header in enumerate(headers, 1):
-            ws_vendas.cell(row=1, column=col, value=header)
-        
-        # Dados de exemplo
-        if vendedores_comissoes:
-            for i, vc in enumerate(vendedores_comissoes[:3], 2):  # Começar na linha 2
-                ws_vendas.cell(row=i, column=1, value=f'123.456.789-{i-2:02d}')
-                ws_vendas.cell(row=i, column=2, value=f'Cliente Exemplo {i-1}')
-                ws_vendas.cell(row=i, column=3, value='2025-06-29')
-                ws_vendas.cell(row=i, column=4, value=1000.00 * (i-1))
-                ws_vendas.cell(row=i, column=5, value=vc.vendedor.nome_vendedor)
-                ws_vendas.cell(row=i, column=6, value=vc.nome_tabela)
-                ws_vendas.cell(row=i, column=7, value='admin')
-        else:
-            # Exemplo genérico
-            ws_vendas.cell(row=2, column=1, value='123.456.789-00')
-            ws_vendas.cell(row=2, column=2, value='Cliente Exemplo')
-            ws_vendas.cell(row=2, column=3, value='2025-06-29')
-            ws_vendas.cell(row=2, column=4, value=1000.00)
-            ws_vendas.cell(row=2, column=5, value='Nome do Vendedor')
-            ws_vendas.cell(row=2, column=6, value='Nome da Tabela')
-            ws_vendas.cell(row=2, column=7, value='admin')
-        
-        # Aba de instruções
-        ws_instrucoes = wb.create_sheet("Instruções")
-        instrucoes_data = [
-            ['Campo', 'Descrição', 'Obrigatório', 'Exemplo'],
-            ['cpf_cliente', 'CPF do cliente (formato: XXX.XXX.XXX-XX ou apenas números)', 'Sim', '123.456.789-00'],
-            ['nome_cliente', 'Nome completo do cliente', 'Sim', 'João Silva'],
-            ['data_venda', 'Data da venda (formato: AAAA-MM-DD)', 'Sim', '2025-06-29'],
-            ['valor_venda', 'Valor da venda (formato: 1000.50)', 'Sim', '1500.00'],
-            ['vendedor', 'Nome exato do vendedor (deve existir no sistema)', 'Sim', 'Ana Silva'],
-            ['tabela_comissao', 'Nome da tabela de comissão (deve existir para o vendedor)', 'Sim', 'Gold'],
-            ['usuario_cadastro', 'Usuário que está cadastrando (opcional)', 'Não', 'admin']
-        ]
-        
-        for row, data in enumerate(instrucoes_data, 1):
-            for col, value in enumerate(data, 1):
-                ws_instrucoes.cell(row=row, column=col, value=value)
-        
-        # Aba com vendedores disponíveis
-        if vendedores_comissoes:
-            ws_vendedores = wb.create_sheet("Vendedores_Disponíveis")
-            ws_vendedores.cell(row=1, column=1, value='Vendedor')
-            ws_vendedores.cell(row=1, column=2, value='Tabela_Comissao')
-            ws_vendedores.cell(row=1, column=3, value='Porcentagem')
-            
-            for row, vc in enumerate(vendedores_comissoes, 2):
-                ws_vendedores.cell(row=row, column=1, value=vc.vendedor.nome_vendedor)
-                ws_vendedores.cell(row=row, column=2, value=vc.nome_tabela)
-                ws_vendedores.cell(row=row, column=3, value=f"{vc.porcentagem_comissao}%")
-        
-        # Salvar arquivo
-        temp_dir = os.path.join(os.path.dirname(__file__), '..', 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        arquivo_template = os.path.join(temp_dir, 'template_vendas.xlsx')
-        wb.save(arquivo_template)
+        # O template fica em cache e só é gerado de novo quando o catálogo de comissões muda
+        obter_template()
         
         return jsonify({
             'mensagem': 'Template gerado com sucesso',
-            'arquivo': arquivo_template,
             'download_url': f'/api/importacao/template/download'
         }), 200
         
@@ -127,189 +31,198 @@ def download_template():
     try:
         from flask import send_file
         
-        arquivo_template = os.path.join(os.path.dirname(__file__), '..', 'temp', 'template_vendas.xlsx')
-        
-        if not os.path.exists(arquivo_template):
-            return jsonify({'erro': 'Template não encontrado. Gere o template primeiro.'}), 404
-        
         return send_file(
-            arquivo_template,
+            io.BytesIO(obter_template()),
             as_attachment=True,
             download_name='template_vendas.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=MIMETYPE_XLSX
         )
         
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+def _validar_upload():
+    """Valida o arquivo e os parâmetros enviados; retorna (arquivo, opcoes, erro)"""
+    # Verificar se foi enviado um arquivo
+    if 'arquivo' not in request.files:
+        return None, None, 'Nenhum arquivo foi enviado'
+    
+    arquivo = request.files['arquivo']
+    
+    if arquivo.filename == '':
+        return None, None, 'Nenhum arquivo selecionado'
+    
+    # Verificar extensão do arquivo
+    if arquivo.filename.lower().endswith('.xls'):
+        return None, None, 'Planilhas .xls (Excel 97-2003) não são suportadas; salve o arquivo como .xlsx'
+    
+    if not arquivo.filename.lower().endswith(tuple(LEITORES)):
+        return None, None, 'Arquivo deve ser Excel (.xlsx), CSV (.csv) ou NDJSON (.ndjson)'
+    
+    # Parâmetros opcionais do motor de gravação em lotes e da validação paralela
+    tamanho_lote = request.form.get('tamanho_lote', TAMANHO_LOTE_PADRAO, type=int)
+    if tamanho_lote <= 0:
+        return None, None, 'tamanho_lote deve ser maior que zero'
+    
+    processos = request.form.get('processos', current_app.config.get('IMPORTACAO_PROCESSOS', 1), type=int)
+    if processos <= 0:
+        return None, None, 'processos deve ser maior que zero'
+    
+    politica_duplicadas = request.form.get('politica_duplicadas', POLITICA_DUPLICADAS_PADRAO)
+    if politica_duplicadas not in POLITICAS_DUPLICADAS:
+        return None, None, f'politica_duplicadas deve ser uma de: {", ".join(POLITICAS_DUPLICADAS)}'
+    
+    formato_relatorio = request.form.get('formato_relatorio', 'csv').lower()
+    if formato_relatorio not in FORMATOS_RELATORIO:
+        return None, None, f'formato_relatorio deve ser um de: {", ".join(FORMATOS_RELATORIO)}'
+    
+    # Simulação: apenas valida o arquivo, sem gravar vendas
+    simular = request.form.get('simular', 'false').lower() in ('true', '1', 'sim')
+    
+    return arquivo, {
+        'tamanho_lote': tamanho_lote,
+        'processos': min(processos, os.cpu_count() or 1),
+        'politica_duplicadas': politica_duplicadas,
+        'simular': simular,
+        'formato_relatorio': formato_relatorio
+    }, None
+
+def _temp_dir():
+    temp_dir = os.path.join(os.path.dirname(__file__), '..', 'temp')
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
 @importacao_bp.route('/importacao/vendas', methods=['POST'])
 def importar_vendas():
-    """Importa vendas de um arquivo Excel"""
+    """Importa vendas de um arquivo Excel, CSV ou NDJSON"""
     try:
-        # Verificar se foi enviado um arquivo
-        if 'arquivo' not in request.files:
-            return jsonify({'erro': 'Nenhum arquivo foi enviado'}), 400
+        arquivo, opcoes, erro = _validar_upload()
+        if erro:
+            return jsonify({'erro': erro}), 400
         
-        arquivo = request.files['arquivo']
-        
-        if arquivo.filename == '':
-            return jsonify({'erro': 'Nenhum arquivo selecionado'}), 400
-        
-        # Verificar extensão do arquivo
-        if not arquivo.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'erro': 'Arquivo deve ser Excel (.xlsx ou .xls)'}), 400
+        retomar_apos_linha = request.form.get('retomar_apos_linha', 0, type=int)
         
         # Salvar arquivo temporariamente
-        temp_dir = os.path.join(os.path.dirname(__file__), '..', 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
+        temp_dir = _temp_dir()
         
         arquivo_path = os.path.join(temp_dir, f'upload_{datetime.now().strftime("%Y%m%d_%H%M%S")}_{arquivo.filename}')
         arquivo.save(arquivo_path)
         
         try:
-            # Ler arquivo Excel
-            wb = openpyxl.load_workbook(arquivo_path)
-            ws = wb.active
-            
-            # Ler cabeçalhos
-            headers = []
-            for col in range(1, ws.max_column + 1):
-                header = ws.cell(row=1, column=col).value
-                if header:
-                    headers.append(str(header).strip())
-            
-            # Verificar colunas obrigatórias
-            colunas_obrigatorias = ['cpf_cliente', 'nome_cliente', 'data_venda', 'valor_venda', 'vendedor', 'tabela_comissao']
-            colunas_faltantes = [col for col in colunas_obrigatorias if col not in headers]
-            
-            if colunas_faltantes:
-                return jsonify({
-                    'erro': f'Colunas obrigatórias faltantes: {", ".join(colunas_faltantes)}'
-                }), 400
+            importacao = ImportacaoVendas(arquivo_path, retomar_apos_linha=retomar_apos_linha, diretorio_relatorio=temp_dir, **opcoes)
+            return jsonify(importacao.executar()), 200
             
-            # Mapear índices das colunas
-            col_indices = {header: headers.index(header) + 1 for header in headers}
+        except ValueError as e:
+            # Planilha fora do formato esperado (colunas obrigatórias faltantes)
+            return jsonify({'erro': str(e)}), 400
             
-            # Processar cada linha
-            vendas_criadas = []
-            erros = []
-            
-            for row_num in range(2, ws.max_row + 1):  # Começar da linha 2 (pular cabeçalho)
-                try:
-                    # Ler dados da linha
-                    row_data = {}
-                    for header in headers:
-                        cell_value = ws.cell(row=row_num, column=col_indices[header]).value
-                        row_data[header] = cell_value
-                    
-                    # Validar dados obrigatórios
-                    if not row_data.get('cpf_cliente') or not row_data.get('nome_cliente') or not row_data.get('valor_venda'):
-                        erros.append(f'Linha {row_num}: Dados obrigatórios faltantes')
-                        continue
-                    
-                    # Validar e formatar CPF
-                    cpf = str(row_data['cpf_cliente']).strip()
-                    if not validar_cpf(cpf):
-                        erros.append(f'Linha {row_num}: CPF inválido ({cpf})')
-                        continue
-                    
-                    cpf_formatado = formatar_cpf(cpf)
-                    
-                    # Validar valor da venda
-                    try:
-                        valor_venda = float(row_data['valor_venda'])
-                        if valor_venda <= 0:
-                            erros.append(f'Linha {row_num}: Valor da venda deve ser maior que zero')
-                            continue
-                    except (ValueError, TypeError):
-                        erros.append(f'Linha {row_num}: Valor da venda inválido')
-                        continue
-                    
-                    # Buscar vendedor e configuração de comissão
-                    nome_vendedor = str(row_data['vendedor']).strip()
-                    nome_tabela = str(row_data['tabela_comissao']).strip()
-                    
-                    vendedor_comissao = db.session.query(VendedorComissao).join(Vendedor).filter(
-                        Vendedor.nome_vendedor == nome_vendedor,
-                        VendedorComissao.nome_tabela == nome_tabela
-                    ).first()
-                    
-                    if not vendedor_comissao:
-                        erros.append(f'Linha {row_num}: Vendedor "{nome_vendedor}" com tabela "{nome_tabela}" não encontrado')
-                        continue
-                    
-                    # Processar data da venda
-                    data_venda = None
-                    if row_data.get('data_venda'):
-                        try:
-                            if isinstance(row_data['data_venda'], str):
-                                data_venda = datetime.strptime(row_data['data_venda'], '%Y-%m-%d').date()
-                            else:
-                                data_venda = row_data['data_venda'].date() if hasattr(row_data['data_venda'], 'date') else row_data['data_venda']
-                        except (ValueError, AttributeError):
-                            erros.append(f'Linha {row_num}: Data inválida (use formato AAAA-MM-DD)')
-                            continue
-                    
-                    # Criar venda
-                    venda = Venda(
-                        cpf_cliente=cpf_formatado,
-                        nome_cliente=str(row_data['nome_cliente']).strip(),
-                        valor_venda=valor_venda,
-                        id_vendedor_comissao=vendedor_comissao.id,
-                        usuario_cadastro=str(row_data.get('usuario_cadastro', 'Importação Excel')).strip(),
-                        valor_comissao=0.0  # Será calculado automaticamente
-                    )
-                    
-                    if data_venda:
-                        venda.data_venda = data_venda
-                    
-                    # Adicionar ao banco
-                    db.session.add(venda)
-                    db.session.flush()  # Para ter acesso ao relacionamento
-                    
-                    # Calcular comissão
-                    venda.calcular_comissao()
-                    
-                    vendas_criadas.append({
-                        'linha': row_num,
-                        'cliente': venda.nome_cliente,
-                        'valor': venda.valor_venda,
-                        'comissao': venda.valor_comissao,
-                        'vendedor': vendedor_comissao.vendedor.nome_vendedor,
-                        'tabela': vendedor_comissao.nome_tabela
-                    })
-                    
-                except Exception as e:
-                    erros.append(f'Linha {row_num}: Erro ao processar - {str(e)}')
-                    continue
-            
-            # Commit apenas se houver vendas criadas
-            if vendas_criadas:
-                db.session.commit()
-            else:
-                db.session.rollback()
-            
-            # Limpar arquivo temporário
-            if os.path.exists(arquivo_path):
-                os.remove(arquivo_path)
+        except ErroVendasDuplicadas as e:
+            # Política 'fail': o lote com duplicadas não foi gravado
+            return jsonify({
+                'erro': str(e),
+                'linhas_duplicadas': e.linhas,
+                'vendas_criadas': e.vendas_inseridas,
+                'ultima_linha_confirmada': e.ultima_linha_confirmada
+            }), 409
             
+        except ErroGravacaoLote as e:
+            # Lotes anteriores continuam gravados; o envio pode ser repetido com retomar_apos_linha
             return jsonify({
-                'mensagem': f'Importação concluída',
-                'vendas_criadas': len(vendas_criadas),
-                'erros_encontrados': len(erros),
-                'detalhes': {
-                    'vendas': vendas_criadas,
-                    'erros': erros
-                }
-            }), 200
+                'erro': str(e),
+                'vendas_criadas': e.vendas_inseridas,
+                'ultima_linha_confirmada': e.ultima_linha_confirmada,
+                'retomar_apos_linha': e.ultima_linha_confirmada or retomar_apos_linha
+            }), 500
             
         except Exception as e:
             db.session.rollback()
+            raise e
+            
+        finally:
             # Limpar arquivo temporário
             if os.path.exists(arquivo_path):
                 os.remove(arquivo_path)
-            raise e
             
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@importacao_bp.route('/importacao/jobs', methods=['POST'])
+def criar_job_importacao():
+    """Recebe o arquivo e agenda a importação em segundo plano"""
+    try:
+        arquivo, opcoes, erro = _validar_upload()
+        if erro:
+            return jsonify({'erro': erro}), 400
+        
+        job = criar_job(current_app._get_current_object(), arquivo, _temp_dir(), **opcoes)
+        
+        return jsonify({
+            'mensagem': 'Importação agendada',
+            'job': job.to_dict(),
+            'status_url': f'/api/importacao/jobs/{job.id}'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@importacao_bp.route('/importacao/jobs/<job_id>', methods=['GET'])
+def obter_job_importacao(job_id):
+    """Progresso e, ao final, o resumo de uma importação em segundo plano"""
+    try:
+        job = db.session.get(ImportacaoJob, job_id)
+        if not job:
+            return jsonify({'erro': 'Importação não encontrada'}), 404
+        
+        # Jobs abandonados por um worker que parou (ex.: reinício do servidor) voltam para a fila
+        recuperar_job_orfao(current_app._get_current_object(), job)
+        
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@importacao_bp.route('/importacao/jobs/<job_id>/cancelar', methods=['POST'])
+def cancelar_job_importacao(job_id):
+    """Solicita o cancelamento de uma importação em segundo plano"""
+    try:
+        job = db.session.get(ImportacaoJob, job_id)
+        if not job:
+            return jsonify({'erro': 'Importação não encontrada'}), 404
+        
+        if job.finalizado:
+            return jsonify({'erro': 'Importação já finalizada'}), 400
+        
+        job = cancelar_job(job)
+        
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@importacao_bp.route('/importacao/relatorios/<relatorio_id>', methods=['GET'])
+def download_relatorio_erros(relatorio_id):
+    """Download do relatório de erros (uma linha por erro) de uma importação ou simulação"""
+    try:
+        from flask import send_file
+        
+        arquivo_relatorio = caminho_relatorio_erros(_temp_dir(), relatorio_id)
+        
+        if not arquivo_relatorio:
+            return jsonify({'erro': 'Relatório não encontrado ou expirado'}), 404
+        
+        if arquivo_relatorio.endswith('.xlsx'):
+            download_name, mimetype = 'erros_importacao.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        else:
+            download_name, mimetype = 'erros_importacao.csv', 'text/csv'
+        
+        return send_file(
+            arquivo_relatorio,
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=mimetype
+        )
+        
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
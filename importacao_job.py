@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from src.models.user import db
+
+class ImportacaoJob(db.Model):
+    __tablename__ = 'importacao_job'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 em hexadecimal
+    nome_arquivo = db.Column(db.String(255), nullable=False)
+    arquivo_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, processando, concluido, erro, cancelado
+    tamanho_lote = db.Column(db.Integer, nullable=False)
+    processos = db.Column(db.Integer, nullable=False, default=1)  # Processos usados na validação paralela
+    politica_duplicadas = db.Column(db.String(10), nullable=False, default='skip')  # skip, update ou fail
+    simular = db.Column(db.Boolean, nullable=False, default=False)  # Apenas valida, sem gravar vendas
+    formato_relatorio = db.Column(db.String(10), nullable=False, default='csv')  # Formato do relatório de erros
+    linhas_lidas = db.Column(db.Integer, nullable=False, default=0)
+    vendas_inseridas = db.Column(db.Integer, nullable=False, default=0)
+    linhas_rejeitadas = db.Column(db.Integer, nullable=False, default=0)
+    vendas_duplicadas = db.Column(db.Integer, nullable=False, default=0)
+    ultima_linha_confirmada = db.Column(db.Integer, nullable=True)  # Checkpoint para retomar após reinício
+    cancelamento_solicitado = db.Column(db.Boolean, nullable=False, default=False)
+    resumo = db.Column(db.Text, nullable=True)  # JSON com o resumo final
+    mensagem_erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_atualizacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Também serve de heartbeat do worker
+    data_conclusao = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ImportacaoJob {self.id} - {self.status}>'
+
+    @property
+    def finalizado(self):
+        return self.status in ('concluido', 'erro', 'cancelado')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome_arquivo': self.nome_arquivo,
+            'status': self.status,
+            'tamanho_lote': self.tamanho_lote,
+            'processos': self.processos,
+            'politica_duplicadas': self.politica_duplicadas,
+            'simular': self.simular,
+            'formato_relatorio': self.formato_relatorio,
+            'progresso': {
+                'linhas_lidas': self.linhas_lidas,
+                'vendas_inseridas': self.vendas_inseridas,
+                'linhas_rejeitadas': self.linhas_rejeitadas,
+                'vendas_duplicadas': self.vendas_duplicadas,
+                'ultima_linha_confirmada': self.ultima_linha_confirmada
+            },
+            'cancelamento_solicitado': self.cancelamento_solicitado,
+            'resumo': json.loads(self.resumo) if self.resumo else None,
+            'mensagem_erro': self.mensagem_erro,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None,
+            'data_conclusao': self.data_conclusao.isoformat() if self.data_conclusao else None
+        }
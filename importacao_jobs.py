@@ -0,0 +1,208 @@
+"""
+Execução de importações de vendas em segundo plano.
+
+O upload cria um `ImportacaoJob` e devolve o id imediatamente; um pool de
+threads processa o arquivo com `ImportacaoVendas`. O progresso e o checkpoint
+são gravados na tabela `importacao_job` na mesma transação de cada lote de
+vendas, então um job interrompido por reinício do servidor é retomado a partir
+da última linha confirmada, sem duplicar vendas.
+"""
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from src.models.user import db
+from src.models.importacao_job import ImportacaoJob
+from src.services.importacao_pipeline import ImportacaoVendas, ImportacaoCancelada, ErroGravacaoLote
+
+WORKERS_PADRAO = 2
+
+# Jobs em processamento sem atualização há mais tempo que isso são considerados órfãos
+TIMEOUT_JOB_PADRAO = 300
+
+_executor = None
+_executor_lock = Lock()
+
+def _obter_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('IMPORTACAO_WORKERS', WORKERS_PADRAO),
+                thread_name_prefix='importacao'
+            )
+        return _executor
+
+def _limite_heartbeat(app):
+    return datetime.utcnow() - timedelta(seconds=app.config.get('IMPORTACAO_JOB_TIMEOUT', TIMEOUT_JOB_PADRAO))
+
+def criar_job(app, arquivo, temp_dir, tamanho_lote, processos=1, politica_duplicadas='skip', simular=False, formato_relatorio='csv'):
+    """Salva o arquivo enviado, registra o job e o coloca na fila"""
+    job_id = uuid.uuid4().hex
+    arquivo_path = os.path.join(temp_dir, f'job_{job_id}_{os.path.basename(arquivo.filename)}')
+    arquivo.save(arquivo_path)
+
+    job = ImportacaoJob(
+        id=job_id,
+        nome_arquivo=arquivo.filename,
+        arquivo_path=arquivo_path,
+        tamanho_lote=tamanho_lote,
+        processos=processos,
+        politica_duplicadas=politica_duplicadas,
+        simular=simular,
+        formato_relatorio=formato_relatorio
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    enfileirar_job(app, job_id)
+    return job
+
+def enfileirar_job(app, job_id):
+    _obter_executor(app).submit(_executar_job, app, job_id)
+
+def cancelar_job(job):
+    """Solicita o cancelamento; jobs ainda na fila são cancelados na hora"""
+    if job.finalizado:
+        return job
+
+    job.cancelamento_solicitado = True
+    if job.status == 'pendente':
+        job.status = 'cancelado'
+        job.data_conclusao = datetime.utcnow()
+        _remover_arquivo(job.arquivo_path)
+    job.data_atualizacao = datetime.utcnow()
+    db.session.commit()
+    return job
+
+def recuperar_job_orfao(app, job):
+    """Recoloca na fila um job cujo worker parou de dar sinal de vida"""
+    if job.status == 'processando' and job.data_atualizacao < _limite_heartbeat(app):
+        enfileirar_job(app, job.id)
+
+def retomar_jobs_pendentes(app):
+    """Recoloca na fila os jobs pendentes ou órfãos (chamado na inicialização)"""
+    jobs = ImportacaoJob.query.filter(
+        db.or_(
+            ImportacaoJob.status == 'pendente',
+            db.and_(ImportacaoJob.status == 'processando', ImportacaoJob.data_atualizacao < _limite_heartbeat(app))
+        )
+    ).all()
+
+    for job in jobs:
+        enfileirar_job(app, job.id)
+
+    return len(jobs)
+
+def _reivindicar_job(app, job_id):
+    """Marca o job como em processamento de forma atômica; só um worker vence"""
+    atualizados = ImportacaoJob.query.filter(
+        ImportacaoJob.id == job_id,
+        ImportacaoJob.cancelamento_solicitado.is_(False),
+        db.or_(
+            ImportacaoJob.status == 'pendente',
+            db.and_(ImportacaoJob.status == 'processando', ImportacaoJob.data_atualizacao < _limite_heartbeat(app))
+        )
+    ).update({'status': 'processando', 'data_atualizacao': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return atualizados == 1
+
+def _executar_job(app, job_id):
+    with app.app_context():
+        try:
+            _processar_job(app, job_id)
+        finally:
+            db.session.remove()
+
+def _processar_job(app, job_id):
+    if not _reivindicar_job(app, job_id):
+        return
+
+    job = db.session.get(ImportacaoJob, job_id)
+    arquivo_path = job.arquivo_path
+    checkpoint_inicial = job.ultima_linha_confirmada
+
+    # Ao retomar, os contadores continuam a partir do último checkpoint gravado; uma
+    # simulação não tem checkpoint e relê o arquivo inteiro, então recomeça do zero
+    if job.simular:
+        base_lidas = base_inseridas = base_rejeitadas = base_duplicadas = 0
+    else:
+        base_lidas = job.linhas_lidas
+        base_inseridas = job.vendas_inseridas
+        base_rejeitadas = job.linhas_rejeitadas
+        base_duplicadas = job.vendas_duplicadas
+
+    def valores_progresso(importacao, final=False):
+        # Durante a importação só entram as linhas cobertas pelo checkpoint, as demais são relidas numa retomada
+        if final or importacao.simular:
+            lidas, rejeitadas = importacao.linhas_lidas, importacao.linhas_rejeitadas
+        else:
+            lidas, rejeitadas = importacao.linhas_lidas_confirmadas, importacao.linhas_rejeitadas_confirmadas
+        return {
+            'linhas_lidas': base_lidas + lidas,
+            'vendas_inseridas': base_inseridas + importacao.vendas_inseridas,
+            'linhas_rejeitadas': base_rejeitadas + rejeitadas,
+            'vendas_duplicadas': base_duplicadas + importacao.vendas_duplicadas,
+            'ultima_linha_confirmada': importacao.ultima_linha_confirmada or checkpoint_inicial,
+            'data_atualizacao': datetime.utcnow()
+        }
+
+    def ao_progresso(importacao):
+        # Executado dentro da transação do lote: vendas e checkpoint são confirmados juntos
+        ImportacaoJob.query.filter_by(id=job_id).update(valores_progresso(importacao), synchronize_session=False)
+
+    def verificar(importacao):
+        # Heartbeat do worker e leitura do pedido de cancelamento; numa simulação não há lotes
+        # confirmados, então os contadores só podem ser atualizados aqui
+        campos = valores_progresso(importacao) if importacao.simular else {'data_atualizacao': datetime.utcnow()}
+        ImportacaoJob.query.filter_by(id=job_id).update(campos, synchronize_session=False)
+        db.session.commit()
+        return db.session.query(ImportacaoJob.cancelamento_solicitado).filter_by(id=job_id).scalar()
+
+    importacao = ImportacaoVendas(
+        arquivo_path,
+        tamanho_lote=job.tamanho_lote,
+        processos=job.processos,
+        politica_duplicadas=job.politica_duplicadas,
+        simular=job.simular,
+        diretorio_relatorio=os.path.dirname(arquivo_path),
+        formato_relatorio=job.formato_relatorio,
+        retomar_apos_linha=checkpoint_inicial,
+        ao_progresso=ao_progresso,
+        verificar=verificar
+    )
+
+    campos = {}
+    try:
+        resumo = importacao.executar()
+        resumo['erros_encontrados'] = base_rejeitadas + importacao.linhas_rejeitadas
+        resumo['linhas_lidas'] = base_lidas + importacao.linhas_lidas
+        if not importacao.simular:
+            resumo['vendas_criadas'] = base_inseridas + importacao.vendas_inseridas
+            resumo['vendas_duplicadas'] = base_duplicadas + importacao.vendas_duplicadas
+        campos = {'status': 'concluido', 'resumo': json.dumps(resumo)}
+
+    except ImportacaoCancelada:
+        db.session.rollback()
+        campos = {'status': 'cancelado'}
+
+    except (ValueError, ErroGravacaoLote) as e:
+        db.session.rollback()
+        campos = {'status': 'erro', 'mensagem_erro': str(e)}
+
+    except Exception as e:
+        db.session.rollback()
+        campos = {'status': 'erro', 'mensagem_erro': f'Erro ao processar - {str(e)}'}
+
+    campos.update(valores_progresso(importacao, final=True))
+    campos['data_conclusao'] = datetime.utcnow()
+    ImportacaoJob.query.filter_by(id=job_id).update(campos, synchronize_session=False)
+    db.session.commit()
+
+    _remover_arquivo(arquivo_path)
+
+def _remover_arquivo(arquivo_path):
+    if arquivo_path and os.path.exists(arquivo_path):
+        os.remove(arquivo_path)
@@ -0,0 +1,802 @@
+"""
+Pipeline de importação de vendas em streaming.
+
+O arquivo (.xlsx, .csv ou .ndjson) é lido linha a linha e cada linha passa
+por geradores de validação antes de chegar à etapa de gravação.
+Nenhuma etapa guarda o arquivo inteiro em memória, então o consumo fica
+estável independentemente do número de linhas.
+"""
+import csv
+import json
+import os
+import re
+import time
+import uuid
+import multiprocessing
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from datetime import datetime
+from sqlalchemy import insert, update, select
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.vendedor import Vendedor
+from src.services.resumo_vendas import DeltasResumo, condicoes_por_ids
+from src.services.validacao_vendas import ERRO_LEITURA, validar_lote, _validar_linha_segura
+
+COLUNAS_OBRIGATORIAS = ['cpf_cliente', 'nome_cliente', 'data_venda', 'valor_venda', 'vendedor', 'tabela_comissao']
+
+# Quantidade de vendas gravadas por INSERT/commit
+TAMANHO_LOTE_PADRAO = 5000
+
+# Linhas enviadas de uma vez para cada processo na validação paralela
+TAMANHO_LOTE_VALIDACAO = 2000
+
+# Quantas linhas de exemplo guardar por par vendedor/tabela não encontrado
+MAX_LINHAS_POR_PAR = 20
+
+# O que fazer com vendas cujo fingerprint já existe: ignorar, atualizar a existente ou abortar a importação
+POLITICAS_DUPLICADAS = ('skip', 'update', 'fail')
+POLITICA_DUPLICADAS_PADRAO = 'skip'
+
+# Itens de `detalhes` (vendas e erros) devolvidos na resposta; a lista completa de erros vai para o relatório
+MAX_DETALHES_RESPOSTA = 100
+
+# Formatos do relatório de erros e por quanto tempo os relatórios ficam disponíveis para download
+FORMATOS_RELATORIO = ('csv', 'xlsx')
+VALIDADE_RELATORIO_HORAS = 24
+
+# Quantidade de fingerprints por consulta IN (abaixo do limite de parâmetros do SQLite)
+TAMANHO_CONSULTA_FINGERPRINTS = 900
+
+class ErroGravacaoLote(Exception):
+    """Falha ao gravar um lote; os lotes anteriores já estão confirmados no banco"""
+
+    def __init__(self, mensagem, ultima_linha_confirmada, vendas_inseridas):
+        super().__init__(mensagem)
+        self.ultima_linha_confirmada = ultima_linha_confirmada
+        self.vendas_inseridas = vendas_inseridas
+
+class ErroVendasDuplicadas(ErroGravacaoLote):
+    """Vendas já cadastradas encontradas com a política 'fail'; o lote não foi gravado"""
+
+    def __init__(self, linhas, ultima_linha_confirmada, vendas_inseridas):
+        super().__init__(
+            f'Vendas já cadastradas nas linhas: {", ".join(str(l) for l in linhas[:20])}' + ('...' if len(linhas) > 20 else ''),
+            ultima_linha_confirmada,
+            vendas_inseridas
+        )
+        self.linhas = linhas
+
+ComissaoResolvida = namedtuple('ComissaoResolvida', ['id', 'id_vendedor', 'nome_vendedor', 'nome_tabela', 'porcentagem_comissao'])
+
+def colunas_faltantes(headers):
+    """Retorna as colunas obrigatórias ausentes no cabeçalho"""
+    return [col for col in COLUNAS_OBRIGATORIAS if col not in headers]
+
+class LeitorXlsx:
+    """
+    Leitor de planilhas .xlsx em modo somente leitura.
+
+    Iterar o leitor produz tuplas (numero_linha, dados) em que `dados` mapeia
+    cada cabeçalho ao valor da célula. Deve ser usado como gerenciador de
+    contexto para que o arquivo seja fechado ao final.
+    """
+
+    def __init__(self, arquivo_path):
+        import openpyxl  # Carregado na primeira importação de .xlsx, não na inicialização dos workers
+
+        self.wb = openpyxl.load_workbook(arquivo_path, read_only=True, data_only=True)
+        self.rows = self.wb.active.iter_rows(values_only=True)
+
+        primeira_linha = next(self.rows, None) or ()
+        self.colunas = [str(valor).strip() if valor is not None else None for valor in primeira_linha]
+        self.headers = [header for header in self.colunas if header]
+
+    def __iter__(self):
+        for row_num, valores in enumerate(self.rows, start=2):
+            # Linhas totalmente vazias (comuns no fim de planilhas formatadas) são ignoradas
+            if all(valor is None for valor in valores):
+                continue
+
+            yield row_num, {
+                header: valores[indice] if indice < len(valores) else None
+                for indice, header in enumerate(self.colunas)
+                if header
+            }
+
+    def close(self):
+        self.wb.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class LeitorCsv:
+    """
+    Leitor de arquivos .csv com cabeçalho na primeira linha.
+
+    O separador (vírgula, ponto e vírgula ou tabulação) é detectado pelo
+    cabeçalho. Células vazias são tratadas como ausentes, assim como no Excel.
+    """
+
+    def __init__(self, arquivo_path):
+        self.arquivo = open(arquivo_path, 'r', encoding='utf-8-sig', newline='')
+
+        primeira_linha = self.arquivo.readline()
+        try:
+            dialeto = csv.Sniffer().sniff(primeira_linha, delimiters=',;\t')
+        except csv.Error:
+            dialeto = csv.excel
+        self.arquivo.seek(0)
+
+        self.rows = csv.reader(self.arquivo, dialeto)
+        self.colunas = [valor.strip() or None for valor in next(self.rows, [])]
+        self.headers = [header for header in self.colunas if header]
+
+    def __iter__(self):
+        for row_num, valores in enumerate(self.rows, start=2):
+            valores = [valor if valor.strip() else None for valor in valores]
+            if all(valor is None for valor in valores):
+                continue
+
+            yield row_num, {
+                header: valores[indice] if indice < len(valores) else None
+                for indice, header in enumerate(self.colunas)
+                if header
+            }
+
+    def close(self):
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class LeitorNdjson:
+    """
+    Leitor de arquivos .ndjson (um objeto JSON por linha).
+
+    Não há linha de cabeçalho: as colunas são as chaves do primeiro objeto e o
+    número da linha é o da linha no arquivo.
+    """
+
+    def __init__(self, arquivo_path):
+        self.arquivo = open(arquivo_path, 'r', encoding='utf-8-sig')
+        self.headers = []
+
+        # Encontrar o primeiro objeto para conhecer as colunas, sem consumir o arquivo
+        for linha in self.arquivo:
+            if linha.strip():
+                try:
+                    objeto = json.loads(linha)
+                except ValueError:
+                    break
+                if isinstance(objeto, dict):
+                    self.headers = [str(chave).strip() for chave in objeto]
+                break
+        self.arquivo.seek(0)
+
+    def __iter__(self):
+        for row_num, linha in enumerate(self.arquivo, start=1):
+            if not linha.strip():
+                continue
+
+            try:
+                objeto = json.loads(linha)
+            except ValueError:
+                yield row_num, {ERRO_LEITURA: 'JSON inválido'}
+                continue
+
+            if not isinstance(objeto, dict):
+                yield row_num, {ERRO_LEITURA: 'Linha deve conter um objeto JSON'}
+                continue
+
+            yield row_num, {
+                str(chave).strip(): (None if valor == '' else valor)
+                for chave, valor in objeto.items()
+            }
+
+    def close(self):
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Leitor usado para cada extensão aceita na importação (o openpyxl não lê o formato binário .xls)
+LEITORES = {
+    '.xlsx': LeitorXlsx,
+    '.csv': LeitorCsv,
+    '.ndjson': LeitorNdjson
+}
+
+def abrir_leitor(arquivo_path):
+    """Abre o leitor adequado à extensão do arquivo"""
+    extensao = os.path.splitext(arquivo_path)[1].lower()
+    if extensao not in LEITORES:
+        raise ValueError(f'Formato de arquivo não suportado ({extensao or "sem extensão"})')
+    return LEITORES[extensao](arquivo_path)
+
+def validar_linhas(linhas):
+    """Gerador que aplica `validar_linha` e produz (numero_linha, dados, erro)"""
+    for row_num, row_data in linhas:
+        dados, erro = _validar_linha_segura(row_num, row_data)
+        yield row_num, dados, erro
+
+def _contexto_processos():
+    # Sem fork direto: a importação roda em threads (jobs, servidor) e um fork copiaria
+    # travas presas por elas. O forkserver é iniciado por exec com só o módulo de validação
+    # carregado e os processos do pool nascem dele; como no spawn, cada um reimporta o script
+    # principal como __mp_main__ (o main.py não cria tabelas nem retoma jobs nesse caso)
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        contexto.set_forkserver_preload(['src.services.validacao_vendas'])
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+def validar_linhas_paralelo(linhas, processos, tamanho_lote=TAMANHO_LOTE_VALIDACAO):
+    """
+    Versão de `validar_linhas` que distribui lotes de linhas por um pool de processos.
+
+    Os resultados saem na ordem original, com o número de cada linha. No máximo
+    dois lotes por processo ficam em andamento, para que a memória continue
+    limitada mesmo em arquivos muito grandes.
+    """
+    linhas = iter(linhas)
+    executor = ProcessPoolExecutor(max_workers=processos, mp_context=_contexto_processos())
+    pendentes = deque()
+
+    try:
+        while True:
+            lote = list(islice(linhas, tamanho_lote))
+            if lote:
+                pendentes.append(executor.submit(validar_lote, lote))
+
+            # Entregar o lote mais antigo quando a fila estiver cheia ou a leitura tiver terminado
+            while pendentes and (not lote or len(pendentes) >= processos * 2):
+                yield from pendentes.popleft().result()
+
+            if not lote:
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def normalizar_chave(texto):
+    """Normaliza nomes para comparação: sem espaços extras e sem diferença de maiúsculas"""
+    return ' '.join(str(texto).split()).casefold()
+
+class ResolvedorComissoes:
+    """
+    Catálogo (vendedor, tabela) -> configuração de comissão de uma importação.
+
+    As configurações são carregadas com uma única consulta na criação e cada
+    linha é resolvida por busca em dicionário. Nomes que só diferem em
+    maiúsculas ou espaços levam à mesma chave; quando mais de uma configuração
+    cai na mesma chave, o par é ambíguo e as linhas que o usam são rejeitadas
+    em vez de irem para uma delas ao acaso. Pares não encontrados e ambíguos
+    são acumulados para serem reportados em lote ao final.
+    """
+
+    def __init__(self):
+        self.comissoes = {}
+        self.chaves_ambiguas = {}  # Chave -> quantidade de configurações com ela
+        self.pares_desconhecidos = {}
+        self.pares_ambiguos = {}
+
+        consulta = db.session.query(
+            VendedorComissao.id,
+            VendedorComissao.id_vendedor,
+            Vendedor.nome_vendedor,
+            VendedorComissao.nome_tabela,
+            VendedorComissao.porcentagem_comissao
+        ).join(Vendedor, VendedorComissao.id_vendedor == Vendedor.id)
+
+        for linha in consulta:
+            comissao = ComissaoResolvida(*linha)
+            chave = (normalizar_chave(comissao.nome_vendedor), normalizar_chave(comissao.nome_tabela))
+            if chave in self.chaves_ambiguas:
+                self.chaves_ambiguas[chave] += 1
+            elif chave in self.comissoes:
+                del self.comissoes[chave]
+                self.chaves_ambiguas[chave] = 2
+            else:
+                self.comissoes[chave] = comissao
+
+    def resolver(self, nome_vendedor, nome_tabela, row_num=None):
+        """Retorna a ComissaoResolvida do par ou None, registrando a linha se o par não existir ou for ambíguo"""
+        chave = (normalizar_chave(nome_vendedor), normalizar_chave(nome_tabela))
+        comissao = self.comissoes.get(chave)
+
+        if comissao is None:
+            pares = self.pares_ambiguos if chave in self.chaves_ambiguas else self.pares_desconhecidos
+            par = pares.setdefault((nome_vendedor, nome_tabela), {'ocorrencias': 0, 'linhas': []})
+            par['ocorrencias'] += 1
+            if row_num is not None and len(par['linhas']) < MAX_LINHAS_POR_PAR:
+                par['linhas'].append(row_num)
+
+        return comissao
+
+    def motivo_rejeicao(self, nome_vendedor, nome_tabela):
+        """Mensagem de erro de um par que `resolver` não resolveu"""
+        quantidade = self.chaves_ambiguas.get((normalizar_chave(nome_vendedor), normalizar_chave(nome_tabela)))
+        if quantidade:
+            return f'Vendedor "{nome_vendedor}" com tabela "{nome_tabela}" é ambíguo ({quantidade} configurações de comissão com esse nome)'
+        return f'Vendedor "{nome_vendedor}" com tabela "{nome_tabela}" não encontrado'
+
+    @property
+    def linhas_nao_resolvidas(self):
+        """Total de linhas rejeitadas por par vendedor/tabela inexistente ou ambíguo"""
+        return sum(par['ocorrencias'] for pares in (self.pares_desconhecidos, self.pares_ambiguos) for par in pares.values())
+
+    def erros_pares_desconhecidos(self):
+        """Uma mensagem de erro por par vendedor/tabela não encontrado ou ambíguo"""
+        erros = []
+        for pares in (self.pares_desconhecidos, self.pares_ambiguos):
+            for (nome_vendedor, nome_tabela), par in pares.items():
+                linhas = ', '.join(str(linha) for linha in par['linhas'])
+                if par['ocorrencias'] > len(par['linhas']):
+                    linhas += f' e mais {par["ocorrencias"] - len(par["linhas"])}'
+                erros.append(f'{self.motivo_rejeicao(nome_vendedor, nome_tabela)} (linhas {linhas})')
+        return erros
+
+    def relatorio_pares_desconhecidos(self):
+        """Pares não encontrados em formato serializável para a resposta da API"""
+        return self._relatorio_pares(self.pares_desconhecidos)
+
+    def relatorio_pares_ambiguos(self):
+        """Pares ambíguos em formato serializável para a resposta da API"""
+        return self._relatorio_pares(self.pares_ambiguos)
+
+    @staticmethod
+    def _relatorio_pares(pares):
+        return [
+            {
+                'vendedor': nome_vendedor,
+                'tabela': nome_tabela,
+                'ocorrencias': par['ocorrencias'],
+                'linhas': par['linhas']
+            }
+            for (nome_vendedor, nome_tabela), par in pares.items()
+        ]
+
+class GravadorVendas:
+    """
+    Grava as vendas importadas em lotes.
+
+    Cada lote é inserido com um único INSERT executemany e confirmado com seu
+    próprio commit, de modo que o lock de escrita do banco é liberado entre os
+    lotes. `ultima_linha_confirmada` funciona como checkpoint: uma importação
+    interrompida pode ser retomada a partir da linha seguinte.
+
+    Antes de inserir, os fingerprints do lote são consultados no banco de uma
+    só vez; vendas já cadastradas (ou repetidas dentro do lote) são tratadas
+    conforme `politica_duplicadas` e contadas em `vendas_duplicadas`.
+    """
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE_PADRAO, ao_confirmar_lote=None, politica_duplicadas=POLITICA_DUPLICADAS_PADRAO):
+        if politica_duplicadas not in POLITICAS_DUPLICADAS:
+            raise ValueError(f'Política de duplicadas inválida: {politica_duplicadas}')
+
+        self.tamanho_lote = tamanho_lote
+        self.ao_confirmar_lote = ao_confirmar_lote
+        self.politica_duplicadas = politica_duplicadas
+        self.lote = []
+        self.linhas_lote = []
+        self.ultima_linha_lote = None
+        self.linhas_duplicadas_lote = []
+        self.vendas_inseridas = 0
+        self.vendas_duplicadas = 0
+        self.ultima_linha_confirmada = None
+
+    def adicionar(self, row_num, dados, comissao):
+        """Enfileira uma venda validada; grava o lote quando ele estiver cheio"""
+        data_venda = dados['data_venda'] or datetime.utcnow().date()
+        venda = {
+            'cpf_cliente': dados['cpf_cliente'],
+            'nome_cliente': dados['nome_cliente'],
+            'data_venda': data_venda,
+            'valor_venda': dados['valor_venda'],
+            'valor_comissao': Venda.calcular_valor_comissao(dados['valor_venda'], comissao.porcentagem_comissao),
+            'comissao_paga': False,
+            'id_vendedor_comissao': comissao.id,
+            'usuario_cadastro': dados['usuario_cadastro'],
+            'fingerprint': Venda.gerar_fingerprint(dados['cpf_cliente'], data_venda, dados['valor_venda'], comissao.id)
+        }
+        self.lote.append(venda)
+        self.linhas_lote.append(row_num)
+        self.ultima_linha_lote = row_num
+
+        if len(self.lote) >= self.tamanho_lote:
+            self.confirmar()
+
+        return venda
+
+    def confirmar(self):
+        """Grava e confirma o lote pendente"""
+        if not self.lote:
+            return
+
+        vendas_inseridas, vendas_duplicadas, ultima_linha_confirmada = self.vendas_inseridas, self.vendas_duplicadas, self.ultima_linha_confirmada
+
+        try:
+            novas, atualizacoes, linhas_duplicadas = self._separar_duplicadas()
+
+            if linhas_duplicadas and self.politica_duplicadas == 'fail':
+                raise ErroVendasDuplicadas(linhas_duplicadas, self.ultima_linha_confirmada, self.vendas_inseridas)
+
+            # Totais do resumo atualizados na mesma transação do lote
+            deltas = DeltasResumo()
+            conexao = db.session.connection()
+
+            if novas:
+                db.session.execute(insert(Venda), novas)
+                for venda in novas:
+                    deltas.venda(venda['id_vendedor_comissao'], venda['data_venda'], venda['valor_venda'], venda['valor_comissao'], venda['comissao_paga'])
+            if atualizacoes:
+                blocos = condicoes_por_ids(venda['id'] for venda in atualizacoes)
+                for condicoes in blocos:
+                    deltas.retirar(conexao, condicoes)
+                db.session.execute(update(Venda), atualizacoes)
+                for condicoes in blocos:
+                    deltas.somar(conexao, condicoes)
+
+            deltas.aplicar(conexao)
+
+            self.vendas_inseridas += len(novas)
+            self.vendas_duplicadas += len(linhas_duplicadas)
+            self.linhas_duplicadas_lote = linhas_duplicadas
+            self.ultima_linha_confirmada = self.ultima_linha_lote
+
+            # O callback roda dentro da transação do lote (ex.: gravar o checkpoint de um job)
+            if self.ao_confirmar_lote:
+                self.ao_confirmar_lote(self)
+
+            db.session.commit()
+        except ErroVendasDuplicadas:
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            self.vendas_inseridas, self.vendas_duplicadas, self.ultima_linha_confirmada = vendas_inseridas, vendas_duplicadas, ultima_linha_confirmada
+            raise ErroGravacaoLote(
+                f'Erro ao gravar lote até a linha {self.ultima_linha_lote}: {str(e)}',
+                self.ultima_linha_confirmada,
+                self.vendas_inseridas
+            ) from e
+
+        self.lote = []
+        self.linhas_lote = []
+
+    def _separar_duplicadas(self):
+        """Separa o lote em vendas novas e duplicadas com uma consulta por bloco de fingerprints"""
+        existentes = self._fingerprints_existentes({venda['fingerprint'] for venda in self.lote})
+
+        novas = {}
+        atualizacoes = {}
+        linhas_duplicadas = []
+        for row_num, venda in zip(self.linhas_lote, self.lote):
+            fingerprint = venda['fingerprint']
+
+            if fingerprint in existentes:
+                linhas_duplicadas.append(row_num)
+                # Com 'update' a última ocorrência no arquivo prevalece
+                atualizacoes[fingerprint] = {
+                    'id': existentes[fingerprint],
+                    'nome_cliente': venda['nome_cliente'],
+                    'valor_comissao': venda['valor_comissao'],
+                    'usuario_cadastro': venda['usuario_cadastro']
+                }
+            elif fingerprint in novas:
+                # Repetida dentro do próprio lote
+                linhas_duplicadas.append(row_num)
+                if self.politica_duplicadas == 'update':
+                    novas[fingerprint].update(nome_cliente=venda['nome_cliente'], usuario_cadastro=venda['usuario_cadastro'])
+            else:
+                novas[fingerprint] = dict(venda)
+
+        if self.politica_duplicadas != 'update':
+            atualizacoes = {}
+
+        return list(novas.values()), list(atualizacoes.values()), linhas_duplicadas
+
+    @staticmethod
+    def _fingerprints_existentes(fingerprints):
+        """Mapa fingerprint -> id das vendas já cadastradas"""
+        fingerprints = list(fingerprints)
+        existentes = {}
+        for inicio in range(0, len(fingerprints), TAMANHO_CONSULTA_FINGERPRINTS):
+            bloco = fingerprints[inicio:inicio + TAMANHO_CONSULTA_FINGERPRINTS]
+            existentes.update(db.session.execute(
+                select(Venda.fingerprint, Venda.id).where(Venda.fingerprint.in_(bloco))
+            ).all())
+        return existentes
+
+class RelatorioErros:
+    """
+    Relatório com um erro por linha, gravado em disco durante a importação.
+
+    As linhas são escritas à medida que os erros aparecem (CSV diretamente ou
+    XLSX em modo write_only), então nem o relatório nem a resposta da API
+    precisam guardar todos os erros em memória. O arquivo é baixado depois
+    pelo `id` do relatório.
+    """
+
+    def __init__(self, diretorio, formato='csv'):
+        if formato not in FORMATOS_RELATORIO:
+            raise ValueError(f'Formato de relatório inválido: {formato}')
+
+        limpar_relatorios_antigos(diretorio)
+
+        self.id = uuid.uuid4().hex
+        self.formato = formato
+        self.caminho = os.path.join(diretorio, f'relatorio_erros_{self.id}.{formato}')
+        self.total = 0
+
+        if formato == 'xlsx':
+            import openpyxl
+
+            self.wb = openpyxl.Workbook(write_only=True)
+            self.planilha = self.wb.create_sheet('Erros')
+            self.planilha.append(['linha', 'erro'])
+        else:
+            self.arquivo = open(self.caminho, 'w', newline='', encoding='utf-8-sig')
+            self.writer = csv.writer(self.arquivo, delimiter=';')
+            self.writer.writerow(['linha', 'erro'])
+
+    def registrar(self, row_num, mensagem):
+        # A linha já tem coluna própria no relatório
+        prefixo = f'Linha {row_num}: '
+        if mensagem.startswith(prefixo):
+            mensagem = mensagem[len(prefixo):]
+
+        if self.formato == 'xlsx':
+            self.planilha.append([row_num, mensagem])
+        else:
+            self.writer.writerow([row_num, mensagem])
+        self.total += 1
+
+    def fechar(self):
+        """Finaliza o arquivo; relatórios sem erros são removidos"""
+        if self.formato == 'xlsx':
+            if self.total:
+                self.wb.save(self.caminho)
+            self.wb.close()
+        else:
+            self.arquivo.close()
+            if not self.total:
+                os.remove(self.caminho)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'formato': self.formato,
+            'erros': self.total,
+            'url': f'/api/importacao/relatorios/{self.id}'
+        }
+
+def caminho_relatorio_erros(diretorio, relatorio_id):
+    """Caminho do relatório com esse id ou None se não existir (ou tiver expirado)"""
+    if not re.fullmatch(r'[0-9a-f]{32}', relatorio_id or ''):
+        return None
+    for formato in FORMATOS_RELATORIO:
+        caminho = os.path.join(diretorio, f'relatorio_erros_{relatorio_id}.{formato}')
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+def limpar_relatorios_antigos(diretorio, horas=VALIDADE_RELATORIO_HORAS):
+    limite = time.time() - horas * 3600
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome.startswith('relatorio_erros_') and os.path.getmtime(caminho) < limite:
+            os.remove(caminho)
+
+class ImportacaoCancelada(Exception):
+    """A importação foi interrompida a pedido do usuário"""
+
+class ImportacaoVendas:
+    """
+    Executa uma importação completa: leitura, validação, resolução e gravação.
+
+    Os contadores (`linhas_lidas`, `linhas_rejeitadas`, `vendas_inseridas`) e o
+    checkpoint `ultima_linha_confirmada` podem ser consultados durante a
+    execução. `ao_progresso` é chamado dentro da transação de cada lote, antes
+    do commit, e `verificar` é chamado a cada `tamanho_lote` linhas lidas; se
+    retornar True a importação é cancelada. Com `processos` > 1 a validação das
+    linhas é feita em paralelo por `validar_linhas_paralelo`.
+    `politica_duplicadas` ('skip', 'update' ou 'fail') define o tratamento de
+    vendas que já existem no banco.
+
+    Com `simular` o arquivo é apenas validado (linhas e pares vendedor/tabela),
+    sem gravar nada. Se `diretorio_relatorio` for informado, todos os erros
+    são gravados num `RelatorioErros`; a resposta traz só os primeiros
+    `MAX_DETALHES_RESPOSTA` itens de cada lista.
+    """
+
+    def __init__(self, arquivo_path, tamanho_lote=TAMANHO_LOTE_PADRAO, retomar_apos_linha=0, ao_progresso=None, verificar=None, processos=1,
+                 politica_duplicadas=POLITICA_DUPLICADAS_PADRAO, simular=False, diretorio_relatorio=None, formato_relatorio='csv'):
+        self.arquivo_path = arquivo_path
+        self.tamanho_lote = tamanho_lote
+        self.processos = processos or 1
+        self.retomar_apos_linha = retomar_apos_linha or 0
+        self.ao_progresso = ao_progresso
+        self.verificar = verificar
+        self.simular = simular
+        self.diretorio_relatorio = diretorio_relatorio
+        self.formato_relatorio = formato_relatorio
+
+        self.linhas_lidas = 0
+        self.linhas_validas = 0
+        self.linhas_rejeitadas = 0
+        # Contadores até a última linha confirmada (o checkpoint): as linhas lidas adiante
+        # ou rejeitadas depois dela são lidas de novo quando a importação é retomada
+        self.linhas_lidas_confirmadas = 0
+        self.linhas_rejeitadas_confirmadas = 0
+        self._linhas_processadas = 0
+        self._contadores_ultima_venda = (0, 0)
+        self.vendas_criadas = []
+        self.inicio_lote_detalhes = 0
+        self.erros = []
+        self.detalhes_truncados = False
+        self.resolvedor = None
+        self.relatorio = None
+        self.gravador = GravadorVendas(tamanho_lote=tamanho_lote, ao_confirmar_lote=self._lote_confirmado, politica_duplicadas=politica_duplicadas)
+
+    @property
+    def vendas_inseridas(self):
+        return self.gravador.vendas_inseridas
+
+    @property
+    def vendas_duplicadas(self):
+        return self.gravador.vendas_duplicadas
+
+    @property
+    def ultima_linha_confirmada(self):
+        return self.gravador.ultima_linha_confirmada
+
+    def executar(self):
+        """Processa o arquivo inteiro e retorna o resumo da importação"""
+        with abrir_leitor(self.arquivo_path) as leitor:
+            # Verificar colunas obrigatórias
+            faltantes = colunas_faltantes(leitor.headers)
+            if faltantes:
+                raise ValueError(f'Colunas obrigatórias faltantes: {", ".join(faltantes)}')
+
+            # Carregar o catálogo vendedor/tabela uma única vez para toda a importação
+            self.resolvedor = ResolvedorComissoes()
+
+            if self.diretorio_relatorio:
+                self.relatorio = RelatorioErros(self.diretorio_relatorio, self.formato_relatorio)
+
+            try:
+                self._processar(leitor)
+            finally:
+                if self.relatorio:
+                    self.relatorio.fechar()
+
+        # Pares vendedor/tabela inexistentes ou ambíguos são reportados em lote
+        for erro in self.resolvedor.erros_pares_desconhecidos():
+            self._guardar_erro(erro)
+
+        return self.resumo()
+
+    def _processar(self, leitor):
+        # Com mais de um processo a validação roda em paralelo; a gravação continua neste processo
+        if self.processos > 1:
+            linhas_validadas = validar_linhas_paralelo(self._linhas(leitor), self.processos)
+        else:
+            linhas_validadas = validar_linhas(self._linhas(leitor))
+
+        for row_num, dados, erro in linhas_validadas:
+            self._linhas_processadas += 1
+            if erro:
+                self._registrar_erro(row_num, erro)
+                continue
+
+            # Resolver vendedor e configuração de comissão em memória
+            comissao = self.resolvedor.resolver(dados['nome_vendedor'], dados['nome_tabela'], row_num)
+            if not comissao:
+                # Na resposta o par é reportado uma vez só; no relatório, em cada linha
+                self.linhas_rejeitadas += 1
+                if self.relatorio:
+                    self.relatorio.registrar(row_num, self.resolvedor.motivo_rejeicao(dados['nome_vendedor'], dados['nome_tabela']))
+                continue
+
+            self.linhas_validas += 1
+            if self.simular:
+                continue
+
+            # O detalhe entra antes de enfileirar: se esta linha completar o lote, ela já faz parte dele
+            detalhe = {'linha': row_num, 'vendedor': comissao.nome_vendedor, 'tabela': comissao.nome_tabela}
+            if len(self.vendas_criadas) < MAX_DETALHES_RESPOSTA:
+                self.vendas_criadas.append(detalhe)
+            else:
+                self.detalhes_truncados = True
+
+            # Enfileirar a venda; o gravador insere e confirma a cada lote completo
+            self._contadores_ultima_venda = (self._linhas_processadas, self.linhas_rejeitadas)
+            venda = self.gravador.adicionar(row_num, dados, comissao)
+            detalhe.update(cliente=venda['nome_cliente'], valor=venda['valor_venda'], comissao=venda['valor_comissao'])
+
+        # Gravar o último lote incompleto
+        self.gravador.confirmar()
+
+    def _registrar_erro(self, row_num, erro):
+        self.linhas_rejeitadas += 1
+        if self.relatorio:
+            self.relatorio.registrar(row_num, erro)
+        self._guardar_erro(erro)
+
+    def _guardar_erro(self, erro):
+        if len(self.erros) < MAX_DETALHES_RESPOSTA:
+            self.erros.append(erro)
+        else:
+            self.detalhes_truncados = True
+
+    def resumo(self):
+        """Resumo da importação no formato retornado pela API"""
+        resumo = {
+            'mensagem': 'Validação concluída, nenhuma venda foi gravada' if self.simular else 'Importação concluída',
+            'simulacao': self.simular,
+            'linhas_lidas': self.linhas_lidas,
+            'linhas_validas': self.linhas_validas,
+            'erros_encontrados': self.linhas_rejeitadas,
+            'pares_nao_encontrados': self.resolvedor.relatorio_pares_desconhecidos()[:MAX_DETALHES_RESPOSTA] if self.resolvedor else [],
+            'pares_ambiguos': self.resolvedor.relatorio_pares_ambiguos()[:MAX_DETALHES_RESPOSTA] if self.resolvedor else [],
+            'relatorio_erros': self.relatorio.to_dict() if self.relatorio and self.relatorio.total else None
+        }
+
+        # A simulação devolve apenas contagens; os erros linha a linha ficam no relatório
+        if not self.simular:
+            resumo.update({
+                'vendas_criadas': self.vendas_inseridas,
+                'vendas_duplicadas': self.vendas_duplicadas,
+                'politica_duplicadas': self.gravador.politica_duplicadas,
+                'ultima_linha_confirmada': self.ultima_linha_confirmada,
+                'detalhes': {
+                    'vendas': self.vendas_criadas,
+                    'erros': self.erros,
+                    'truncados': self.detalhes_truncados
+                }
+            })
+
+        return resumo
+
+    def _linhas(self, leitor):
+        for row_num, row_data in leitor:
+            # Linhas já confirmadas numa execução anterior não são reprocessadas
+            if row_num <= self.retomar_apos_linha:
+                continue
+
+            self.linhas_lidas += 1
+            if self.verificar and self.linhas_lidas % self.tamanho_lote == 0 and self.verificar(self):
+                raise ImportacaoCancelada('Importação cancelada')
+
+            yield row_num, row_data
+
+    def _lote_confirmado(self, gravador):
+        # Detalhes das linhas deduplicadas deixam de aparecer como vendas criadas
+        if gravador.linhas_duplicadas_lote:
+            duplicadas = set(gravador.linhas_duplicadas_lote)
+            detalhes_lote = self.vendas_criadas[self.inicio_lote_detalhes:]
+            if gravador.politica_duplicadas == 'update':
+                for detalhe in detalhes_lote:
+                    if detalhe['linha'] in duplicadas:
+                        detalhe['atualizada'] = True
+            else:
+                self.vendas_criadas[self.inicio_lote_detalhes:] = [d for d in detalhes_lote if d['linha'] not in duplicadas]
+        self.inicio_lote_detalhes = len(self.vendas_criadas)
+
+        # O lote termina na última venda enfileirada
+        self.linhas_lidas_confirmadas, self.linhas_rejeitadas_confirmadas = self._contadores_ultima_venda
+
+        if self.ao_progresso:
+            self.ao_progresso(self)
@@ -12,10 +12,21 @@ from src.routes.vendedor_comissao import vendedor_comissao_bp
 from src.routes.venda import venda_bp
 from src.routes.auth import auth_bp
 from src.routes.importacao import importacao_bp
+from src.routes.exportacao import exportacao_bp
+from src.routes.recalculo import recalculo_bp
+from src.routes.pagamento import pagamento_bp
+from src.routes.simulacao import simulacao_bp
 # Importar modelos para criação das tabelas
 from src.models.vendedor import Vendedor
 from src.models.vendedor_comissao import VendedorComissao
 from src.models.venda import Venda
+from src.models.importacao_job import ImportacaoJob
+from src.models.recalculo_job import RecalculoComissaoJob
+from src.models.resumo_venda import ResumoVendas
+from src.services.importacao_jobs import retomar_jobs_pendentes
+from src.services.recalculo_comissoes import retomar_recalculos_pendentes
+from src.services.perfil_sqlite import configurar_engine_sqlite, instalar_perfil_sqlite
+from src.services.banco import configurar_banco, normalizar_url
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -29,13 +40,44 @@ app.register_blueprint(vendedor_comissao_bp, url_prefix='/api')
 app.register_blueprint(venda_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api')
 app.register_blueprint(importacao_bp, url_prefix='/api')
+app.register_blueprint(exportacao_bp, url_prefix='/api')
+app.register_blueprint(recalculo_bp, url_prefix='/api')
+app.register_blueprint(pagamento_bp, url_prefix='/api')
+app.register_blueprint(simulacao_bp, url_prefix='/api')
+
+# Ajustes do banco pelo ambiente (ex.: FLASK_DB_POOL_SIZE=20, FLASK_SQLITE_BUSY_TIMEOUT=30000)
+app.config.from_prefixed_env()
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_URL aponta para o PostgreSQL; sem ela, usa o SQLite local
+app.config['SQLALCHEMY_DATABASE_URI'] = normalizar_url(os.environ.get('DATABASE_URL')) or \
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_REPLICA_URI'] = os.environ.get('DATABASE_REPLICA_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configurar_banco(app)
+configurar_engine_sqlite(app)
 db.init_app(app)
-with app.app_context():
-    db.create_all()
+
+def retomar_jobs(app):
+    """Recoloca na fila importações e recálculos interrompidos por um reinício"""
+    with app.app_context():
+        retomar_jobs_pendentes(app)
+        retomar_recalculos_pendentes(app)
+
+# Os processos da validação paralela da importação reimportam o script principal como
+# __mp_main__; neles só a definição da aplicação é necessária, sem banco nem jobs
+if __name__ != '__mp_main__':
+    with app.app_context():
+        # WAL, pragmas e fila de escrita em todas as conexões do SQLite
+        instalar_perfil_sqlite(app, db.engine)
+        # O servidor.py desliga a criação das tabelas e a retomada dos jobs na importação: migra o banco
+        # uma vez por deploy e retoma os jobs em cada worker, depois do fork (threads não sobrevivem a ele)
+        if app.config.get('PREPARAR_BANCO', True):
+            # Só no primário: a réplica recebe a estrutura pela replicação
+            db.create_all(bind_key=None)
+
+    if app.config.get('RETOMAR_JOBS', True):
+        retomar_jobs(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
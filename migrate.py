@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Migrações versionadas do banco de dados
+
+Substitui os scripts migrate_*.py avulsos. Cada migração tem um número de
+versão; as já aplicadas ficam registradas na tabela `schema_versao` e não
+rodam de novo. Cópias e preenchimentos de dados são feitos por faixas de id
+(`--lote` linhas por transação, com INSERT ... SELECT ou executemany), e o
+checkpoint de cada faixa (`migracao_checkpoint`) é gravado na mesma transação:
+uma migração interrompida continua da última faixa confirmada ao rodar o
+script de novo. O progresso é informado por etapa, com linhas por segundo.
+
+Um banco sem a tabela venda é criado direto na estrutura atual e recebe todas
+as versões como aplicadas. Antes de aplicar migrações num arquivo SQLite, é
+feita uma cópia dele ao lado (app.db.backup_AAAAMMDD_HHMMSS).
+
+Uso: python migrate.py [--status] [--ate=VERSAO] [--lote=N] [--banco=URL] [--sem-backup]
+
+  --status      lista as migrações aplicadas e pendentes, sem aplicar nada
+  --ate=VERSAO  aplica as migrações pendentes somente até essa versão
+  --lote=N      linhas por transação nas cópias de dados (padrão 5000)
+  --banco=URL   URL SQLAlchemy do banco (padrão: DATABASE_URL ou src/database/app.db)
+  --sem-backup  não copia o arquivo SQLite antes de migrar
+
+Num PostgreSQL novo (DATABASE_URL=postgresql://...) a estrutura é criada
+direto na versão atual; as migrações de dados antigas só existem em bancos SQLite.
+"""
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from sqlalchemy import (Column, DateTime, Float, Integer, MetaData, String, Table, create_engine, delete, event,
+                        insert, inspect, select, text, update)
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.venda import Venda
+from src.models.importacao_job import ImportacaoJob
+from src.models.recalculo_job import RecalculoComissaoJob
+from src.models.resumo_venda import ResumoVendas
+from src.services.resumo_vendas import DeltasResumo
+from src.services.banco import normalizar_url
+
+TAMANHO_LOTE_PADRAO = 5000
+
+# Ids por consulta IN (limite de parâmetros por comando do SQLite antigo)
+TAMANHO_BLOCO_IDS = 900
+
+# Intervalo mínimo, em segundos, entre duas linhas de progresso da mesma etapa
+INTERVALO_PROGRESSO = 2.0
+
+metadata_migracoes = MetaData()
+
+schema_versao = Table(
+    'schema_versao', metadata_migracoes,
+    Column('versao', Integer, primary_key=True),
+    Column('nome', String(100), nullable=False),
+    Column('data_aplicacao', DateTime, nullable=False),
+    Column('duracao_segundos', Float, nullable=False)
+)
+
+migracao_checkpoint = Table(
+    'migracao_checkpoint', metadata_migracoes,
+    Column('versao', Integer, primary_key=True),
+    Column('etapa', String(100), primary_key=True),
+    Column('ultimo_id', Integer, nullable=False),  # Fim da última faixa confirmada
+    Column('linhas', Integer, nullable=False),
+    Column('data_atualizacao', DateTime, nullable=False)
+)
+
+MIGRACOES = []
+
+def migracao(versao, nome):
+    """Registra a função como a migração `versao`"""
+    def registrar(funcao):
+        MIGRACOES.append((versao, nome, funcao))
+        return funcao
+    return registrar
+
+class Progresso:
+    """Linhas de progresso de uma etapa: quantidade, percentual e linhas por segundo"""
+
+    def __init__(self, etapa, total, linhas=0):
+        self.etapa = etapa
+        self.total = total
+        self.linhas_iniciais = linhas
+        self.inicio = self.ultimo_aviso = time.monotonic()
+
+    def _velocidade(self, linhas):
+        decorrido = time.monotonic() - self.inicio
+        return (linhas - self.linhas_iniciais) / decorrido if decorrido > 0 else 0.0
+
+    def avancar(self, linhas):
+        agora = time.monotonic()
+        if agora - self.ultimo_aviso < INTERVALO_PROGRESSO:
+            return
+        self.ultimo_aviso = agora
+        percentual = f' ({100.0 * linhas / self.total:.1f}%)' if self.total else ''
+        print(f"  {self.etapa}: {linhas}/{self.total}{percentual} - {self._velocidade(linhas):.0f} linhas/s")
+
+    def concluir(self, linhas):
+        decorrido = time.monotonic() - self.inicio
+        print(f"  {self.etapa}: {linhas} linhas em {decorrido:.1f}s - {self._velocidade(linhas):.0f} linhas/s")
+
+class Migrador:
+    """Aplica as migrações pendentes e guarda versão e checkpoints no próprio banco"""
+
+    def __init__(self, url, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        self.engine = create_engine(url)
+        self.tamanho_lote = tamanho_lote
+        self.versao_atual = None
+        self.arquivo_backup = None
+
+        if self.engine.dialect.name == 'sqlite':
+            # O pysqlite não abre transação antes de DDL; com BEGIN explícito cada etapa
+            # (inclusive CREATE/ALTER/DROP) é atômica, e IMMEDIATE já reserva a escrita
+            @event.listens_for(self.engine, 'connect')
+            def _desativar_transacao_implicita(conexao_dbapi, registro):
+                conexao_dbapi.isolation_level = None
+
+            @event.listens_for(self.engine, 'begin')
+            def _iniciar_transacao(conexao):
+                conexao.exec_driver_sql('BEGIN IMMEDIATE')
+
+    @contextmanager
+    def transacao(self):
+        with self.engine.begin() as conexao:
+            yield conexao
+
+    def tabelas(self):
+        return set(inspect(self.engine).get_table_names())
+
+    def colunas(self, tabela):
+        if tabela not in self.tabelas():
+            return set()
+        return {coluna['name'] for coluna in inspect(self.engine).get_columns(tabela)}
+
+    def aplicadas(self):
+        if 'schema_versao' not in self.tabelas():
+            return {}
+        with self.engine.connect() as conexao:
+            return {versao: (nome, data) for versao, nome, data in conexao.execute(
+                select(schema_versao.c.versao, schema_versao.c.nome, schema_versao.c.data_aplicacao)
+            )}
+
+    def pendentes(self, ate=None):
+        aplicadas = self.aplicadas()
+        return [
+            (versao, nome, funcao) for versao, nome, funcao in sorted(MIGRACOES, key=lambda m: m[0])
+            if versao not in aplicadas and (ate is None or versao <= ate)
+        ]
+
+    def preparar(self):
+        """Cria as tabelas de controle; num banco vazio, cria a estrutura atual e marca tudo como aplicado"""
+        banco_novo = 'venda' not in self.tabelas()
+        metadata_migracoes.create_all(self.engine)
+
+        if banco_novo and not self.aplicadas():
+            print("Banco sem a tabela venda: criando a estrutura atual...")
+            db.metadata.create_all(self.engine)
+            with self.transacao() as conexao:
+                for versao, nome, _ in MIGRACOES:
+                    self._registrar_versao(conexao, versao, nome, 0.0)
+
+    def _registrar_versao(self, conexao, versao, nome, duracao):
+        conexao.execute(insert(schema_versao).values(
+            versao=versao, nome=nome, data_aplicacao=datetime.utcnow(), duracao_segundos=duracao
+        ))
+        conexao.execute(delete(migracao_checkpoint).where(migracao_checkpoint.c.versao == versao))
+
+    def fazer_backup(self):
+        """Copia o arquivo SQLite para <arquivo>.backup_AAAAMMDD_HHMMSS; None se o banco não for um arquivo SQLite"""
+        arquivo = self.engine.url.database
+        if self.engine.dialect.name != 'sqlite' or arquivo in (None, '', ':memory:') or not os.path.exists(arquivo):
+            return None
+
+        destino = arquivo + '.backup_' + datetime.now().strftime('%Y%m%d_%H%M%S')
+        # API de backup do SQLite, e não shutil.copy: inclui o que ainda está só no WAL
+        copia = sqlite3.connect(destino)
+        try:
+            with self.engine.connect() as conexao:
+                conexao.connection.dbapi_connection.backup(copia)
+        finally:
+            copia.close()
+        print(f"Backup criado: {destino}")
+        return destino
+
+    def migrar(self, ate=None, backup=True):
+        self.preparar()
+        pendentes = self.pendentes(ate)
+        if not pendentes:
+            print("Banco de dados já está na versão mais recente.")
+            return
+
+        if backup:
+            self.arquivo_backup = self.fazer_backup()
+
+        for versao, nome, funcao in pendentes:
+            print(f"Aplicando migração {versao}: {nome}...")
+            inicio = time.monotonic()
+            self.versao_atual = versao
+            funcao(self)
+
+            duracao = time.monotonic() - inicio
+            with self.transacao() as conexao:
+                self._registrar_versao(conexao, versao, nome, duracao)
+            print(f"Migração {versao} aplicada em {duracao:.1f}s")
+
+        print("Migrações concluídas com sucesso!")
+
+    def status(self):
+        aplicadas = self.aplicadas()
+        for versao, nome, _ in sorted(MIGRACOES, key=lambda m: m[0]):
+            if versao in aplicadas:
+                print(f"  [x] {versao}: {nome} (aplicada em {aplicadas[versao][1]:%Y-%m-%d %H:%M})")
+            else:
+                print(f"  [ ] {versao}: {nome}")
+
+    def checkpoint(self, etapa):
+        """(ultimo_id, linhas) da última faixa confirmada da etapa; (0, 0) se ela não começou"""
+        with self.engine.connect() as conexao:
+            linha = conexao.execute(
+                select(migracao_checkpoint.c.ultimo_id, migracao_checkpoint.c.linhas)
+                .where(migracao_checkpoint.c.versao == self.versao_atual, migracao_checkpoint.c.etapa == etapa)
+            ).first()
+        return tuple(linha) if linha else (0, 0)
+
+    def _gravar_checkpoint(self, conexao, etapa, ultimo_id, linhas):
+        valores = {'ultimo_id': ultimo_id, 'linhas': linhas, 'data_atualizacao': datetime.utcnow()}
+        atualizados = conexao.execute(
+            update(migracao_checkpoint)
+            .where(migracao_checkpoint.c.versao == self.versao_atual, migracao_checkpoint.c.etapa == etapa)
+            .values(**valores)
+        ).rowcount
+        if not atualizados:
+            conexao.execute(insert(migracao_checkpoint).values(versao=self.versao_atual, etapa=etapa, **valores))
+
+    def em_lotes(self, etapa, tabela, processar_faixa, filtro=''):
+        """
+        Percorre `tabela` em faixas de id de até tamanho_lote linhas (que atendem a `filtro`).
+
+        `processar_faixa(conexao, ultimo_id, limite)` trata as linhas com
+        ultimo_id < id <= limite e devolve quantas processou; a faixa e o
+        checkpoint são confirmados na mesma transação.
+        """
+        condicao = f' AND {filtro}' if filtro else ''
+        ultimo_id, linhas = self.checkpoint(etapa)
+
+        with self.engine.connect() as conexao:
+            total = linhas + conexao.execute(
+                text(f'SELECT COUNT(*) FROM {tabela} WHERE id > :ultimo_id{condicao}'), {'ultimo_id': ultimo_id}
+            ).scalar()
+
+        proxima_faixa = text(
+            f'SELECT MAX(id) FROM (SELECT id FROM {tabela} WHERE id > :ultimo_id{condicao} ORDER BY id LIMIT :lote) faixa'
+        )
+        progresso = Progresso(etapa, total, linhas)
+        while True:
+            with self.transacao() as conexao:
+                limite = conexao.execute(proxima_faixa, {'ultimo_id': ultimo_id, 'lote': self.tamanho_lote}).scalar()
+                if limite is None:
+                    break
+                linhas += processar_faixa(conexao, ultimo_id, limite)
+                self._gravar_checkpoint(conexao, etapa, limite, linhas)
+
+            ultimo_id = limite
+            progresso.avancar(linhas)
+
+        progresso.concluir(linhas)
+        return linhas
+
+def adicionar_coluna(conexao, tabela, coluna, definicao):
+    """ALTER TABLE ADD COLUMN se a coluna ainda não existir"""
+    if coluna in {c['name'] for c in inspect(conexao).get_columns(tabela)}:
+        return False
+    conexao.exec_driver_sql(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}')
+    print(f"  Coluna '{tabela}.{coluna}' adicionada")
+    return True
+
+def criar_indice(conexao, nome, tabela, colunas, unico=False):
+    conexao.exec_driver_sql(f"CREATE {'UNIQUE ' if unico else ''}INDEX IF NOT EXISTS {nome} ON {tabela} ({', '.join(colunas)})")
+    print(f"  Índice '{nome}' criado")
+
+@migracao(1, 'Configurações de comissão por vendedor (vendedor_comissao)')
+def migrar_comissoes_por_vendedor(migrador):
+    """
+    Estrutura antiga: porcentagem_comissao/nome_tabela no vendedor e id_vendedor na venda.
+
+    Cada vendedor ganha uma configuração em vendedor_comissao e a tabela venda
+    é recriada com id_vendedor_comissao, copiada por faixas de id (os ids das
+    vendas são mantidos). A tabela antiga só é descartada depois da cópia, e a
+    migração para antes de copiar se alguma venda não tiver vendedor com
+    configuração de comissão (ex.: vendedor excluído), para nenhuma ser perdida.
+    """
+    colunas_vendedor = migrador.colunas('vendedor')
+    colunas_venda = migrador.colunas('venda')
+    if 'porcentagem_comissao' not in colunas_vendedor and 'id_vendedor' not in colunas_venda:
+        print("  Estrutura de comissões já atualizada")
+        return
+
+    if 'porcentagem_comissao' in colunas_vendedor:
+        with migrador.transacao() as conexao:
+            conexao.exec_driver_sql('''
+                CREATE TABLE IF NOT EXISTS vendedor_comissao (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id_vendedor INTEGER NOT NULL,
+                    nome_tabela VARCHAR(100) NOT NULL,
+                    porcentagem_comissao FLOAT NOT NULL,
+                    FOREIGN KEY (id_vendedor) REFERENCES vendedor (id)
+                )
+            ''')
+            criadas = conexao.exec_driver_sql('''
+                INSERT INTO vendedor_comissao (id_vendedor, nome_tabela, porcentagem_comissao)
+                SELECT id, COALESCE(NULLIF(nome_tabela, ''), 'Padrão'), porcentagem_comissao
+                FROM vendedor
+                WHERE id NOT IN (SELECT id_vendedor FROM vendedor_comissao)
+                ORDER BY id
+            ''').rowcount
+            print(f"  {criadas} configurações de comissão criadas a partir dos vendedores")
+
+            conexao.exec_driver_sql('ALTER TABLE vendedor DROP COLUMN porcentagem_comissao')
+            conexao.exec_driver_sql('ALTER TABLE vendedor DROP COLUMN nome_tabela')
+
+    if 'id_vendedor' not in colunas_venda:
+        return
+
+    with migrador.transacao() as conexao:
+        conexao.exec_driver_sql('''
+            CREATE TABLE IF NOT EXISTS venda_nova (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cpf_cliente VARCHAR(14) NOT NULL,
+                nome_cliente VARCHAR(100) NOT NULL,
+                data_venda DATE NOT NULL,
+                valor_venda FLOAT NOT NULL,
+                valor_comissao FLOAT NOT NULL DEFAULT 0.0,
+                comissao_paga BOOLEAN NOT NULL DEFAULT 0,
+                id_vendedor_comissao INTEGER NOT NULL,
+                usuario_cadastro VARCHAR(100),
+                FOREIGN KEY (id_vendedor_comissao) REFERENCES vendedor_comissao (id)
+            )
+        ''')
+
+    # Vendas já ligadas a uma configuração (migrate_data.py antigo) mantêm a sua;
+    # as demais vão para a primeira configuração do vendedor
+    id_vendedor_comissao = 'COALESCE(v.id_vendedor_comissao, c.id_vendedor_comissao)' \
+        if 'id_vendedor_comissao' in colunas_venda else 'c.id_vendedor_comissao'
+    copiar = text(f'''
+        INSERT INTO venda_nova (id, cpf_cliente, nome_cliente, data_venda, valor_venda, valor_comissao,
+                                comissao_paga, id_vendedor_comissao, usuario_cadastro)
+        SELECT v.id, v.cpf_cliente, v.nome_cliente, v.data_venda, v.valor_venda, COALESCE(v.valor_comissao, 0.0),
+               COALESCE(v.comissao_paga, 0), {id_vendedor_comissao}, v.usuario_cadastro
+        FROM venda v
+        LEFT JOIN (SELECT id_vendedor, MIN(id) AS id_vendedor_comissao FROM vendedor_comissao GROUP BY id_vendedor) c
+            ON c.id_vendedor = v.id_vendedor
+        WHERE v.id > :ultimo_id AND v.id <= :limite
+    ''')
+
+    # A tabela antiga é descartada no fim: uma venda sem configuração de comissão seria perdida
+    with migrador.engine.connect() as conexao:
+        orfas = [linha[0] for linha in conexao.execute(text(f'''
+            SELECT v.id
+            FROM venda v
+            LEFT JOIN (SELECT id_vendedor, MIN(id) AS id_vendedor_comissao FROM vendedor_comissao GROUP BY id_vendedor) c
+                ON c.id_vendedor = v.id_vendedor
+            WHERE {id_vendedor_comissao} IS NULL
+            ORDER BY v.id
+        '''))]
+    if orfas:
+        exemplos = ', '.join(str(id_venda) for id_venda in orfas[:20])
+        raise RuntimeError(
+            f"{len(orfas)} vendas sem vendedor com configuração de comissão (ids {exemplos}"
+            f"{', ...' if len(orfas) > 20 else ''}). Ligue-as a um vendedor existente ou remova-as antes de migrar."
+        )
+
+    def copiar_faixa(conexao, ultimo_id, limite):
+        return conexao.execute(copiar, {'ultimo_id': ultimo_id, 'limite': limite}).rowcount
+
+    migrador.em_lotes('cópia das vendas', 'venda', copiar_faixa)
+
+    with migrador.transacao() as conexao:
+        conexao.exec_driver_sql('DROP TABLE venda')
+        conexao.exec_driver_sql('ALTER TABLE venda_nova RENAME TO venda')
+    print("  Tabela venda substituída pela nova estrutura")
+
+@migracao(2, 'Autenticação dos vendedores')
+def migrar_autenticacao(migrador):
+    with migrador.transacao() as conexao:
+        adicionar_coluna(conexao, 'vendedor', 'email', 'VARCHAR(120)')
+        adicionar_coluna(conexao, 'vendedor', 'senha_hash', 'VARCHAR(128)')
+        adicionar_coluna(conexao, 'vendedor', 'ativo', 'BOOLEAN DEFAULT true')
+        if adicionar_coluna(conexao, 'vendedor', 'data_criacao', 'TIMESTAMP'):
+            conexao.execute(text('UPDATE vendedor SET data_criacao = :agora WHERE data_criacao IS NULL'), {'agora': datetime.utcnow()})
+
+@migracao(3, 'Jobs de importação em segundo plano')
+def migrar_jobs_importacao(migrador):
+    with migrador.transacao() as conexao:
+        if 'importacao_job' not in inspect(conexao).get_table_names():
+            ImportacaoJob.__table__.create(conexao)
+            print("  Tabela 'importacao_job' criada")
+            return
+
+        # Colunas acrescentadas depois da criação da tabela
+        adicionar_coluna(conexao, 'importacao_job', 'processos', 'INTEGER NOT NULL DEFAULT 1')
+        adicionar_coluna(conexao, 'importacao_job', 'politica_duplicadas', "VARCHAR(10) NOT NULL DEFAULT 'skip'")
+        adicionar_coluna(conexao, 'importacao_job', 'simular', 'BOOLEAN NOT NULL DEFAULT false')
+        adicionar_coluna(conexao, 'importacao_job', 'formato_relatorio', "VARCHAR(10) NOT NULL DEFAULT 'csv'")
+
+@migracao(4, 'Índice da paginação das vendas')
+def migrar_indice_paginacao(migrador):
+    with migrador.transacao() as conexao:
+        criar_indice(conexao, 'ix_venda_data_venda_id', 'venda', ['data_venda', 'id'])
+
+@migracao(5, 'Fingerprint das vendas (deduplicação de reimportações)')
+def migrar_fingerprint(migrador):
+    """
+    Preenche o fingerprint das vendas existentes por faixas de id.
+
+    O índice único é criado antes do preenchimento e serve para achar
+    fingerprints já gravados; entre vendas duplicadas, a de menor id fica
+    com o fingerprint e as outras continuam sem (nulos não conflitam).
+    """
+    with migrador.transacao() as conexao:
+        adicionar_coluna(conexao, 'venda', 'fingerprint', 'VARCHAR(64)')
+        criar_indice(conexao, 'ix_venda_fingerprint', 'venda', ['fingerprint'], unico=True)
+
+    duplicadas = []
+
+    def preencher_faixa(conexao, ultimo_id, limite):
+        vendas = conexao.execute(text('''
+            SELECT id, cpf_cliente, data_venda, valor_venda, id_vendedor_comissao
+            FROM venda WHERE id > :ultimo_id AND id <= :limite AND fingerprint IS NULL
+        '''), {'ultimo_id': ultimo_id, 'limite': limite}).all()
+
+        por_fingerprint = {}
+        for id_venda, cpf_cliente, data_venda, valor_venda, id_vendedor_comissao in vendas:
+            data = date.fromisoformat(str(data_venda)[:10]) if data_venda else None
+            fingerprint = Venda.gerar_fingerprint(cpf_cliente, data, valor_venda, id_vendedor_comissao)
+            if fingerprint in por_fingerprint:
+                duplicadas.append(id_venda)
+            else:
+                por_fingerprint[fingerprint] = id_venda
+
+        fingerprints = list(por_fingerprint)
+        for inicio in range(0, len(fingerprints), TAMANHO_BLOCO_IDS):
+            existentes = conexao.execute(
+                select(Venda.fingerprint).where(Venda.fingerprint.in_(fingerprints[inicio:inicio + TAMANHO_BLOCO_IDS]))
+            ).scalars()
+            for fingerprint in existentes:
+                duplicadas.append(por_fingerprint.pop(fingerprint))
+
+        if por_fingerprint:
+            conexao.execute(
+                text('UPDATE venda SET fingerprint = :fingerprint WHERE id = :id'),
+                [{'fingerprint': fingerprint, 'id': id_venda} for fingerprint, id_venda in por_fingerprint.items()]
+            )
+        return len(vendas)
+
+    migrador.em_lotes('fingerprint das vendas', 'venda', preencher_faixa, filtro='fingerprint IS NULL')
+    if duplicadas:
+        print(f"  {len(duplicadas)} vendas duplicadas ficaram sem fingerprint (ids: {', '.join(str(i) for i in sorted(duplicadas)[:50])}"
+              + ('...' if len(duplicadas) > 50 else '') + ")")
+
+@migracao(6, 'Recálculo de comissões em lote')
+def migrar_recalculo(migrador):
+    with migrador.transacao() as conexao:
+        criar_indice(conexao, 'ix_venda_comissao_id', 'venda', ['id_vendedor_comissao', 'id'])
+        if 'recalculo_comissao_job' not in inspect(conexao).get_table_names():
+            RecalculoComissaoJob.__table__.create(conexao)
+            print("  Tabela 'recalculo_comissao_job' criada")
+
+@migracao(7, 'Resumo diário das vendas (resumo_vendas)')
+def migrar_resumo(migrador):
+    """Preenche o resumo somando as vendas por faixas de id, com o mesmo upsert da manutenção incremental"""
+    inicio = migrador.checkpoint('resumo das vendas') == (0, 0)
+    with migrador.transacao() as conexao:
+        ResumoVendas.__table__.create(conexao, checkfirst=True)
+        if inicio:
+            # Início do preenchimento: descarta o que a aplicação já tenha gravado
+            conexao.execute(delete(ResumoVendas.__table__))
+
+    def somar_faixa(conexao, ultimo_id, limite):
+        condicoes = [Venda.id > ultimo_id, Venda.id <= limite]
+        deltas = DeltasResumo()
+        deltas.somar(conexao, condicoes)
+        deltas.aplicar(conexao)
+        return conexao.execute(text('SELECT COUNT(*) FROM venda WHERE id > :ultimo_id AND id <= :limite'),
+                               {'ultimo_id': ultimo_id, 'limite': limite}).scalar()
+
+    migrador.em_lotes('resumo das vendas', 'venda', somar_faixa)
+
+@migracao(8, 'Índices das consultas de vendas e comissões')
+def migrar_indices_consultas(migrador):
+    """Índices dos filtros de listagens, relatórios, exportação e dashboard (verificados por tests/test_planos.py)"""
+    with migrador.transacao() as conexao:
+        criar_indice(conexao, 'ix_venda_comissao_data', 'venda', ['id_vendedor_comissao', 'data_venda', 'id'])
+        criar_indice(conexao, 'ix_venda_paga_data', 'venda', ['comissao_paga', 'data_venda', 'id'])
+        criar_indice(conexao, 'ix_vendedor_comissao_vendedor_tabela', 'vendedor_comissao', ['id_vendedor', 'nome_tabela'])
+
+        # Estatísticas para o planejador escolher entre os índices de venda
+        conexao.exec_driver_sql('ANALYZE')
+
+def url_banco(banco=None):
+    """URL informada, DATABASE_URL ou o SQLite padrão da aplicação"""
+    return normalizar_url(banco or os.environ.get('DATABASE_URL')) or \
+        f"sqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'database', 'app.db')}"
+
+def migrate(argumentos):
+    opcoes = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], True) for arg in argumentos if arg.startswith('--'))
+    migrador = Migrador(url_banco(opcoes.get('banco')), tamanho_lote=int(opcoes.get('lote', TAMANHO_LOTE_PADRAO)))
+
+    if opcoes.get('status'):
+        migrador.status()
+        return
+
+    try:
+        migrador.migrar(ate=int(opcoes['ate']) if 'ate' in opcoes else None, backup=not opcoes.get('sem-backup'))
+    except Exception as e:
+        print(f"Erro durante a migração: {e}")
+        print("As faixas já confirmadas foram mantidas; execute o script de novo para continuar do checkpoint.")
+        if migrador.arquivo_backup:
+            print(f"O banco anterior à migração está em {migrador.arquivo_backup}.")
+        raise
+
+if __name__ == '__main__':
+    migrate(sys.argv[1:])
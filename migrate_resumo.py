@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script para criar e reconstruir a tabela de resumo das vendas (resumo_vendas)
+
+Uso: python migrate_resumo.py [--verificar]
+
+Sem opções, recalcula o resumo inteiro a partir das vendas. Com --verificar,
+apenas compara o resumo com as vendas e lista as divergências (código de
+saída 1 se houver alguma).
+"""
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import app
+from src.services.resumo_vendas import reconstruir_resumo, verificar_resumo
+
+def migrate_resumo(apenas_verificar=False):
+    """Reconstrói ou verifica a tabela resumo_vendas"""
+    with app.app_context():
+        if apenas_verificar:
+            print("Verificando o resumo das vendas...")
+            divergencias = verificar_resumo()
+            for divergencia in divergencias:
+                print(f"  Divergência em {divergencia['data_venda']} / configuração {divergencia['id_vendedor_comissao']}: "
+                      f"esperado {divergencia['esperado']}, gravado {divergencia['gravado']}")
+
+            if divergencias:
+                print(f"{len(divergencias)} divergência(s) encontrada(s). Execute sem --verificar para reconstruir o resumo.")
+                return False
+
+            print("Resumo consistente com as vendas.")
+            return True
+
+        print("Reconstruindo o resumo das vendas...")
+        linhas = reconstruir_resumo()
+        print(f"Resumo reconstruído com {linhas} linha(s)!")
+        return True
+
+if __name__ == '__main__':
+    sucesso = migrate_resumo(apenas_verificar='--verificar' in sys.argv[1:])
+    sys.exit(0 if sucesso else 1)
@@ -0,0 +1,94 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+from src.routes.auth import token_required
+from src.services.pagamento_comissoes import LiquidacaoComissoes, ErroPagamentoLote, TAMANHO_LOTE_PADRAO, TAMANHO_LOTE_MAXIMO, MAX_IDS
+
+pagamento_bp = Blueprint('pagamento', __name__)
+
+FILTROS_IDS = ('id_vendedor', 'id_vendedor_comissao')
+FILTROS_DATAS = ('data_inicio', 'data_fim')
+
+def _inteiro_positivo(valor):
+    # bool é subclasse de int: true/false no JSON não são ids
+    return isinstance(valor, int) and not isinstance(valor, bool) and valor > 0
+
+def normalizar_filtros(dados):
+    """
+    Filtros informados (os ausentes ou null ficam de fora), já convertidos.
+
+    Levanta ValueError quando um id não é inteiro positivo ou uma data não é
+    uma string AAAA-MM-DD; um filtro vazio nunca vira "sem filtro".
+    """
+    filtros = {}
+    for campo in FILTROS_IDS:
+        valor = dados.get(campo)
+        if valor is not None:
+            if not _inteiro_positivo(valor):
+                raise ValueError(f'{campo} deve ser um inteiro positivo')
+            filtros[campo] = valor
+
+    for campo in FILTROS_DATAS:
+        valor = dados.get(campo)
+        if valor is not None:
+            try:
+                filtros[campo] = datetime.strptime(valor, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                raise ValueError(f'{campo} deve ser uma data no formato AAAA-MM-DD')
+
+    return filtros
+
+@pagamento_bp.route('/vendas/comissoes/pagar', methods=['POST'])
+@token_required
+def pagar_comissoes(vendedor_atual):
+    """
+    Marca como pagas as comissões pendentes de várias vendas de uma vez.
+
+    Recebe `ids` (lista de vendas) ou filtros (`id_vendedor`, `id_vendedor_comissao`,
+    `data_inicio`, `data_fim`) e `tamanho_lote` opcional. Apenas admin.
+    """
+    if vendedor_atual.email != 'admin@admin.com':
+        return jsonify({'erro': 'Apenas administradores podem pagar comissões'}), 403
+
+    try:
+        dados = request.get_json(silent=True) or {}
+        if not isinstance(dados, dict):
+            return jsonify({'erro': 'O corpo deve ser um objeto JSON'}), 400
+
+        ids = dados.get('ids')
+        filtros = normalizar_filtros(dados)
+
+        if ids is not None and filtros:
+            return jsonify({'erro': 'Informe ids ou filtros, não ambos'}), 400
+        if ids is None and not filtros:
+            # Sem filtro nenhum o pagamento alcançaria todas as vendas pendentes
+            return jsonify({'erro': 'Informe ids ou ao menos um filtro (id_vendedor, id_vendedor_comissao, data_inicio, data_fim)'}), 400
+
+        tamanho_lote = dados.get('tamanho_lote', TAMANHO_LOTE_PADRAO)
+        if not isinstance(tamanho_lote, int) or isinstance(tamanho_lote, bool) or tamanho_lote < 1 or tamanho_lote > TAMANHO_LOTE_MAXIMO:
+            return jsonify({'erro': f'tamanho_lote deve ser um inteiro entre 1 e {TAMANHO_LOTE_MAXIMO}'}), 400
+
+        liquidacao = LiquidacaoComissoes(tamanho_lote)
+
+        if ids is not None:
+            if not isinstance(ids, list) or not all(_inteiro_positivo(id_venda) for id_venda in ids):
+                return jsonify({'erro': 'ids deve ser uma lista de inteiros positivos'}), 400
+            if len(ids) > MAX_IDS:
+                return jsonify({'erro': f'Máximo de {MAX_IDS} ids por requisição; use filtros para volumes maiores'}), 400
+
+            liquidacao.por_ids(ids)
+        else:
+            liquidacao.por_filtro(**filtros)
+
+        return jsonify({
+            'mensagem': 'Comissões pagas com sucesso',
+            **liquidacao.to_dict()
+        }), 200
+
+    except ErroPagamentoLote as e:
+        # Os lotes anteriores ao que falhou já estão confirmados
+        return jsonify({'erro': str(e), 'liquidado': e.liquidacao}), 500
+    except ValueError as e:
+        # Filtros com tipo ou formato inválido
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
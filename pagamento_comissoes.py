@@ -0,0 +1,109 @@
+"""
+Pagamento em lote de comissões (fechamento da folha).
+
+Marca como pagas as comissões pendentes das vendas escolhidas por filtro
+(vendedor, tabela de comissão, período) ou por lista de ids, com um UPDATE
+por lote de vendas em vez de um PUT por venda. Cada lote é uma transação:
+se um lote falhar, os anteriores continuam pagos e o erro informa quanto já
+foi liquidado.
+
+O UPDATE usa RETURNING para somar exatamente as vendas que ele alterou
+(SQLite 3.35+ ou PostgreSQL); vendas já pagas não entram nos totais. As
+mesmas linhas atualizam a tabela de resumo no commit do lote.
+"""
+from sqlalchemy import select, update, func
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.services.resumo_vendas import DeltasResumo
+
+TAMANHO_LOTE_PADRAO = 5000
+TAMANHO_LOTE_MAXIMO = 50000
+
+# Ids por lote quando a seleção é uma lista de ids (limite de parâmetros por comando do SQLite antigo)
+TAMANHO_LOTE_IDS = 900
+MAX_IDS = 100000
+
+class ErroPagamentoLote(Exception):
+    """Falha num lote; `liquidacao` tem os totais dos lotes já confirmados"""
+
+    def __init__(self, mensagem, liquidacao):
+        super().__init__(mensagem)
+        self.liquidacao = liquidacao
+
+class LiquidacaoComissoes:
+    """Aplica o pagamento lote a lote e acumula os totais"""
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        self.tamanho_lote = tamanho_lote
+        self.vendas_pagas = 0
+        self.valor_pago = 0.0
+        self.lotes = 0
+
+    def to_dict(self):
+        return {
+            'vendas_pagas': self.vendas_pagas,
+            'valor_total_pago': round(self.valor_pago, 2),
+            'lotes': self.lotes
+        }
+
+    def por_filtro(self, id_vendedor=None, id_vendedor_comissao=None, data_inicio=None, data_fim=None):
+        """Paga as comissões pendentes que atendem aos filtros, em faixas de id de até tamanho_lote vendas"""
+        condicoes = [Venda.comissao_paga.is_(False)]
+        if id_vendedor_comissao is not None:
+            condicoes.append(Venda.id_vendedor_comissao == id_vendedor_comissao)
+        if id_vendedor is not None:
+            condicoes.append(Venda.id_vendedor_comissao.in_(
+                select(VendedorComissao.id).where(VendedorComissao.id_vendedor == id_vendedor)
+            ))
+        if data_inicio is not None:
+            condicoes.append(Venda.data_venda >= data_inicio)
+        if data_fim is not None:
+            condicoes.append(Venda.data_venda <= data_fim)
+
+        ultimo_id = 0
+        while True:
+            # Fim da próxima faixa: o id da venda de número tamanho_lote depois da faixa anterior
+            faixa = select(Venda.id).where(*condicoes, Venda.id > ultimo_id) \
+                .order_by(Venda.id).limit(self.tamanho_lote).subquery()
+            limite = db.session.execute(select(func.max(faixa.c.id))).scalar()
+            if limite is None:
+                break
+
+            self._pagar_lote(condicoes + [Venda.id > ultimo_id, Venda.id <= limite])
+            ultimo_id = limite
+
+        return self
+
+    def por_ids(self, ids):
+        """Paga as comissões pendentes das vendas informadas; ids inexistentes ou já pagos são ignorados"""
+        ids = sorted(set(ids))
+        for inicio in range(0, len(ids), TAMANHO_LOTE_IDS):
+            self._pagar_lote([Venda.comissao_paga.is_(False), Venda.id.in_(ids[inicio:inicio + TAMANHO_LOTE_IDS])])
+        return self
+
+    def _pagar_lote(self, condicoes):
+        try:
+            vendas = db.session.execute(
+                update(Venda)
+                .where(*condicoes)
+                .values(comissao_paga=True)
+                .returning(Venda.id_vendedor_comissao, Venda.data_venda, Venda.valor_venda, Venda.valor_comissao)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            # As vendas pagas passam de pendentes para pagas no resumo, na mesma transação
+            deltas = DeltasResumo()
+            for id_vendedor_comissao, data_venda, valor_venda, valor_comissao in vendas:
+                deltas.venda(id_vendedor_comissao, data_venda, valor_venda, valor_comissao, False, sinal=-1)
+                deltas.venda(id_vendedor_comissao, data_venda, valor_venda, valor_comissao, True)
+            deltas.aplicar(db.session.connection())
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise ErroPagamentoLote(f'Erro no lote {self.lotes + 1}: {str(e)}', self.to_dict())
+
+        self.vendas_pagas += len(vendas)
+        self.valor_pago += sum(valor_comissao for _, _, _, valor_comissao in vendas)
+        self.lotes += 1
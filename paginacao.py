@@ -0,0 +1,56 @@
+"""
+Paginação por cursor (keyset) das listagens de vendas.
+
+As vendas são ordenadas por (data_venda, id) decrescentes e cada página
+começa logo após a última venda da página anterior, identificada pelo
+cursor. Ao contrário de OFFSET, o banco não precisa percorrer as páginas
+anteriores, então a última página custa o mesmo que a primeira.
+"""
+import base64
+import json
+from datetime import date
+from sqlalchemy import tuple_
+from src.models.venda import Venda
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+class CursorInvalido(ValueError):
+    """O cursor enviado não foi gerado por esta API ou está corrompido"""
+
+def codificar_cursor(venda):
+    """Token opaco com a posição da venda na ordenação"""
+    posicao = [venda.data_venda.isoformat(), venda.id]
+    return base64.urlsafe_b64encode(json.dumps(posicao).encode('utf-8')).decode('ascii')
+
+def decodificar_cursor(cursor):
+    """Retorna (data_venda, id) do cursor ou levanta CursorInvalido"""
+    try:
+        data_venda, id_venda = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return date.fromisoformat(data_venda), int(id_venda)
+    except (ValueError, TypeError, UnicodeError):
+        raise CursorInvalido('Cursor inválido')
+
+def parametros_paginacao(args):
+    """Lê `cursor` e `limite` da query string; o limite fica entre 1 e LIMITE_MAXIMO"""
+    limite = args.get('limite', LIMITE_PADRAO, type=int)
+    return args.get('cursor') or None, max(1, min(limite, LIMITE_MAXIMO))
+
+def paginar_vendas(query, cursor=None, limite=LIMITE_PADRAO):
+    """
+    Aplica a ordenação estável e o cursor a uma consulta de vendas já filtrada.
+
+    Retorna (vendas, next_cursor); next_cursor é None na última página.
+    """
+    query = query.order_by(Venda.data_venda.desc(), Venda.id.desc())
+
+    if cursor:
+        query = query.filter(tuple_(Venda.data_venda, Venda.id) < tuple_(*decodificar_cursor(cursor)))
+
+    # Uma venda a mais indica se existe próxima página sem precisar de COUNT
+    vendas = query.limit(limite + 1).all()
+    if len(vendas) > limite:
+        vendas = vendas[:limite]
+        return vendas, codificar_cursor(vendas[-1])
+
+    return vendas, None
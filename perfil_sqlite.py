@@ -0,0 +1,147 @@
+"""
+Perfil de produção do SQLite: WAL, pragmas por conexão, pool e fila de escrita.
+
+Com journal_mode=WAL os leitores não bloqueiam o escritor nem são bloqueados
+por ele, mas o SQLite continua aceitando um escritor por vez. Para que as
+escritas não disputem o banco (e não falhem com "database is locked" ao
+promover uma transação de leitura para escrita), toda transação que escreve
+entra numa fila única do processo (`FilaEscrita`, por ordem de chegada) e só
+então abre a transação de escrita com BEGIN IMMEDIATE. Leituras nunca entram
+na fila.
+
+Importação, recálculo e pagamento em lote confirmam uma transação por lote,
+então quem chega durante uma importação grande espera no máximo um lote.
+
+As leituras continuam fora de transação (cada SELECT vê o último commit,
+como no pysqlite padrão). No primeiro comando de escrita a conexão pega a vez
+na fila e o pysqlite abre a transação com BEGIN IMMEDIATE; as leituras
+seguintes já ficam dentro dela. A vez é devolvida logo depois do
+COMMIT/ROLLBACK.
+
+A fila vale para as threads de um processo; entre processos a espera fica
+por conta do busy_timeout.
+"""
+import re
+import sqlite3
+from collections import deque
+from threading import Condition
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+BUSY_TIMEOUT_PADRAO = 15000  # ms
+SYNCHRONOUS_PADRAO = 'NORMAL'  # Seguro com WAL: só a última transação pode se perder numa queda de energia
+CACHE_SIZE_PADRAO = -32000  # Negativo = KiB por conexão
+MMAP_SIZE_PADRAO = 256 * 1024 * 1024
+
+POOL_SIZE_PADRAO = 10
+MAX_OVERFLOW_PADRAO = 10
+POOL_TIMEOUT_PADRAO = 30
+
+# Comandos que exigem a trava de escrita (SAVEPOINT antecipa a escrita que vem dentro dele)
+COMANDO_ESCRITA = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|SAVEPOINT)\b', re.IGNORECASE)
+
+class FilaEscrita:
+    """Fila por ordem de chegada das transações de escrita; uma escreve por vez"""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._condicao = Condition()
+        self._espera = deque()
+        self._ocupada = False
+
+    def entrar(self):
+        """Espera a vez; levanta sqlite3.OperationalError se ela não chegar em `timeout` segundos"""
+        with self._condicao:
+            vez = object()
+            self._espera.append(vez)
+            if not self._condicao.wait_for(lambda: not self._ocupada and self._espera[0] is vez, timeout=self.timeout):
+                self._espera.remove(vez)
+                self._condicao.notify_all()
+                raise sqlite3.OperationalError('database is locked: tempo de espera na fila de escrita esgotado')
+
+            self._espera.popleft()
+            self._ocupada = True
+
+    def sair(self):
+        with self._condicao:
+            self._ocupada = False
+            self._condicao.notify_all()
+
+def usa_sqlite(app):
+    return make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite'
+
+def configurar_engine_sqlite(app):
+    """Dimensiona o pool de conexões; chamar antes de db.init_app"""
+    if not usa_sqlite(app):
+        return
+
+    # Banco em memória (testes): o Flask-SQLAlchemy usa uma conexão única (StaticPool), sem pool para dimensionar
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).database in (None, '', ':memory:'):
+        return
+
+    opcoes = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    opcoes.setdefault('pool_size', app.config.get('SQLITE_POOL_SIZE', POOL_SIZE_PADRAO))
+    opcoes.setdefault('max_overflow', app.config.get('SQLITE_MAX_OVERFLOW', MAX_OVERFLOW_PADRAO))
+    opcoes.setdefault('pool_timeout', app.config.get('SQLITE_POOL_TIMEOUT', POOL_TIMEOUT_PADRAO))
+
+    # As conexões do pool passam de uma thread para outra (requisições e workers)
+    opcoes.setdefault('connect_args', {}).setdefault('check_same_thread', False)
+
+def instalar_perfil_sqlite(app, engine):
+    """Pragmas, controle das transações e fila de escrita no engine; chamar depois de db.init_app"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    busy_timeout = int(app.config.get('SQLITE_BUSY_TIMEOUT', BUSY_TIMEOUT_PADRAO))
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        f'PRAGMA busy_timeout={busy_timeout}',
+        f"PRAGMA synchronous={app.config.get('SQLITE_SYNCHRONOUS', SYNCHRONOUS_PADRAO)}",
+        f"PRAGMA cache_size={int(app.config.get('SQLITE_CACHE_SIZE', CACHE_SIZE_PADRAO))}",
+        f"PRAGMA mmap_size={int(app.config.get('SQLITE_MMAP_SIZE', MMAP_SIZE_PADRAO))}"
+    ]
+    fila = FilaEscrita(timeout=busy_timeout / 1000)
+
+    @event.listens_for(engine, 'connect')
+    def _configurar_conexao(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+        # Transação implícita do pysqlite (antes do primeiro INSERT/UPDATE/DELETE) já com a trava de escrita
+        conexao_dbapi.isolation_level = 'IMMEDIATE'
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _entrar_na_fila(conexao, cursor, sql, parametros, contexto, executemany):
+        if conexao.info.get('vez_escrita') or not COMANDO_ESCRITA.match(sql):
+            return
+        fila.entrar()
+        conexao.info['vez_escrita'] = True
+
+    def _encerrar(conexao, metodo):
+        if not conexao.info.get('vez_escrita'):
+            return
+        try:
+            # Confirma (ou desfaz) antes de passar a vez; o commit/rollback seguinte do SQLAlchemy não tem mais o que fazer
+            getattr(conexao.connection.dbapi_connection, metodo)()
+        finally:
+            conexao.info.pop('vez_escrita', None)
+            fila.sair()
+
+    @event.listens_for(engine, 'commit')
+    def _confirmar(conexao):
+        _encerrar(conexao, 'commit')
+
+    @event.listens_for(engine, 'rollback')
+    def _desfazer(conexao):
+        _encerrar(conexao, 'rollback')
+
+    def _devolver_vez(conexao_dbapi, registro, *args):
+        # Garantia para conexões devolvidas ao pool sem commit/rollback ou descartadas por erro
+        if registro is not None and registro.info.pop('vez_escrita', False):
+            fila.sair()
+
+    event.listen(engine, 'checkin', _devolver_vez)
+    event.listen(engine, 'invalidate', _devolver_vez)
+
+    return fila
@@ -0,0 +1,126 @@
+"""
+Geração de planilhas .xlsx em modo write_only.
+
+As linhas são gravadas em sequência, sem montar a planilha célula a célula
+em memória, e o arquivo final fica num SpooledTemporaryFile privado da
+requisição (em memória até TAMANHO_MAXIMO_MEMORIA, depois em disco). Nenhum
+caminho fixo é compartilhado entre requisições.
+
+O .xlsx é um zip cujo índice só é escrito no `save`: a planilha inteira é
+gerada antes do primeiro byte ser enviado. A memória fica limitada, mas o
+download de uma exportação grande só começa depois que ela termina.
+
+O template de importação é mantido em cache e só é gerado de novo quando a
+versão do catálogo de vendedores/tabelas de comissão (versoes.py) muda.
+"""
+import tempfile
+from threading import Lock
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+from src.services.importacao_pipeline import COLUNAS_OBRIGATORIAS
+from src.services.versoes import etag_recurso
+
+MIMETYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Planilhas maiores que isso são mantidas em arquivo temporário em vez de memória
+TAMANHO_MAXIMO_MEMORIA = 8 * 1024 * 1024
+
+TAMANHO_PEDACO = 64 * 1024
+
+INSTRUCOES_TEMPLATE = [
+    ['Campo', 'Descrição', 'Obrigatório', 'Exemplo'],
+    ['cpf_cliente', 'CPF do cliente (formato: XXX.XXX.XXX-XX ou apenas números)', 'Sim', '123.456.789-00'],
+    ['nome_cliente', 'Nome completo do cliente', 'Sim', 'João Silva'],
+    ['data_venda', 'Data da venda (formato: AAAA-MM-DD)', 'Sim', '2025-06-29'],
+    ['valor_venda', 'Valor da venda (formato: 1000.50)', 'Sim', '1500.00'],
+    ['vendedor', 'Nome exato do vendedor (deve existir no sistema)', 'Sim', 'Ana Silva'],
+    ['tabela_comissao', 'Nome da tabela de comissão (deve existir para o vendedor)', 'Sim', 'Gold'],
+    ['usuario_cadastro', 'Usuário que está cadastrando (opcional)', 'Não', 'admin']
+]
+
+_template_cache = {'chave': None, 'conteudo': None}
+_template_lock = Lock()
+
+def gerar_xlsx(abas):
+    """
+    Gera um .xlsx com as abas informadas como [(titulo, linhas), ...].
+
+    `linhas` pode ser qualquer iterável (inclusive um gerador sobre um cursor
+    do banco). Retorna o arquivo posicionado no início.
+    """
+    import openpyxl  # Carregado na primeira planilha, não na inicialização dos workers
+
+    wb = openpyxl.Workbook(write_only=True)
+    for titulo, linhas in abas:
+        planilha = wb.create_sheet(titulo)
+        for linha in linhas:
+            planilha.append(linha)
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_MAXIMO_MEMORIA)
+    wb.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+def pedacos_arquivo(arquivo, tamanho=TAMANHO_PEDACO):
+    """Lê o arquivo em pedaços para uma resposta em streaming e o fecha ao final"""
+    try:
+        while True:
+            pedaco = arquivo.read(tamanho)
+            if not pedaco:
+                break
+            yield pedaco
+    finally:
+        arquivo.close()
+
+def _catalogo_comissoes():
+    return db.session.query(
+        Vendedor.nome_vendedor,
+        VendedorComissao.nome_tabela,
+        VendedorComissao.porcentagem_comissao
+    ).join(Vendedor, VendedorComissao.id_vendedor == Vendedor.id) \
+        .order_by(VendedorComissao.id).all()
+
+def _montar_template(catalogo):
+    headers = COLUNAS_OBRIGATORIAS + ['usuario_cadastro']
+
+    # Dados de exemplo
+    if catalogo:
+        exemplos = [
+            [f'123.456.789-{i:02d}', f'Cliente Exemplo {i + 1}', '2025-06-29', 1000.00 * (i + 1), nome_vendedor, nome_tabela, 'admin']
+            for i, (nome_vendedor, nome_tabela, _) in enumerate(catalogo[:3])
+        ]
+    else:
+        # Exemplo genérico
+        exemplos = [['123.456.789-00', 'Cliente Exemplo', '2025-06-29', 1000.00, 'Nome do Vendedor', 'Nome da Tabela', 'admin']]
+
+    abas = [
+        ('Vendas', [headers] + exemplos),
+        ('Instruções', INSTRUCOES_TEMPLATE)
+    ]
+
+    # Aba com vendedores disponíveis
+    if catalogo:
+        abas.append(('Vendedores_Disponíveis', [['Vendedor', 'Tabela_Comissao', 'Porcentagem']] + [
+            [nome_vendedor, nome_tabela, f'{porcentagem}%'] for nome_vendedor, nome_tabela, porcentagem in catalogo
+        ]))
+
+    with gerar_xlsx(abas) as arquivo:
+        return arquivo.read()
+
+def obter_template():
+    """
+    Bytes do template de importação.
+
+    A chave do cache é a versão do catálogo (a mesma do ETag de /api/vendedores):
+    enquanto nenhum Vendedor ou VendedorComissao for alterado, o template sai
+    do cache sem consultar o banco. A versão é lida antes do catálogo, então
+    uma alteração durante a geração faz o pedido seguinte gerar outro template.
+    """
+    chave = etag_recurso('vendedores')
+
+    with _template_lock:
+        if _template_cache['chave'] != chave:
+            _template_cache['conteudo'] = _montar_template(_catalogo_comissoes())
+            _template_cache['chave'] = chave
+        return _template_cache['conteudo']
@@ -0,0 +1,83 @@
+from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime
+from src.routes.auth import token_required
+from src.models.user import db
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.recalculo_job import RecalculoComissaoJob
+from src.services.recalculo_comissoes import criar_recalculo, recuperar_recalculo_orfao, TAMANHO_LOTE_PADRAO, TAMANHO_LOTE_MAXIMO
+
+recalculo_bp = Blueprint('recalculo', __name__)
+
+def _data_opcional(dados, campo):
+    valor = dados.get(campo)
+    return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+@recalculo_bp.route('/vendedores/comissoes/<int:id>/recalcular', methods=['POST'])
+@token_required
+def recalcular_comissoes(vendedor_atual, id):
+    """Enfileira o recálculo do valor da comissão das vendas de uma tabela de comissão. Apenas admin."""
+    if vendedor_atual.email != 'admin@admin.com':
+        return jsonify({'erro': 'Apenas administradores podem recalcular comissões'}), 403
+
+    try:
+        comissao = db.session.get(VendedorComissao, id)
+        if not comissao:
+            return jsonify({'erro': 'Configuração de comissão não encontrada'}), 404
+
+        dados = request.get_json(silent=True) or {}
+
+        # Por padrão as comissões já pagas não são alteradas
+        apenas_pendentes = dados.get('apenas_pendentes', True)
+        if not isinstance(apenas_pendentes, bool):
+            return jsonify({'erro': 'apenas_pendentes deve ser true ou false'}), 400
+
+        tamanho_lote = dados.get('tamanho_lote', TAMANHO_LOTE_PADRAO)
+        if not isinstance(tamanho_lote, int) or tamanho_lote < 1 or tamanho_lote > TAMANHO_LOTE_MAXIMO:
+            return jsonify({'erro': f'tamanho_lote deve ser um inteiro entre 1 e {TAMANHO_LOTE_MAXIMO}'}), 400
+
+        data_inicio = _data_opcional(dados, 'data_inicio')
+        data_fim = _data_opcional(dados, 'data_fim')
+        if data_inicio and data_fim and data_inicio > data_fim:
+            return jsonify({'erro': 'data_inicio deve ser anterior a data_fim'}), 400
+
+        job = criar_recalculo(
+            current_app._get_current_object(),
+            comissao.id,
+            apenas_pendentes=apenas_pendentes,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            tamanho_lote=tamanho_lote
+        )
+
+        return jsonify({
+            'mensagem': 'Recálculo enfileirado',
+            'job': job.to_dict(),
+            'status_url': f'/api/vendedores/comissoes/recalculos/{job.id}'
+        }), 202
+
+    except ValueError as e:
+        # Datas fora do formato AAAA-MM-DD
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@recalculo_bp.route('/vendedores/comissoes/recalculos/<job_id>', methods=['GET'])
+@token_required
+def obter_recalculo(vendedor_atual, job_id):
+    """Status e progresso de um recálculo. Apenas admin."""
+    if vendedor_atual.email != 'admin@admin.com':
+        return jsonify({'erro': 'Apenas administradores podem consultar recálculos'}), 403
+
+    try:
+        job = db.session.get(RecalculoComissaoJob, job_id)
+        if not job:
+            return jsonify({'erro': 'Recálculo não encontrado'}), 404
+
+        # Jobs abandonados por um worker que parou (ex.: reinício do servidor) voltam para a fila
+        recuperar_recalculo_orfao(current_app._get_current_object(), job)
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
@@ -0,0 +1,218 @@
+"""
+Recálculo em lote do valor da comissão das vendas de uma tabela de comissão.
+
+Quando a porcentagem de um `VendedorComissao` muda, as vendas já gravadas
+continuam com o valor calculado pela porcentagem antiga. Em vez de carregar
+cada venda e chamar `Venda.calcular_comissao()`, o recálculo roda em segundo
+plano como um `RecalculoComissaoJob` e atualiza as vendas com UPDATEs por
+faixa de id (TAMANHO_LOTE_PADRAO vendas por transação). O progresso e o
+checkpoint (último id processado) são gravados na mesma transação de cada
+faixa, então um job interrompido é retomado de onde parou.
+
+A porcentagem é lida da própria tabela de comissão dentro de cada UPDATE:
+se ela mudar de novo durante o job, as faixas seguintes já usam o valor novo
+e o job seguinte (enfileirado pela nova alteração) corrige as anteriores.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.recalculo_job import RecalculoComissaoJob
+from src.services.resumo_vendas import DeltasResumo
+
+TAMANHO_LOTE_PADRAO = 5000
+TAMANHO_LOTE_MAXIMO = 50000
+
+# Jobs em processamento sem atualização há mais tempo que isso são considerados órfãos
+TIMEOUT_JOB_PADRAO = 300
+
+_executor = None
+_executor_lock = Lock()
+
+def _obter_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Um worker: os recálculos são limitados pelo banco e devem rodar na ordem em que foram pedidos
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recalculo')
+        return _executor
+
+def _limite_heartbeat(app):
+    return datetime.utcnow() - timedelta(seconds=app.config.get('RECALCULO_JOB_TIMEOUT', TIMEOUT_JOB_PADRAO))
+
+def criar_recalculo(app, id_vendedor_comissao, apenas_pendentes=True, data_inicio=None, data_fim=None, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Registra o job de recálculo e o coloca na fila"""
+    job = RecalculoComissaoJob(
+        id=uuid.uuid4().hex,
+        id_vendedor_comissao=id_vendedor_comissao,
+        apenas_pendentes=apenas_pendentes,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        tamanho_lote=tamanho_lote
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    enfileirar_recalculo(app, job.id)
+    return job
+
+def enfileirar_recalculo(app, job_id):
+    _obter_executor(app).submit(_executar_job, app, job_id)
+
+def recuperar_recalculo_orfao(app, job):
+    """Recoloca na fila um job cujo worker parou de dar sinal de vida"""
+    if job.status == 'processando' and job.data_atualizacao < _limite_heartbeat(app):
+        enfileirar_recalculo(app, job.id)
+
+def retomar_recalculos_pendentes(app):
+    """Recoloca na fila os recálculos pendentes ou órfãos (chamado na inicialização)"""
+    jobs = RecalculoComissaoJob.query.filter(
+        db.or_(
+            RecalculoComissaoJob.status == 'pendente',
+            db.and_(RecalculoComissaoJob.status == 'processando', RecalculoComissaoJob.data_atualizacao < _limite_heartbeat(app))
+        )
+    ).order_by(RecalculoComissaoJob.data_criacao).all()
+
+    for job in jobs:
+        enfileirar_recalculo(app, job.id)
+
+    return len(jobs)
+
+def filtrar_vendas(job):
+    """Condições que selecionam as vendas afetadas pelo job"""
+    condicoes = [Venda.id_vendedor_comissao == job.id_vendedor_comissao]
+    if job.apenas_pendentes:
+        condicoes.append(Venda.comissao_paga.is_(False))
+    if job.data_inicio:
+        condicoes.append(Venda.data_venda >= job.data_inicio)
+    if job.data_fim:
+        condicoes.append(Venda.data_venda <= job.data_fim)
+    return condicoes
+
+def _reivindicar_job(app, job_id):
+    """Marca o job como em processamento de forma atômica; só um worker vence"""
+    atualizados = RecalculoComissaoJob.query.filter(
+        RecalculoComissaoJob.id == job_id,
+        db.or_(
+            RecalculoComissaoJob.status == 'pendente',
+            db.and_(RecalculoComissaoJob.status == 'processando', RecalculoComissaoJob.data_atualizacao < _limite_heartbeat(app))
+        )
+    ).update({'status': 'processando', 'data_atualizacao': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return atualizados == 1
+
+def _executar_job(app, job_id):
+    with app.app_context():
+        try:
+            _processar_job(app, job_id)
+        finally:
+            db.session.remove()
+
+def _processar_job(app, job_id):
+    if not _reivindicar_job(app, job_id):
+        return
+
+    job = db.session.get(RecalculoComissaoJob, job_id)
+    condicoes = filtrar_vendas(job)
+    tamanho_lote = job.tamanho_lote
+    ultimo_id = job.ultimo_id_processado
+    processadas = job.vendas_processadas
+    atualizadas = job.vendas_atualizadas
+
+    try:
+        porcentagem = db.session.query(VendedorComissao.porcentagem_comissao) \
+            .filter_by(id=job.id_vendedor_comissao).scalar()
+        if porcentagem is None:
+            raise ValueError(f'Tabela de comissão {job.id_vendedor_comissao} não encontrada')
+
+        if job.total_vendas is None:
+            total = db.session.query(func.count(Venda.id)).filter(*condicoes).scalar()
+            RecalculoComissaoJob.query.filter_by(id=job_id).update(
+                {'total_vendas': total, 'porcentagem_comissao': porcentagem}, synchronize_session=False
+            )
+            db.session.commit()
+
+        # Mesma conta de Venda.calcular_valor_comissao, feita pelo banco com a porcentagem atual da tabela
+        porcentagem_atual = select(VendedorComissao.porcentagem_comissao) \
+            .where(VendedorComissao.id == job.id_vendedor_comissao).scalar_subquery()
+        novo_valor = Venda.valor_venda * (porcentagem_atual / 100.0)
+
+        while True:
+            # Fim da próxima faixa: o id da venda de número tamanho_lote depois do checkpoint
+            faixa = select(Venda.id).where(*condicoes, Venda.id > ultimo_id) \
+                .order_by(Venda.id).limit(tamanho_lote).subquery()
+            quantidade, limite = db.session.execute(select(func.count(), func.max(faixa.c.id)).select_from(faixa)).one()
+            if not quantidade:
+                break
+
+            # Contribuição da faixa no resumo retirada antes e somada de novo depois do UPDATE
+            condicoes_faixa = condicoes + [Venda.id > ultimo_id, Venda.id <= limite]
+            deltas = DeltasResumo()
+            conexao = db.session.connection()
+            deltas.retirar(conexao, condicoes_faixa)
+
+            resultado = db.session.execute(
+                update(Venda)
+                .where(*condicoes_faixa, Venda.valor_comissao != novo_valor)
+                .values(valor_comissao=novo_valor)
+                .execution_options(synchronize_session=False)
+            )
+
+            deltas.somar(conexao, condicoes_faixa)
+            deltas.aplicar(conexao)
+
+            ultimo_id = limite
+            processadas += quantidade
+            atualizadas += resultado.rowcount
+
+            # Vendas da faixa e checkpoint confirmados juntos
+            RecalculoComissaoJob.query.filter_by(id=job_id).update({
+                'ultimo_id_processado': ultimo_id,
+                'vendas_processadas': processadas,
+                'vendas_atualizadas': atualizadas,
+                'data_atualizacao': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+
+        campos = {'status': 'concluido'}
+
+    except Exception as e:
+        db.session.rollback()
+        campos = {'status': 'erro', 'mensagem_erro': f'Erro ao recalcular - {str(e)}'}
+
+    campos['data_atualizacao'] = campos['data_conclusao'] = datetime.utcnow()
+    RecalculoComissaoJob.query.filter_by(id=job_id).update(campos, synchronize_session=False)
+    db.session.commit()
+
+def _recalcular_apos_alteracao(app, ids_vendedor_comissao):
+    with app.app_context():
+        try:
+            for id_vendedor_comissao in ids_vendedor_comissao:
+                criar_recalculo(app, id_vendedor_comissao, apenas_pendentes=app.config.get('RECALCULO_APENAS_PENDENTES', True))
+        finally:
+            db.session.remove()
+
+@event.listens_for(VendedorComissao, 'after_update')
+def _registrar_nova_porcentagem(mapper, connection, target):
+    if inspect(target).attrs.porcentagem_comissao.history.has_changes():
+        sessao = inspect(target).session
+        sessao.info.setdefault('porcentagens_alteradas', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _enfileirar_apos_commit(sessao):
+    # Recálculo automático de qualquer rota que altere a porcentagem; só depois do commit,
+    # para o job ler a porcentagem nova. O job é criado fora desta sessão, que está terminando o commit.
+    ids = sessao.info.pop('porcentagens_alteradas', None)
+    if ids and has_app_context():
+        app = current_app._get_current_object()
+        _obter_executor(app).submit(_recalcular_apos_alteracao, app, sorted(ids))
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_porcentagens(sessao):
+    sessao.info.pop('porcentagens_alteradas', None)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from src.models.user import db
+
+class RecalculoComissaoJob(db.Model):
+    __tablename__ = 'recalculo_comissao_job'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 em hexadecimal
+    id_vendedor_comissao = db.Column(db.Integer, db.ForeignKey('vendedor_comissao.id'), nullable=False)
+    porcentagem_comissao = db.Column(db.Float, nullable=True)  # Porcentagem aplicada (lida ao iniciar o job)
+    apenas_pendentes = db.Column(db.Boolean, nullable=False, default=True)  # Não altera comissões já pagas
+    data_inicio = db.Column(db.Date, nullable=True)
+    data_fim = db.Column(db.Date, nullable=True)
+    tamanho_lote = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, processando, concluido, erro
+    total_vendas = db.Column(db.Integer, nullable=True)  # Vendas que atendem aos filtros
+    vendas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    vendas_atualizadas = db.Column(db.Integer, nullable=False, default=0)  # Vendas cujo valor da comissão mudou
+    ultimo_id_processado = db.Column(db.Integer, nullable=False, default=0)  # Checkpoint para retomar após reinício
+    mensagem_erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_atualizacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Também serve de heartbeat do worker
+    data_conclusao = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<RecalculoComissaoJob {self.id} - {self.status}>'
+
+    @property
+    def finalizado(self):
+        return self.status in ('concluido', 'erro')
+
+    def to_dict(self):
+        percentual = None
+        if self.total_vendas:
+            percentual = round(100.0 * self.vendas_processadas / self.total_vendas, 1)
+        elif self.status == 'concluido':
+            percentual = 100.0
+
+        return {
+            'id': self.id,
+            'id_vendedor_comissao': self.id_vendedor_comissao,
+            'porcentagem_comissao': self.porcentagem_comissao,
+            'apenas_pendentes': self.apenas_pendentes,
+            'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
+            'data_fim': self.data_fim.isoformat() if self.data_fim else None,
+            'tamanho_lote': self.tamanho_lote,
+            'status': self.status,
+            'progresso': {
+                'total_vendas': self.total_vendas,
+                'vendas_processadas': self.vendas_processadas,
+                'vendas_atualizadas': self.vendas_atualizadas,
+                'percentual': percentual
+            },
+            'mensagem_erro': self.mensagem_erro,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None,
+            'data_conclusao': self.data_conclusao.isoformat() if self.data_conclusao else None
+        }
@@ -0,0 +1,26 @@
+from src.models.user import db
+
+class ResumoVendas(db.Model):
+    """
+    Totais das vendas por dia e configuração de comissão.
+
+    Mantido de forma incremental por `src.services.resumo_vendas` em todo caminho
+    que grava vendas; os relatórios agregados leem daqui em vez da tabela venda.
+    """
+    __tablename__ = 'resumo_vendas'
+    __table_args__ = (
+        db.Index('ix_resumo_vendas_vendedor_data', 'id_vendedor', 'data_venda'),  # Dashboard do vendedor por período
+    )
+
+    id_vendedor_comissao = db.Column(db.Integer, db.ForeignKey('vendedor_comissao.id'), primary_key=True)
+    data_venda = db.Column(db.Date, primary_key=True)
+    id_vendedor = db.Column(db.Integer, db.ForeignKey('vendedor.id'), nullable=False)  # Copiado da configuração de comissão
+    total_vendas = db.Column(db.Integer, nullable=False, default=0)
+    valor_vendas = db.Column(db.Float, nullable=False, default=0.0)
+    valor_comissoes = db.Column(db.Float, nullable=False, default=0.0)
+    vendas_pagas = db.Column(db.Integer, nullable=False, default=0)
+    valor_vendas_pagas = db.Column(db.Float, nullable=False, default=0.0)
+    valor_comissoes_pagas = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<ResumoVendas {self.data_venda} - {self.id_vendedor_comissao}>'
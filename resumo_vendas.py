@@ -0,0 +1,258 @@
+"""
+Manutenção incremental da tabela `resumo_vendas` (totais por dia e configuração de comissão).
+
+Toda gravação de vendas soma ou subtrai sua contribuição no resumo dentro da
+mesma transação:
+
+- alterações pelo ORM (cadastro, edição e exclusão de vendas) são capturadas
+  pelos eventos do mapper e aplicadas no fim de cada flush;
+- os caminhos em lote (importação, recálculo e pagamento de comissões), que
+  usam INSERT/UPDATE diretos, acumulam as diferenças num `DeltasResumo` e o
+  aplicam antes do commit de cada lote.
+
+Os valores antigos de uma venda são lidos com a venda travada (`travar_vendas`),
+na mesma transação que a altera, para que duas alterações concorrentes não
+descontem o mesmo valor duas vezes.
+
+As diferenças são gravadas com INSERT ... ON CONFLICT DO UPDATE somando aos
+totais existentes. `reconstruir_resumo()` recalcula a tabela inteira a partir
+das vendas e `verificar_resumo()` aponta divergências sem alterar nada.
+"""
+from sqlalchemy import event, func, case, select, insert, delete, update, inspect, false
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.resumo_venda import ResumoVendas
+
+CAMPOS_TOTAIS = ('total_vendas', 'valor_vendas', 'valor_comissoes', 'vendas_pagas', 'valor_vendas_pagas', 'valor_comissoes_pagas')
+
+# Campos da venda que mudam a sua contribuição no resumo
+CAMPOS_RESUMO = ('id_vendedor_comissao', 'data_venda', 'valor_venda', 'valor_comissao', 'comissao_paga')
+
+# Ids por consulta ao agregar vendas por id (limite de parâmetros por comando do SQLite antigo)
+TAMANHO_BLOCO_IDS = 900
+
+# Diferença máxima aceita entre as somas do resumo e as das vendas (acúmulo de arredondamentos)
+TOLERANCIA_VERIFICACAO = 0.01
+
+def agregados_vendas():
+    """Colunas agregadas de vendas na ordem de CAMPOS_TOTAIS"""
+    paga = Venda.comissao_paga.is_(True)
+    return (
+        func.count(Venda.id),
+        func.coalesce(func.sum(Venda.valor_venda), 0.0),
+        func.coalesce(func.sum(Venda.valor_comissao), 0.0),
+        func.coalesce(func.sum(case((paga, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((paga, Venda.valor_venda), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((paga, Venda.valor_comissao), else_=0.0)), 0.0)
+    )
+
+class DeltasResumo:
+    """Diferenças a somar no resumo, agrupadas por (id_vendedor_comissao, data_venda)"""
+
+    def __init__(self):
+        self.deltas = {}
+
+    def _somar(self, chave, valores, sinal):
+        atual = self.deltas.setdefault(chave, [0, 0.0, 0.0, 0, 0.0, 0.0])
+        for i, valor in enumerate(valores):
+            atual[i] += sinal * valor
+
+    def venda(self, id_vendedor_comissao, data_venda, valor_venda, valor_comissao, comissao_paga, sinal=1):
+        """Contribuição de uma venda (sinal=-1 para retirá-la)"""
+        valor_comissao = valor_comissao or 0.0
+        if comissao_paga:
+            valores = (1, valor_venda, valor_comissao, 1, valor_venda, valor_comissao)
+        else:
+            valores = (1, valor_venda, valor_comissao, 0, 0.0, 0.0)
+        self._somar((id_vendedor_comissao, data_venda), valores, sinal)
+
+    def _vendas(self, conexao, condicoes, sinal):
+        linhas = conexao.execute(
+            select(Venda.id_vendedor_comissao, Venda.data_venda, *agregados_vendas())
+            .where(*condicoes)
+            .group_by(Venda.id_vendedor_comissao, Venda.data_venda)
+        )
+        for id_vendedor_comissao, data_venda, *valores in linhas:
+            self._somar((id_vendedor_comissao, data_venda), valores, sinal)
+
+    def retirar(self, conexao, condicoes):
+        """
+        Retira a contribuição atual das vendas que atendem às condições, antes de alterá-las.
+
+        As vendas ficam travadas até o fim da transação, então os valores lidos
+        aqui são exatamente os que o UPDATE seguinte vai substituir.
+        """
+        travar_vendas(conexao, condicoes)
+        self._vendas(conexao, condicoes, -1)
+
+    def somar(self, conexao, condicoes):
+        """Soma a contribuição das vendas que atendem às condições (depois de inseridas ou alteradas)"""
+        self._vendas(conexao, condicoes, 1)
+
+    def aplicar(self, conexao):
+        """Grava as diferenças no resumo (na transação de `conexao`) e as descarta"""
+        deltas = {chave: valores for chave, valores in self.deltas.items() if any(valores)}
+        self.deltas = {}
+        if not deltas:
+            return
+
+        ids_configuracao = {id_vendedor_comissao for id_vendedor_comissao, _ in deltas}
+        vendedores = dict(conexao.execute(
+            select(VendedorComissao.id, VendedorComissao.id_vendedor).where(VendedorComissao.id.in_(ids_configuracao))
+        ).all())
+
+        linhas = [
+            dict(zip(CAMPOS_TOTAIS, valores), id_vendedor_comissao=id_vendedor_comissao, data_venda=data_venda, id_vendedor=vendedores[id_vendedor_comissao])
+            for (id_vendedor_comissao, data_venda), valores in deltas.items()
+        ]
+
+        tabela = ResumoVendas.__table__
+        inserir = (postgresql.insert if conexao.dialect.name == 'postgresql' else sqlite.insert)(tabela)
+        conexao.execute(
+            inserir.on_conflict_do_update(
+                index_elements=[tabela.c.id_vendedor_comissao, tabela.c.data_venda],
+                set_={campo: tabela.c[campo] + inserir.excluded[campo] for campo in CAMPOS_TOTAIS}
+            ),
+            linhas
+        )
+
+        # Dias/configurações que ficaram sem vendas saem do resumo
+        conexao.execute(
+            delete(tabela).where(
+                tabela.c.id_vendedor_comissao.in_(ids_configuracao),
+                tabela.c.data_venda.in_({data_venda for _, data_venda in deltas}),
+                tabela.c.total_vendas <= 0
+            )
+        )
+
+def totalizar_resumo(id_vendedor=None, data_inicio=None, data_fim=None, comissao_paga=None):
+    """Estatísticas do dashboard (quantidade, valor, comissões pagas e pendentes) somadas a partir do resumo"""
+    query = db.session.query(*[func.coalesce(func.sum(getattr(ResumoVendas, campo)), 0) for campo in CAMPOS_TOTAIS])
+    if id_vendedor is not None:
+        query = query.filter(ResumoVendas.id_vendedor == id_vendedor)
+    if data_inicio:
+        query = query.filter(ResumoVendas.data_venda >= data_inicio)
+    if data_fim:
+        query = query.filter(ResumoVendas.data_venda <= data_fim)
+
+    total_vendas, valor_vendas, comissoes, vendas_pagas, valor_vendas_pagas, comissoes_pagas = query.one()
+
+    if comissao_paga is True:
+        total_vendas, valor_vendas, comissoes = vendas_pagas, valor_vendas_pagas, comissoes_pagas
+    elif comissao_paga is False:
+        total_vendas, valor_vendas, comissoes = total_vendas - vendas_pagas, valor_vendas - valor_vendas_pagas, comissoes - comissoes_pagas
+        comissoes_pagas = 0.0
+
+    return {
+        'total_vendas': int(total_vendas),
+        'total_valor_vendas': float(valor_vendas),
+        'total_comissoes': float(comissoes),
+        'comissoes_pagas': float(comissoes_pagas),
+        'comissoes_pendentes': float(comissoes - comissoes_pagas)
+    }
+
+def _consulta_completa():
+    return select(
+        Venda.id_vendedor_comissao,
+        Venda.data_venda,
+        VendedorComissao.id_vendedor,
+        *agregados_vendas()
+    ).join(VendedorComissao, Venda.id_vendedor_comissao == VendedorComissao.id) \
+        .group_by(Venda.id_vendedor_comissao, Venda.data_venda, VendedorComissao.id_vendedor)
+
+def reconstruir_resumo():
+    """Recalcula o resumo inteiro a partir das vendas, numa única transação"""
+    colunas = ['id_vendedor_comissao', 'data_venda', 'id_vendedor'] + list(CAMPOS_TOTAIS)
+    db.session.execute(delete(ResumoVendas))
+    db.session.execute(insert(ResumoVendas).from_select(colunas, _consulta_completa()))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(ResumoVendas).scalar()
+
+def verificar_resumo():
+    """Lista as divergências entre o resumo e as vendas (vazia quando estão consistentes)"""
+    esperado = {(linha[0], linha[1]): linha[2:] for linha in db.session.execute(_consulta_completa())}
+    gravado = {
+        (linha[0], linha[1]): linha[2:]
+        for linha in db.session.execute(select(
+            ResumoVendas.id_vendedor_comissao, ResumoVendas.data_venda, ResumoVendas.id_vendedor,
+            *[getattr(ResumoVendas, campo) for campo in CAMPOS_TOTAIS]
+        ))
+    }
+
+    divergencias = []
+    for chave in sorted(set(esperado) | set(gravado), key=lambda chave: (chave[0], chave[1])):
+        valores_esperados, valores_gravados = esperado.get(chave), gravado.get(chave)
+        if valores_esperados is None or valores_gravados is None or valores_esperados[0] != valores_gravados[0] \
+                or any(abs(a - b) > TOLERANCIA_VERIFICACAO for a, b in zip(valores_esperados[1:], valores_gravados[1:])):
+            divergencias.append({
+                'id_vendedor_comissao': chave[0],
+                'data_venda': chave[1].isoformat(),
+                'esperado': dict(zip(('id_vendedor',) + CAMPOS_TOTAIS, valores_esperados)) if valores_esperados else None,
+                'gravado': dict(zip(('id_vendedor',) + CAMPOS_TOTAIS, valores_gravados)) if valores_gravados else None
+            })
+
+    return divergencias
+
+def condicoes_por_ids(ids):
+    """Condições para agregar uma lista de vendas em blocos de TAMANHO_BLOCO_IDS ids"""
+    ids = list(ids)
+    return [[Venda.id.in_(ids[inicio:inicio + TAMANHO_BLOCO_IDS])] for inicio in range(0, len(ids), TAMANHO_BLOCO_IDS)]
+
+def travar_vendas(conexao, condicoes):
+    """Impede que outra transação altere as vendas entre a leitura dos valores antigos e o UPDATE"""
+    if conexao.dialect.name == 'sqlite':
+        # O SQLite trava o banco inteiro: um comando de escrita que não altera nada
+        # já abre a transação de escrita, e as leituras seguintes ficam dentro dela
+        conexao.execute(update(ResumoVendas.__table__).where(false()).values(total_vendas=0))
+    else:
+        conexao.execute(select(Venda.id).where(*condicoes).with_for_update())
+
+def _deltas_sessao(target):
+    return object_session(target).info.setdefault('deltas_resumo', DeltasResumo())
+
+def _alterou_resumo(target):
+    estado = inspect(target)
+    return any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RESUMO)
+
+# Os valores antigos e novos são lidos do banco, na conexão do flush, e não do
+# objeto: o objeto pode ter sido carregado antes de outra transação alterar a venda
+
+@event.listens_for(Venda, 'after_insert')
+def _resumo_ao_inserir(mapper, connection, target):
+    _deltas_sessao(target).somar(connection, [Venda.id == target.id])
+
+@event.listens_for(Venda, 'before_update')
+def _resumo_antes_de_atualizar(mapper, connection, target):
+    if _alterou_resumo(target):
+        _deltas_sessao(target).retirar(connection, [Venda.id == target.id])
+
+@event.listens_for(Venda, 'after_update')
+def _resumo_ao_atualizar(mapper, connection, target):
+    if _alterou_resumo(target):
+        _deltas_sessao(target).somar(connection, [Venda.id == target.id])
+
+@event.listens_for(Venda, 'before_delete')
+def _resumo_ao_excluir(mapper, connection, target):
+    _deltas_sessao(target).retirar(connection, [Venda.id == target.id])
+
+@event.listens_for(VendedorComissao, 'after_update')
+def _resumo_ao_trocar_vendedor(mapper, connection, target):
+    if inspect(target).attrs.id_vendedor.history.has_changes():
+        connection.execute(
+            update(ResumoVendas.__table__)
+            .where(ResumoVendas.__table__.c.id_vendedor_comissao == target.id)
+            .values(id_vendedor=target.id_vendedor)
+        )
+
+@event.listens_for(Session, 'after_flush')
+def _aplicar_deltas_flush(sessao, contexto):
+    deltas = sessao.info.pop('deltas_resumo', None)
+    if deltas:
+        deltas.aplicar(sessao.connection())
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_deltas(sessao):
+    sessao.info.pop('deltas_resumo', None)
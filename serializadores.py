@@ -0,0 +1,37 @@
+"""
+Planos de carregamento para serializar listas sem consultas N+1.
+
+`Venda.to_dict()` lê a configuração de comissão e o vendedor de cada venda,
+e `Vendedor.to_dict()` lê as comissões do vendedor. Com os relacionamentos
+lazy padrão isso gera uma consulta extra por item. As funções abaixo
+aplicam a estratégia de carregamento adequada a cada listagem, de modo que
+serializar a lista inteira custe um número fixo de consultas.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.venda import Venda
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+
+def carregar_vendas(query):
+    """Vendas com configuração de comissão e vendedor no mesmo SELECT (relações muitos-para-um)"""
+    return query.options(
+        joinedload(Venda.vendedor_comissao).joinedload(VendedorComissao.vendedor)
+    )
+
+def carregar_vendedores(query):
+    """Vendedores com as comissões em um único SELECT adicional, qualquer que seja o número de vendedores"""
+    # O vendedor de cada comissão já está no identity map, então VendedorComissao.to_dict() não consulta o banco
+    return query.options(selectinload(Vendedor.comissoes))
+
+def carregar_comissoes(query):
+    """Configurações de comissão com o vendedor no mesmo SELECT"""
+    return query.options(joinedload(VendedorComissao.vendedor))
+
+def serializar_vendas(query):
+    return [venda.to_dict() for venda in carregar_vendas(query).all()]
+
+def serializar_vendedores(query):
+    return [vendedor.to_dict() for vendedor in carregar_vendedores(query).all()]
+
+def serializar_comissoes(query):
+    return [comissao.to_dict() for comissao in carregar_comissoes(query).all()]
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Servidor de produção da aplicação (gunicorn com workers criados por fork)
+
+Antes de subir os workers, o processo principal aplica as migrações pendentes
+(migrate.py) uma única vez e carrega a aplicação (preload). Os workers nascem
+por fork já com os módulos importados, sem criar tabelas nem inspecionar o
+banco, e compartilham os contadores de versão dos ETags do catálogo. Cada
+worker descarta as conexões herdadas e retoma os jobs pendentes (a reivindicação
+de cada job é atômica, então só um worker processa cada um).
+
+Uso: python servidor.py [--workers=N] [--threads=N] [--porta=5000] [--host=0.0.0.0] [--timeout=S] [--sem-migrar]
+
+  --workers=N   processos (padrão: WEB_CONCURRENCY ou 2 x CPUs + 1)
+  --threads=N   threads por processo (padrão 4)
+  --timeout=S   segundos sem sinal de vida até o worker ser reiniciado (padrão 120)
+  --sem-migrar  não aplica as migrações (quando elas rodam em outro passo do deploy)
+
+O banco é o mesmo da aplicação (DATABASE_URL ou o SQLite local). O cache de
+tokens é de cada worker, mas as gerações que o invalidam ficam em memória
+compartilhada: uma desativação de vendedor vale para todos os workers na
+requisição seguinte. A fila de escrita do SQLite continua sendo de cada
+worker, e entre processos as escritas no SQLite esperam pelo busy_timeout.
+"""
+import os
+import sys
+import multiprocessing
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # Dependência apenas do servidor de produção
+    BaseApplication = None
+
+THREADS_PADRAO = 4
+TIMEOUT_PADRAO = 120
+
+def workers_padrao():
+    return int(os.environ.get('WEB_CONCURRENCY', 2 * multiprocessing.cpu_count() + 1))
+
+def _apos_fork(servidor, worker):
+    # Conexões abertas pelo processo principal não podem ser usadas por dois processos
+    from src.main import app
+    from src.models.user import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def _worker_iniciado(worker):
+    # Os executores dos jobs são threads: precisam ser criados no próprio worker
+    from src.main import app, retomar_jobs
+    retomar_jobs(app)
+
+def migrar_banco():
+    """Aplica as migrações pendentes uma vez, antes de os workers existirem"""
+    from migrate import Migrador, url_banco
+    migrador = Migrador(url_banco())
+    try:
+        migrador.migrar()
+    finally:
+        migrador.engine.dispose()
+
+if BaseApplication is not None:
+    class ServidorVendas(BaseApplication):
+        """Aplicação gunicorn configurada por código, sem arquivo de configuração"""
+
+        def __init__(self, opcoes):
+            self.opcoes = opcoes
+            super().__init__()
+
+        def load_config(self):
+            for chave, valor in self.opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            from src.main import app
+            return app
+
+def servir(argumentos):
+    opcoes = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], True) for arg in argumentos if arg.startswith('--'))
+
+    if BaseApplication is None:
+        print("O servidor de produção requer o pacote gunicorn (pip install gunicorn).")
+        return False
+
+    if not opcoes.get('sem-migrar'):
+        migrar_banco()
+
+    # A aplicação é carregada depois das migrações e sem os passos que ficam para o deploy ou para os workers
+    os.environ['FLASK_PREPARAR_BANCO'] = 'false'
+    os.environ['FLASK_RETOMAR_JOBS'] = 'false'
+
+    threads = int(opcoes.get('threads', THREADS_PADRAO))
+    ServidorVendas({
+        'bind': f"{opcoes.get('host', '0.0.0.0')}:{opcoes.get('porta', 5000)}",
+        'workers': int(opcoes.get('workers', workers_padrao())),
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': int(opcoes.get('timeout', TIMEOUT_PADRAO)),
+        'preload_app': True,
+        'accesslog': '-',
+        'post_fork': _apos_fork,
+        'post_worker_init': _worker_iniciado
+    }).run()
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if servir(sys.argv[1:]) else 1)
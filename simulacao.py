@@ -0,0 +1,95 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+from numbers import Number
+from src.routes.auth import token_required
+from src.services.banco import ler_da_replica
+from src.services import simulacao_comissoes
+from src.services.simulacao_comissoes import BaseSimulacao, MAX_CENARIOS
+
+simulacao_bp = Blueprint('simulacao', __name__)
+
+def _data_opcional(dados, campo):
+    valor = dados.get(campo)
+    return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+def _validar_cenarios(dados):
+    """Lê `cenarios` ([{nome, porcentagens}]) ou um único mapa `porcentagens`; retorna (cenarios, erro)"""
+    if 'cenarios' in dados:
+        cenarios = dados['cenarios']
+    elif 'porcentagens' in dados:
+        cenarios = [{'nome': 'simulacao', 'porcentagens': dados['porcentagens']}]
+    else:
+        return None, 'Informe porcentagens ({"nome_tabela": porcentagem}) ou cenarios'
+
+    if not isinstance(cenarios, list) or not cenarios:
+        return None, 'cenarios deve ser uma lista não vazia'
+    if len(cenarios) > MAX_CENARIOS:
+        return None, f'Máximo de {MAX_CENARIOS} cenários por simulação'
+
+    resultado = []
+    for i, cenario in enumerate(cenarios, 1):
+        porcentagens = cenario.get('porcentagens') if isinstance(cenario, dict) else None
+        if not isinstance(porcentagens, dict):
+            return None, f'Cenário {i}: porcentagens deve ser um objeto {{"nome_tabela": porcentagem}}'
+
+        for nome_tabela, porcentagem in porcentagens.items():
+            if isinstance(porcentagem, bool) or not isinstance(porcentagem, Number) or not 0 <= porcentagem <= 100:
+                return None, f'Cenário {i}: porcentagem da tabela {nome_tabela} deve ser um número entre 0 e 100'
+
+        resultado.append((cenario.get('nome') or f'cenario_{i}', porcentagens))
+
+    return resultado, None
+
+@simulacao_bp.route('/relatorio/simulacao-comissoes', methods=['POST'])
+@token_required
+@ler_da_replica
+def simular_comissoes(vendedor_atual):
+    """
+    Comissões que seriam pagas com outras porcentagens por nome de tabela.
+
+    Aceita filtros opcionais `data_inicio`, `data_fim` e `comissao_paga`. Apenas admin.
+    """
+    if vendedor_atual.email != 'admin@admin.com':
+        return jsonify({'erro': 'Apenas administradores podem simular comissões'}), 403
+
+    if not simulacao_comissoes.carregar_numpy():
+        return jsonify({'erro': 'Simulação de comissões requer o pacote numpy instalado no servidor'}), 501
+
+    try:
+        dados = request.get_json(silent=True) or {}
+        if not isinstance(dados, dict):
+            return jsonify({'erro': 'O corpo deve ser um objeto JSON'}), 400
+
+        cenarios, erro = _validar_cenarios(dados)
+        if erro:
+            return jsonify({'erro': erro}), 400
+
+        # Uma tabela com o nome errado seria ignorada e o cenário sairia igual ao atual
+        cadastradas = simulacao_comissoes.nomes_tabela_cadastrados()
+        desconhecidas = sorted({nome_tabela for _, porcentagens in cenarios for nome_tabela in porcentagens} - cadastradas)
+        if desconhecidas:
+            return jsonify({
+                'erro': f'Tabelas de comissão desconhecidas: {", ".join(desconhecidas)}',
+                'tabelas_desconhecidas': desconhecidas
+            }), 400
+
+        comissao_paga = dados.get('comissao_paga')
+        if comissao_paga is not None and not isinstance(comissao_paga, bool):
+            return jsonify({'erro': 'comissao_paga deve ser true ou false'}), 400
+
+        base = BaseSimulacao.carregar(
+            data_inicio=_data_opcional(dados, 'data_inicio'),
+            data_fim=_data_opcional(dados, 'data_fim'),
+            comissao_paga=comissao_paga
+        )
+
+        return jsonify({
+            'total_vendas': int(base.quantidade.sum()),
+            'cenarios': base.simular(cenarios)
+        }), 200
+
+    except ValueError as e:
+        # Datas fora do formato AAAA-MM-DD
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
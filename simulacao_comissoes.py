@@ -0,0 +1,152 @@
+"""
+Simulação de comissões com outras porcentagens por tabela (nome_tabela).
+
+A comissão de uma venda é valor_venda * porcentagem / 100, então a comissão
+simulada de todas as vendas de uma configuração de comissão depende apenas da
+soma de valor_venda dessas vendas. Essas somas vêm da tabela `resumo_vendas`
+(uma linha por dia e configuração, não por venda), e os cenários são
+aplicados de uma vez sobre esses vetores com NumPy: uma matriz
+cenários x configurações, somada por tabela e por vendedor com bincount.
+"""
+from sqlalchemy import func
+from src.models.user import db
+from src.models.resumo_venda import ResumoVendas
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+
+# Dependência opcional, usada apenas na simulação: carregada na primeira simulação
+np = None
+
+def carregar_numpy():
+    """Importa o NumPy sob demanda; retorna False se ele não estiver instalado"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+MAX_CENARIOS = 20
+
+def nomes_tabela_cadastrados():
+    """Nomes de tabela das configurações de comissão, com ou sem vendas no período simulado"""
+    return {nome_tabela for nome_tabela, in db.session.query(VendedorComissao.nome_tabela).distinct()}
+
+class BaseSimulacao:
+    """Totais das vendas por configuração de comissão, em vetores alinhados"""
+
+    def __init__(self, linhas):
+        (self.ids_configuracao, ids_vendedor, nomes_vendedor, nomes_tabela,
+         porcentagens, quantidades, valores, comissoes) = zip(*linhas) if linhas else ((),) * 8
+
+        self.porcentagem_atual = np.array(porcentagens, dtype=np.float64)
+        self.quantidade = np.array(quantidades, dtype=np.int64)
+        self.valor_vendas = np.array(valores, dtype=np.float64)
+        self.comissao_atual = np.array(comissoes, dtype=np.float64)
+
+        # Índice de cada configuração na lista de tabelas (por nome) e na de vendedores
+        self.nomes_tabela, self.indice_tabela = np.unique(np.array(nomes_tabela, dtype=object).astype(str), return_inverse=True)
+        self.ids_vendedor, self.indice_vendedor = np.unique(np.array(ids_vendedor, dtype=np.int64), return_inverse=True)
+        self.nomes_vendedor = dict(zip(ids_vendedor, nomes_vendedor))
+
+    @classmethod
+    def carregar(cls, data_inicio=None, data_fim=None, comissao_paga=None):
+        # Somas por configuração lidas do resumo diário, que já tem os totais de pagas e pendentes
+        if comissao_paga is True:
+            quantidade, valor, comissao = ResumoVendas.vendas_pagas, ResumoVendas.valor_vendas_pagas, ResumoVendas.valor_comissoes_pagas
+        elif comissao_paga is False:
+            quantidade = ResumoVendas.total_vendas - ResumoVendas.vendas_pagas
+            valor = ResumoVendas.valor_vendas - ResumoVendas.valor_vendas_pagas
+            comissao = ResumoVendas.valor_comissoes - ResumoVendas.valor_comissoes_pagas
+        else:
+            quantidade, valor, comissao = ResumoVendas.total_vendas, ResumoVendas.valor_vendas, ResumoVendas.valor_comissoes
+
+        query = db.session.query(
+            VendedorComissao.id,
+            VendedorComissao.id_vendedor,
+            Vendedor.nome_vendedor,
+            VendedorComissao.nome_tabela,
+            VendedorComissao.porcentagem_comissao,
+            func.sum(quantidade),
+            func.sum(valor),
+            func.sum(comissao)
+        ).join(ResumoVendas, ResumoVendas.id_vendedor_comissao == VendedorComissao.id) \
+            .join(Vendedor, VendedorComissao.id_vendedor == Vendedor.id)
+
+        if data_inicio:
+            query = query.filter(ResumoVendas.data_venda >= data_inicio)
+        if data_fim:
+            query = query.filter(ResumoVendas.data_venda <= data_fim)
+
+        # Todas as colunas não agregadas no GROUP BY (o PostgreSQL exige; o SQLite aceita só o id)
+        query = query.group_by(
+            VendedorComissao.id,
+            VendedorComissao.id_vendedor,
+            Vendedor.nome_vendedor,
+            VendedorComissao.nome_tabela,
+            VendedorComissao.porcentagem_comissao
+        )
+        return cls(query.order_by(VendedorComissao.id).all())
+
+    def simular(self, cenarios):
+        """
+        Aplica os cenários [(nome, {nome_tabela: porcentagem}), ...].
+
+        Tabelas fora do mapa de um cenário mantêm a porcentagem atual.
+        """
+        # Porcentagem de cada cenário por nome de tabela; NaN = manter a atual
+        novas = np.full((len(cenarios), len(self.nomes_tabela)), np.nan)
+        posicao = {nome: i for i, nome in enumerate(self.nomes_tabela)}
+        for i, (_, porcentagens) in enumerate(cenarios):
+            for nome_tabela, porcentagem in porcentagens.items():
+                if nome_tabela in posicao:
+                    novas[i, posicao[nome_tabela]] = porcentagem
+
+        # Matriz cenários x configurações com a porcentagem e a comissão simuladas
+        por_configuracao = novas[:, self.indice_tabela]
+        porcentagem = np.where(np.isnan(por_configuracao), self.porcentagem_atual, por_configuracao)
+        comissao_simulada = self.valor_vendas * (porcentagem / 100)
+
+        atual_tabela = np.bincount(self.indice_tabela, weights=self.comissao_atual, minlength=len(self.nomes_tabela))
+        atual_vendedor = np.bincount(self.indice_vendedor, weights=self.comissao_atual, minlength=len(self.ids_vendedor))
+        quantidade_tabela = np.bincount(self.indice_tabela, weights=self.quantidade, minlength=len(self.nomes_tabela))
+        valor_tabela = np.bincount(self.indice_tabela, weights=self.valor_vendas, minlength=len(self.nomes_tabela))
+
+        resultados = []
+        for i, (nome, _) in enumerate(cenarios):
+            simulada_tabela = np.bincount(self.indice_tabela, weights=comissao_simulada[i], minlength=len(self.nomes_tabela))
+            simulada_vendedor = np.bincount(self.indice_vendedor, weights=comissao_simulada[i], minlength=len(self.ids_vendedor))
+            total_atual = float(self.comissao_atual.sum())
+            total_simulado = float(comissao_simulada[i].sum())
+
+            resultados.append({
+                'nome': nome,
+                'comissao_atual': round(total_atual, 2),
+                'comissao_simulada': round(total_simulado, 2),
+                'delta': round(total_simulado - total_atual, 2),
+                'por_tabela': [
+                    {
+                        'nome_tabela': str(nome_tabela),
+                        'total_vendas': int(quantidade_tabela[j]),
+                        'valor_vendas': round(float(valor_tabela[j]), 2),
+                        'comissao_atual': round(float(atual_tabela[j]), 2),
+                        'comissao_simulada': round(float(simulada_tabela[j]), 2),
+                        'delta': round(float(simulada_tabela[j] - atual_tabela[j]), 2)
+                    }
+                    for j, nome_tabela in enumerate(self.nomes_tabela)
+                ],
+                'por_vendedor': [
+                    {
+                        'id_vendedor': int(id_vendedor),
+                        'nome_vendedor': self.nomes_vendedor[int(id_vendedor)],
+                        'comissao_atual': round(float(atual_vendedor[j]), 2),
+                        'comissao_simulada': round(float(simulada_vendedor[j]), 2),
+                        'delta': round(float(simulada_vendedor[j] - atual_vendedor[j]), 2)
+                    }
+                    for j, id_vendedor in enumerate(self.ids_vendedor)
+                ]
+            })
+
+        return resultados
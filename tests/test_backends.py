@@ -0,0 +1,85 @@
+"""
+Fluxos de vendas que dependem do SQL gerado para cada banco (SQLite e PostgreSQL).
+"""
+import pytest
+from sqlalchemy import create_engine, inspect
+from src.models.user import db
+from src.models.venda import Venda
+from src.services.resumo_vendas import verificar_resumo
+
+def test_dashboard_totaliza_pelo_resumo(cliente, cabecalhos, vendas):
+    resposta = cliente.get('/api/auth/dashboard', headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['estatisticas'] == {
+        'total_vendas': 4,
+        'total_valor_vendas': 2100.0,
+        'total_comissoes': 190.0,
+        'comissoes_pagas': 50.0,
+        'comissoes_pendentes': 140.0
+    }
+    assert [venda['data_venda'] for venda in dados['vendas']] == ['2025-04-02', '2025-03-15', '2025-03-01', '2025-03-01']
+
+def test_dashboard_filtra_periodo_e_pagamento(cliente, cabecalhos, vendas):
+    resposta = cliente.get('/api/auth/dashboard?data_inicio=2025-03-01&data_fim=2025-03-31&comissao_paga=false',
+                           headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 200
+    estatisticas = resposta.get_json()['estatisticas']
+    assert estatisticas['total_vendas'] == 2
+    assert estatisticas['total_comissoes'] == pytest.approx(120.0)
+
+def test_pagamento_em_lote_mantem_resumo(cliente, cabecalhos, vendedores, vendas):
+    _, vendedor, _, _ = vendedores
+    resposta = cliente.post('/api/vendas/comissoes/pagar', json={'id_vendedor': vendedor.id, 'tamanho_lote': 2},
+                            headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['vendas_pagas'] == 3
+    assert resposta.get_json()['valor_total_pago'] == pytest.approx(140.0)
+    assert db.session.query(Venda).filter(Venda.comissao_paga.is_(False)).count() == 0
+    assert verificar_resumo() == []
+
+def test_simulacao_por_tabela(cliente, cabecalhos, vendas):
+    pytest.importorskip('numpy')
+    resposta = cliente.post('/api/relatorio/simulacao-comissoes', json={'porcentagens': {'Gold': 20}},
+                            headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    cenario = resposta.get_json()['cenarios'][0]
+    assert cenario['comissao_atual'] == pytest.approx(190.0)
+    assert cenario['comissao_simulada'] == pytest.approx(360.0)
+    assert {tabela['nome_tabela']: tabela['delta'] for tabela in cenario['por_tabela']} == {'Gold': 170.0, 'Silver': 0.0}
+    assert [vendedor['nome_vendedor'] for vendedor in cenario['por_vendedor']] == ['Ana Silva']
+
+def test_exportacao_csv(cliente, cabecalhos, vendas):
+    resposta = cliente.get('/api/exportacao/vendas?formato=csv&gzip=false&data_inicio=2025-03-01&data_fim=2025-03-31',
+                           headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    linhas = resposta.get_data(as_text=True).strip().splitlines()
+    assert len(linhas) == 1 + 3  # Cabeçalho e as vendas de março
+
+def test_migracoes_em_banco_novo(url_banco, tmp_path):
+    from migrate import MIGRACOES, Migrador, metadata_migracoes
+
+    # O SQLite em memória some a cada conexão; o migrador precisa de um arquivo
+    url = f"sqlite:///{tmp_path / 'migracao.db'}" if url_banco.startswith('sqlite') else url_banco
+    engine = create_engine(url)
+    db.metadata.drop_all(engine)
+    metadata_migracoes.drop_all(engine)
+
+    migrador = Migrador(url)
+    try:
+        migrador.migrar()
+        assert set(migrador.aplicadas()) == {versao for versao, _, _ in MIGRACOES}
+        assert {'venda', 'vendedor_comissao', 'resumo_vendas'} <= set(inspect(migrador.engine).get_table_names())
+
+        # Rodar de novo não aplica nada
+        assert migrador.pendentes() == []
+    finally:
+        migrador.engine.dispose()
+        db.metadata.drop_all(engine)
+        metadata_migracoes.drop_all(engine)
+        engine.dispose()
@@ -0,0 +1,32 @@
+"""
+Invalidação do cache de tokens entre workers criados por fork.
+"""
+import multiprocessing
+import pytest
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.services.cache_tokens import obter_cache
+
+def _desativar_em_outro_worker(app, vendedor_id):
+    with app.app_context():
+        # Como no servidor.py, o worker não usa as conexões herdadas; o SQLite em memória só existe nelas
+        if db.engine.url.database not in (None, '', ':memory:'):
+            db.engine.dispose(close=False)
+        db.session.get(Vendedor, vendedor_id).ativo = False
+        db.session.commit()
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='requer fork')
+def test_alteracao_em_outro_worker_invalida_o_cache(app, cliente, vendedores, cabecalhos):
+    _, vendedor, _, _ = vendedores
+    cache = obter_cache(app)
+    assert cliente.get('/api/auth/dashboard', headers=cabecalhos['vendedor']).status_code == 200
+    token = cabecalhos['vendedor']['Authorization'].split(' ')[1]
+    assert cache.obter(token) is not None
+
+    processo = multiprocessing.get_context('fork').Process(target=_desativar_em_outro_worker, args=(app, vendedor.id))
+    processo.start()
+    processo.join(30)
+    assert processo.exitcode == 0
+
+    # O commit do outro processo não passou por este cache, mas a geração compartilhada mudou
+    assert cache.obter(token) is None
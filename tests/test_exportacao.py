@@ -0,0 +1,105 @@
+"""
+Exportação de vendas em streaming: CSV (com gzip negociado) e formatos colunares.
+"""
+import csv
+import gzip
+import io
+import sys
+from datetime import date
+import pytest
+from src.routes import exportacao
+
+URL = '/api/exportacao/vendas'
+
+def linhas_csv(dados):
+    return list(csv.reader(io.StringIO(dados.decode('utf-8'))))
+
+def test_csv_compactado_quando_o_cliente_aceita_gzip(cliente, cabecalhos, vendas, monkeypatch):
+    # Pedaços pequenos: a resposta sai em vários blocos, cada um compactado à medida que é gerado
+    monkeypatch.setattr(exportacao, 'TAMANHO_PEDACO_RESPOSTA', 16)
+    cabecalhos_gzip = dict(cabecalhos['admin'], **{'Accept-Encoding': 'gzip, deflate'})
+    resposta = cliente.get(URL, query_string={'formato': 'csv'}, headers=cabecalhos_gzip)
+
+    assert resposta.status_code == 200
+    assert resposta.is_streamed
+    assert (resposta.headers['Content-Encoding'], resposta.headers['Vary']) == ('gzip', 'Accept-Encoding')
+    linhas = linhas_csv(gzip.decompress(resposta.get_data()))
+    assert linhas[0] == [cabecalho for _, cabecalho, _ in exportacao.COLUNAS_EXPORTACAO]
+    assert [linha[0] for linha in linhas[1:]] == [str(venda.id) for venda in (vendas[3], vendas[2], vendas[1], vendas[0])]
+    assert linhas[1][3:] == ['2025-04-02', '400.0', '20.0', 'Não', 'Ana Silva', 'Silver', '']
+
+@pytest.mark.parametrize('accept_encoding, parametros', [
+    ('', {}),
+    ('gzip', {'gzip': 'false'})
+])
+def test_csv_sem_gzip(cliente, cabecalhos, vendas, accept_encoding, parametros):
+    resposta = cliente.get(URL, query_string=dict(parametros, formato='csv'),
+                           headers=dict(cabecalhos['admin'], **{'Accept-Encoding': accept_encoding}))
+
+    assert resposta.status_code == 200
+    assert 'Content-Encoding' not in resposta.headers
+    assert len(linhas_csv(resposta.get_data())) == 1 + 4
+
+def test_vendedor_exporta_apenas_as_proprias_vendas(cliente, cabecalhos, vendedores, vendas):
+    admin, _, _, _ = vendedores
+    resposta = cliente.get(URL, query_string={'formato': 'csv', 'id_vendedor': admin.id}, headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 403
+
+@pytest.mark.parametrize('parametros', [{'formato': 'pdf'}, {'data_inicio': '01/03/2025'}])
+def test_parametros_invalidos_retornam_400(cliente, cabecalhos, vendas, parametros):
+    resposta = cliente.get(URL, query_string=parametros, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
+
+def test_xlsx_com_as_vendas_filtradas(cliente, cabecalhos, vendas):
+    openpyxl = pytest.importorskip('openpyxl')
+    resposta = cliente.get(URL, query_string={'formato': 'xlsx', 'data_inicio': '2025-03-02'}, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Disposition'] == 'attachment; filename=vendas_exportadas.xlsx'
+    linhas = list(openpyxl.load_workbook(io.BytesIO(resposta.get_data()))['Vendas'].iter_rows(values_only=True))
+    assert linhas[0] == tuple(cabecalho for _, cabecalho, _ in exportacao.COLUNAS_EXPORTACAO)
+    assert [(linha[0], linha[6], linha[8]) for linha in linhas[1:]] == [(vendas[3].id, 'Não', 'Silver'), (vendas[2].id, 'Não', 'Gold')]
+
+@pytest.mark.parametrize('formato, mimetype', [
+    ('parquet', 'application/vnd.apache.parquet'),
+    ('arrow', 'application/vnd.apache.arrow.stream')
+])
+def test_formatos_colunares_preservam_os_tipos(cliente, cabecalhos, vendas, monkeypatch, formato, mimetype):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    # Grupos de duas linhas: o arquivo é escrito e enviado um grupo por vez
+    monkeypatch.setattr(exportacao, 'TAMANHO_GRUPO_COLUNAR', 2)
+    resposta = cliente.get(URL, query_string={'formato': formato, 'comissao_paga': 'false'}, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == mimetype
+    dados = resposta.get_data()
+    if formato == 'parquet':
+        arquivo = pq.ParquetFile(io.BytesIO(dados))
+        assert arquivo.metadata.num_row_groups == 2
+        tabela = arquivo.read()
+    else:
+        tabela = pa.ipc.open_stream(dados).read_all()
+
+    assert tabela.schema.field('data_venda').type == pa.date32()
+    assert tabela.schema.field('comissao_paga').type == pa.bool_()
+    assert tabela.column('id').to_pylist() == [vendas[3].id, vendas[2].id, vendas[0].id]
+    assert tabela.column('data_venda').to_pylist() == [date(2025, 4, 2), date(2025, 3, 15), date(2025, 3, 1)]
+    assert tabela.column('valor_comissao').to_pylist() == [20.0, 20.0, 100.0]
+    assert tabela.column('comissao_paga').to_pylist() == [False, False, False]
+
+@pytest.mark.parametrize('formato', ['parquet', 'arrow'])
+def test_formatos_colunares_sem_pyarrow_retornam_501(cliente, cabecalhos, vendas, monkeypatch, formato):
+    # Sem o pacote: o import falha como se ele não estivesse instalado
+    monkeypatch.setattr(exportacao, 'pa', None)
+    monkeypatch.setattr(exportacao, 'pq', None)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    monkeypatch.setitem(sys.modules, 'pyarrow.parquet', None)
+    resposta = cliente.get(URL, query_string={'formato': formato}, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 501
+    assert 'pyarrow' in resposta.get_json()['erro']
@@ -0,0 +1,365 @@
+"""
+Importação de vendas: leitores, validação, duplicadas, relatório de erros e jobs retomados.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import event
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.venda import Venda
+from src.models.importacao_job import ImportacaoJob
+from src.routes import importacao as rotas_importacao
+from src.services import importacao_pipeline
+from src.services.importacao_jobs import _processar_job
+from src.services.importacao_pipeline import validar_linhas, validar_linhas_paralelo
+from src.services.resumo_vendas import verificar_resumo
+
+CABECALHO = ['cpf_cliente', 'nome_cliente', 'data_venda', 'valor_venda', 'vendedor', 'tabela_comissao']
+
+def linha(i, valor=100.0, vendedor='Ana Silva', tabela='Gold', data='2025-05-01'):
+    return [f'{10000000000 + i * 7919:011d}', f'Cliente {i}', data, valor, vendedor, tabela]
+
+def gravar_csv(caminho, linhas, delimitador=','):
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=delimitador)
+        escritor.writerow(CABECALHO)
+        escritor.writerows(linhas)
+    return str(caminho)
+
+def gravar_xlsx(caminho, linhas):
+    openpyxl = pytest.importorskip('openpyxl')
+    wb = openpyxl.Workbook()
+    planilha = wb.active
+    planilha.append(CABECALHO)
+    for valores in linhas:
+        planilha.append(valores)
+    wb.save(caminho)
+    return str(caminho)
+
+def gravar_ndjson(caminho, linhas):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        for valores in linhas:
+            arquivo.write((valores if isinstance(valores, str) else json.dumps(dict(zip(CABECALHO, valores)))) + '\n')
+    return str(caminho)
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    """Diretório dos uploads e relatórios de erros da rota de importação"""
+    diretorio = tmp_path / 'temp'
+    diretorio.mkdir()
+    monkeypatch.setattr(rotas_importacao, '_temp_dir', lambda: str(diretorio))
+    return diretorio
+
+def importar(cliente, caminho, **campos):
+    with open(caminho, 'rb') as arquivo:
+        dados = {'arquivo': (arquivo, os.path.basename(caminho))}
+        dados.update({campo: str(valor) for campo, valor in campos.items()})
+        return cliente.post('/api/importacao/vendas', data=dados, content_type='multipart/form-data')
+
+class Queda(BaseException):
+    """Interrupção do processo (não é tratada como erro do job)"""
+
+def criar_job(caminho, **campos):
+    job = ImportacaoJob(id=uuid.uuid4().hex, nome_arquivo='vendas.csv', arquivo_path=caminho, tamanho_lote=2, **campos)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+def tornar_orfao(job_id):
+    # Heartbeat antigo: o job pode ser reivindicado de novo, como depois de um reinício
+    ImportacaoJob.query.filter_by(id=job_id).update({'data_atualizacao': datetime.utcnow() - timedelta(hours=1)})
+    db.session.commit()
+
+def test_job_retomado_nao_conta_linhas_duas_vezes(app, vendedores, tmp_path, monkeypatch):
+    # Linhas 2-6: três válidas e duas inválidas no fim, depois da última venda do último lote
+    linhas = [linha(1), linha(2), linha(3), linha(4, valor=-1), linha(5, valor='x')]
+    caminho = gravar_csv(tmp_path / 'vendas.csv', linhas)
+    job_id = criar_job(caminho)
+
+    # O processo cai depois de confirmar o último lote e antes de concluir o job
+    def cair(importacao):
+        raise Queda()
+
+    monkeypatch.setattr(importacao_pipeline.ImportacaoVendas, 'resumo', cair)
+    with pytest.raises(Queda):
+        _processar_job(app, job_id)
+    db.session.rollback()
+
+    # O checkpoint (linha 4) não cobre as linhas rejeitadas depois dele
+    job = db.session.get(ImportacaoJob, job_id)
+    assert (job.ultima_linha_confirmada, job.linhas_lidas, job.linhas_rejeitadas, job.vendas_inseridas) == (4, 3, 0, 3)
+
+    monkeypatch.undo()
+    tornar_orfao(job_id)
+    _processar_job(app, job_id)
+    db.session.expire_all()
+
+    job = db.session.get(ImportacaoJob, job_id)
+    assert job.status == 'concluido'
+    assert (job.linhas_lidas, job.linhas_rejeitadas, job.vendas_inseridas) == (5, 2, 3)
+    assert Venda.query.count() == 3
+
+def test_simulacao_retomada_recomeca_do_zero(app, vendedores, tmp_path):
+    caminho = gravar_csv(tmp_path / 'vendas.csv', [linha(1), linha(2, valor=0), linha(3)])
+    # Contadores salvos por uma execução anterior interrompida (a simulação não tem checkpoint)
+    job_id = criar_job(caminho, simular=True, linhas_lidas=2, linhas_rejeitadas=1)
+
+    _processar_job(app, job_id)
+    db.session.expire_all()
+
+    job = db.session.get(ImportacaoJob, job_id)
+    assert job.status == 'concluido'
+    assert (job.linhas_lidas, job.linhas_rejeitadas, job.vendas_inseridas) == (3, 1, 0)
+    assert Venda.query.count() == 0
+
+def test_importacao_xlsx_grava_vendas(cliente, vendedores, temp_dir, tmp_path):
+    _, _, gold, silver = vendedores
+    linhas = [
+        linha(1, valor=1000.0, data=datetime(2025, 5, 2)),
+        [None] * len(CABECALHO),  # Linha vazia no meio da planilha
+        linha(2, valor=200.0, tabela='Silver'),
+        linha(3, valor=-5)
+    ]
+    resposta = importar(cliente, gravar_xlsx(tmp_path / 'vendas.xlsx', linhas))
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['linhas_lidas'], dados['linhas_validas'], dados['erros_encontrados'], dados['vendas_criadas']) == (3, 2, 1, 2)
+    assert dados['detalhes']['erros'] == ['Linha 5: Valor da venda deve ser maior que zero']
+
+    vendas = Venda.query.order_by(Venda.id).all()
+    assert [(v.cpf_cliente, v.data_venda, v.valor_comissao, v.id_vendedor_comissao) for v in vendas] == [
+        ('100.000.079-19', date(2025, 5, 2), 100.0, gold.id),
+        ('100.000.158-38', date(2025, 5, 1), 10.0, silver.id)
+    ]
+    assert all(v.usuario_cadastro == 'Importação Excel' and v.fingerprint for v in vendas)
+    assert verificar_resumo() == []
+
+def test_resolvedor_ignora_caixa_e_espacos_e_agrupa_pares_desconhecidos(cliente, vendedores, temp_dir, tmp_path):
+    _, _, gold, _ = vendedores
+    linhas = [linha(1, vendedor='  ana   SILVA ', tabela='gold'), linha(2, vendedor='Bruno'), linha(3, vendedor='Bruno'),
+              linha(4, tabela='Platinum')]
+    resposta = importar(cliente, gravar_csv(tmp_path / 'vendas.csv', linhas))
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['vendas_criadas'], dados['erros_encontrados']) == (1, 3)
+    assert dados['pares_nao_encontrados'] == [
+        {'vendedor': 'Bruno', 'tabela': 'Gold', 'ocorrencias': 2, 'linhas': [3, 4]},
+        {'vendedor': 'Ana Silva', 'tabela': 'Platinum', 'ocorrencias': 1, 'linhas': [5]}
+    ]
+    assert Venda.query.one().id_vendedor_comissao == gold.id
+
+def test_pares_ambiguos_sao_rejeitados(cliente, vendedores, temp_dir, tmp_path):
+    _, vendedor, _, silver = vendedores
+    # Outro vendedor cujo nome só difere em maiúsculas e espaços, e uma tabela "GOLD " da própria Ana
+    homonimo = Vendedor(nome_vendedor='ANA  silva', email='ana.silva@exemplo.com')
+    db.session.add(homonimo)
+    db.session.flush()
+    db.session.add_all([
+        VendedorComissao(id_vendedor=homonimo.id, nome_tabela='Gold', porcentagem_comissao=3),
+        VendedorComissao(id_vendedor=vendedor.id, nome_tabela='GOLD ', porcentagem_comissao=7)
+    ])
+    db.session.commit()
+
+    linhas = [linha(1), linha(2, tabela='Silver'), linha(3, vendedor='ana silva', tabela='gold')]
+    resposta = importar(cliente, gravar_csv(tmp_path / 'vendas.csv', linhas), formato_relatorio='csv')
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['vendas_criadas'], dados['erros_encontrados']) == (1, 2)
+    assert dados['pares_nao_encontrados'] == []
+    assert [(par['vendedor'], par['tabela'], par['linhas']) for par in dados['pares_ambiguos']] == [
+        ('Ana Silva', 'Gold', [2]), ('ana silva', 'gold', [4])
+    ]
+    assert dados['detalhes']['erros'][0] == \
+        'Vendedor "Ana Silva" com tabela "Gold" é ambíguo (3 configurações de comissão com esse nome) (linhas 2)'
+    assert Venda.query.one().id_vendedor_comissao == silver.id
+
+def test_falha_num_lote_preserva_os_anteriores_e_permite_retomar(cliente, vendedores, temp_dir, tmp_path, monkeypatch):
+    caminho = gravar_csv(tmp_path / 'vendas.csv', [linha(i) for i in range(1, 6)])
+    aplicar = importacao_pipeline.DeltasResumo.aplicar
+    chamadas = []
+
+    # O segundo lote (linhas 4 e 5) falha dentro da transação
+    def aplicar_com_falha(deltas, conexao):
+        chamadas.append(1)
+        if len(chamadas) == 2:
+            raise RuntimeError('disco cheio')
+        return aplicar(deltas, conexao)
+
+    monkeypatch.setattr(importacao_pipeline.DeltasResumo, 'aplicar', aplicar_com_falha)
+    resposta = importar(cliente, caminho, tamanho_lote=2)
+
+    assert resposta.status_code == 500
+    assert {chave: resposta.get_json()[chave] for chave in ('vendas_criadas', 'ultima_linha_confirmada', 'retomar_apos_linha')} == \
+        {'vendas_criadas': 2, 'ultima_linha_confirmada': 3, 'retomar_apos_linha': 3}
+    assert Venda.query.count() == 2
+
+    monkeypatch.setattr(importacao_pipeline.DeltasResumo, 'aplicar', aplicar)
+    resposta = importar(cliente, caminho, tamanho_lote=2, retomar_apos_linha=3)
+
+    assert resposta.status_code == 200
+    assert (resposta.get_json()['linhas_lidas'], resposta.get_json()['vendas_criadas']) == (3, 3)
+    assert resposta.get_json()['ultima_linha_confirmada'] == 6
+    assert Venda.query.count() == 5
+    assert verificar_resumo() == []
+
+# O NDJSON não tem cabeçalho: a segunda linha de dados é a linha 2 do arquivo
+@pytest.mark.parametrize('gravar, nome, linha_erro', [
+    (gravar_csv, 'vendas.csv', 3),
+    (lambda caminho, linhas: gravar_csv(caminho, linhas, delimitador=';'), 'vendas.csv', 3),
+    (gravar_ndjson, 'vendas.ndjson', 2),
+    (gravar_xlsx, 'vendas.xlsx', 3)
+], ids=['csv', 'csv-ponto-e-virgula', 'ndjson', 'xlsx'])
+def test_leitores_produzem_o_mesmo_resultado(cliente, vendedores, temp_dir, tmp_path, gravar, nome, linha_erro):
+    linhas = [linha(1, valor=150.5), linha(2, valor='abc'), linha(3, tabela='Silver', data='2025-06-30')]
+    resposta = importar(cliente, gravar(tmp_path / nome, linhas))
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['linhas_lidas'], dados['vendas_criadas']) == (3, 2)
+    assert dados['detalhes']['erros'] == [f'Linha {linha_erro}: Valor da venda inválido']
+    assert sorted((v.valor_venda, v.data_venda) for v in Venda.query) == [(100.0, date(2025, 6, 30)), (150.5, date(2025, 5, 1))]
+
+def test_ndjson_rejeita_linhas_que_nao_sao_objetos(cliente, vendedores, temp_dir, tmp_path):
+    caminho = gravar_ndjson(tmp_path / 'vendas.ndjson', [linha(1), '{"cpf_cliente": ', '[1, 2]', '', linha(2)])
+    resposta = importar(cliente, caminho)
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['vendas_criadas'] == 2
+    assert dados['detalhes']['erros'] == ['Linha 2: JSON inválido', 'Linha 3: Linha deve conter um objeto JSON']
+
+def test_colunas_faltantes_retornam_400(cliente, vendedores, temp_dir, tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    caminho.write_text('cpf_cliente,nome_cliente,valor_venda\n12345678909,Cliente,10\n', encoding='utf-8')
+    resposta = importar(cliente, str(caminho))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == 'Colunas obrigatórias faltantes: data_venda, vendedor, tabela_comissao'
+
+def test_validacao_paralela_mantem_a_ordem_das_linhas():
+    # Lotes pequenos para que vários fiquem em andamento ao mesmo tempo nos dois processos
+    linhas = [(numero, dict(zip(CABECALHO, linha(numero, valor=-1 if numero % 7 == 0 else 10.0)))) for numero in range(2, 42)]
+
+    resultados = list(validar_linhas_paralelo(iter(linhas), processos=2, tamanho_lote=3))
+
+    assert [row_num for row_num, _, _ in resultados] == list(range(2, 42))
+    assert resultados == list(validar_linhas(linhas))
+    assert [row_num for row_num, _, erro in resultados if erro] == [7, 14, 21, 28, 35]
+
+def test_reimportar_o_mesmo_arquivo_nao_duplica_vendas(cliente, vendedores, temp_dir, tmp_path):
+    caminho = gravar_csv(tmp_path / 'vendas.csv', [linha(1), linha(2), linha(3)])
+    assert importar(cliente, caminho).get_json()['vendas_criadas'] == 3
+
+    resposta = importar(cliente, caminho)
+
+    assert resposta.status_code == 200
+    assert (resposta.get_json()['vendas_criadas'], resposta.get_json()['vendas_duplicadas']) == (0, 3)
+    assert resposta.get_json()['detalhes']['vendas'] == []
+    assert Venda.query.count() == 3
+
+@pytest.mark.parametrize('politica, status, criadas, nomes', [
+    ('skip', 200, 1, ['Cliente 1', 'Cliente 2', 'Cliente 3']),
+    ('update', 200, 1, ['Cliente 1 (corrigido)', 'Cliente 2', 'Cliente 3 (repetida)']),
+    ('fail', 409, 0, ['Cliente 1', 'Cliente 2'])
+])
+def test_politicas_de_duplicadas(cliente, vendedores, temp_dir, tmp_path, politica, status, criadas, nomes):
+    importar(cliente, gravar_csv(tmp_path / 'primeira.csv', [linha(1), linha(2)]))
+
+    # Linha 2: venda já cadastrada com outro nome; linhas 3 e 4: a mesma venda nova duas vezes
+    corrigida, nova, repetida = linha(1), linha(3), linha(3)
+    corrigida[1], repetida[1] = 'Cliente 1 (corrigido)', 'Cliente 3 (repetida)'
+    resposta = importar(cliente, gravar_csv(tmp_path / 'segunda.csv', [corrigida, nova, repetida]), politica_duplicadas=politica)
+
+    assert resposta.status_code == status
+    dados = resposta.get_json()
+    assert dados['vendas_criadas'] == criadas
+    if politica == 'fail':
+        assert dados['linhas_duplicadas'] == [2, 4]
+    else:
+        assert dados['vendas_duplicadas'] == 2
+    assert [venda.nome_cliente for venda in Venda.query.order_by(Venda.id)] == nomes
+    assert verificar_resumo() == []
+
+@pytest.mark.parametrize('formato', ['csv', 'xlsx'])
+def test_simulacao_gera_relatorio_de_erros(cliente, vendedores, temp_dir, tmp_path, formato):
+    linhas = [linha(1), linha(2, valor=0), linha(3, vendedor='Bruno'), linha(4, data='01/05/2025')]
+    resposta = importar(cliente, gravar_csv(tmp_path / 'vendas.csv', linhas), simular='true', formato_relatorio=formato)
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['simulacao'], dados['linhas_validas'], dados['erros_encontrados']) == (True, 1, 3)
+    assert 'vendas_criadas' not in dados
+    assert Venda.query.count() == 0
+
+    relatorio = dados['relatorio_erros']
+    assert (relatorio['formato'], relatorio['erros']) == (formato, 3)
+    download = cliente.get(relatorio['url'])
+    assert download.status_code == 200
+
+    if formato == 'xlsx':
+        openpyxl = pytest.importorskip('openpyxl')
+        planilha = openpyxl.load_workbook(io.BytesIO(download.data)).active
+        registros = [list(valores) for valores in planilha.iter_rows(values_only=True)]
+    else:
+        registros = [[int(numero) if numero.isdigit() else numero, erro]
+                     for numero, erro in csv.reader(io.StringIO(download.get_data(as_text=True).lstrip('\ufeff')), delimiter=';')]
+    assert registros == [
+        ['linha', 'erro'],
+        [3, 'Valor da venda deve ser maior que zero'],
+        [4, 'Vendedor "Bruno" com tabela "Gold" não encontrado'],
+        [5, 'Data inválida (use formato AAAA-MM-DD)']
+    ]
+
+def test_relatorio_inexistente_retorna_404(cliente, temp_dir):
+    assert cliente.get(f'/api/importacao/relatorios/{uuid.uuid4().hex}').status_code == 404
+    assert cliente.get('/api/importacao/relatorios/..%2Fvendas').status_code == 404
+
+@pytest.mark.parametrize('nome, mensagem', [
+    ('vendas.xls', 'Planilhas .xls (Excel 97-2003) não são suportadas; salve o arquivo como .xlsx'),
+    ('vendas.txt', 'Arquivo deve ser Excel (.xlsx), CSV (.csv) ou NDJSON (.ndjson)')
+])
+def test_extensao_nao_suportada_retorna_400(cliente, vendedores, temp_dir, tmp_path, nome, mensagem):
+    caminho = tmp_path / nome
+    caminho.write_bytes(b'\xd0\xcf\x11\xe0')
+    resposta = importar(cliente, str(caminho))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {'erro': mensagem}
+    assert os.listdir(temp_dir) == []
+
+def test_template_fica_em_cache_ate_o_catalogo_mudar(cliente, vendedores):
+    openpyxl = pytest.importorskip('openpyxl')
+    _, vendedor, _, _ = vendedores
+    primeiro = cliente.get('/api/importacao/template/download')
+    assert primeiro.status_code == 200
+
+    comandos = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        comandos.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        segundo = cliente.get('/api/importacao/template/download')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    # Mesma versão do catálogo: o template sai do cache, sem consultar o banco
+    assert segundo.data == primeiro.data
+    assert comandos == []
+
+    db.session.add(VendedorComissao(id_vendedor=vendedor.id, nome_tabela='Platinum', porcentagem_comissao=15))
+    db.session.commit()
+    terceiro = cliente.get('/api/importacao/template/download')
+
+    planilha = openpyxl.load_workbook(io.BytesIO(terceiro.data))['Vendedores_Disponíveis']
+    assert [linha[1] for linha in planilha.iter_rows(min_row=2, values_only=True)] == ['Gold', 'Silver', 'Platinum']
@@ -0,0 +1,55 @@
+"""
+Pagamento em lote de comissões: seleção por ids ou filtros e validação da entrada.
+"""
+import pytest
+from src.models.user import db
+from src.models.venda import Venda
+
+URL = '/api/vendas/comissoes/pagar'
+
+def pendentes():
+    return db.session.query(Venda).filter(Venda.comissao_paga.is_(False)).count()
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {'id_vendedor': 0},
+    {'id_vendedor': -3},
+    {'id_vendedor': True},
+    {'id_vendedor': '2'},
+    {'id_vendedor_comissao': 1.5},
+    {'data_inicio': ''},
+    {'data_fim': 20250301},
+    {'data_inicio': '01/03/2025'},
+    {'ids': [1, True]},
+    {'ids': []} | {'id_vendedor': 2},
+    [1, 2]
+])
+def test_filtro_vazio_ou_invalido_nao_paga_nada(cliente, cabecalhos, vendas, payload):
+    resposta = cliente.post(URL, json=payload, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
+    assert pendentes() == 3
+
+def test_pagamento_por_periodo(cliente, cabecalhos, vendas):
+    resposta = cliente.post(URL, json={'data_inicio': '2025-03-02', 'data_fim': '2025-03-31'}, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['vendas_pagas'] == 1
+    assert resposta.get_json()['valor_total_pago'] == pytest.approx(20.0)
+    assert pendentes() == 2
+
+def test_pagamento_por_ids_ignora_ja_pagas(cliente, cabecalhos, vendas):
+    ids = [venda.id for venda in vendas[:2]]
+    resposta = cliente.post(URL, json={'ids': ids}, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['vendas_pagas'] == 1  # A segunda já estava paga
+    assert pendentes() == 2
+
+def test_pagamento_apenas_admin(cliente, cabecalhos, vendedores, vendas):
+    _, vendedor, _, _ = vendedores
+    resposta = cliente.post(URL, json={'id_vendedor': vendedor.id}, headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 403
+    assert pendentes() == 3
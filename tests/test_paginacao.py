@@ -0,0 +1,64 @@
+"""
+Paginação por cursor (keyset) da lista de vendas do dashboard.
+"""
+import base64
+import pytest
+from werkzeug.datastructures import MultiDict
+from src.services.paginacao import LIMITE_MAXIMO, LIMITE_PADRAO, parametros_paginacao
+
+URL = '/api/auth/dashboard'
+
+def pagina(cliente, cabecalhos, **parametros):
+    resposta = cliente.get(URL, query_string=parametros, headers=cabecalhos['vendedor'])
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    return [venda['id'] for venda in dados['vendas']], dados['next_cursor']
+
+def test_cursor_percorre_todas_as_vendas_sem_repetir(cliente, cabecalhos, vendas):
+    todas, ultimo = pagina(cliente, cabecalhos, limite=100)
+    assert ultimo is None
+
+    primeira, cursor = pagina(cliente, cabecalhos, limite=3)
+    segunda, fim = pagina(cliente, cabecalhos, limite=3, cursor=cursor)
+
+    assert cursor is not None and fim is None
+    assert primeira + segunda == todas
+    # Empate na data (duas vendas em 2025-03-01): o id desempata, em ordem decrescente
+    assert todas[2:] == [vendas[1].id, vendas[0].id]
+
+def test_cursor_respeita_os_filtros(cliente, cabecalhos, vendas):
+    primeira, cursor = pagina(cliente, cabecalhos, limite=1, comissao_paga='false')
+    segunda, fim = pagina(cliente, cabecalhos, limite=5, comissao_paga='false', cursor=cursor)
+
+    assert primeira + segunda == [vendas[3].id, vendas[2].id, vendas[0].id]
+    assert fim is None
+
+@pytest.mark.parametrize('cursor', [
+    'nao-e-um-cursor',
+    base64.urlsafe_b64encode(b'[1, 2, 3]').decode(),
+    base64.urlsafe_b64encode(b'["2025-13-01", 1]').decode(),
+    base64.urlsafe_b64encode(b'{"id": 1}').decode()
+])
+def test_cursor_invalido_retorna_400(cliente, cabecalhos, vendas, cursor):
+    resposta = cliente.get(URL, query_string={'cursor': cursor}, headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {'erro': 'Cursor inválido'}
+
+def test_limite_minimo_de_uma_venda(cliente, cabecalhos, vendas):
+    ids, cursor = pagina(cliente, cabecalhos, limite=0)
+
+    assert len(ids) == 1
+    assert cursor is not None
+
+@pytest.mark.parametrize('limite, esperado', [
+    (None, LIMITE_PADRAO),
+    ('abc', LIMITE_PADRAO),
+    ('-5', 1),
+    ('20', 20),
+    (str(LIMITE_MAXIMO * 10), LIMITE_MAXIMO)
+])
+def test_limite_fica_entre_um_e_o_maximo(limite, esperado):
+    args = MultiDict({} if limite is None else {'limite': limite})
+
+    assert parametros_paginacao(args) == (None, esperado)
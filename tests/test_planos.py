@@ -0,0 +1,151 @@
+"""
+Planos de execução das consultas mais usadas: nenhuma percorre inteira uma tabela grande.
+
+Faz as requisições de listagem, relatório, exportação e dashboard com o test
+client, captura cada SELECT gerado e roda EXPLAIN QUERY PLAN sobre ele.
+Serve de teste de regressão dos índices do migrate.py (só no SQLite).
+"""
+import re
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event, insert, text
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.venda import Venda
+from src.services.importacao_pipeline import GravadorVendas, ResolvedorComissoes
+from src.services.resumo_vendas import reconstruir_resumo
+
+# Tabelas que crescem com as vendas: percorrê-las inteiras numa consulta quente é regressão
+TABELAS_GRANDES = ('venda', 'vendedor_comissao', 'resumo_vendas')
+
+DATA_INICIO, DATA_FIM = '2025-03-01', '2025-03-31'
+
+# (perfil, url, tabelas que a consulta pode percorrer inteiras)
+ENDPOINTS = [
+    ('admin', '/api/vendas', ()),
+    ('admin', '/api/vendas?id_vendedor={id_vendedor}&data_inicio={data_inicio}&data_fim={data_fim}', ()),
+    ('admin', '/api/vendas?comissao_paga=false', ()),
+    ('vendedor', '/api/vendas', ()),
+    ('admin', '/api/relatorio/vendas?id_vendedor={id_vendedor}', ()),
+    ('admin', '/api/relatorio/vendas?data_inicio={data_inicio}&data_fim={data_fim}&comissao_paga=false', ()),
+    ('admin', '/api/exportacao/vendas?formato=csv&id_vendedor={id_vendedor}&data_inicio={data_inicio}&data_fim={data_fim}', ()),
+    ('admin', '/api/exportacao/vendas?formato=csv&comissao_paga=false', ()),
+    ('vendedor', '/api/auth/dashboard', ()),
+    ('vendedor', '/api/auth/dashboard?data_inicio={data_inicio}&data_fim={data_fim}', ()),
+    ('vendedor', '/api/auth/dashboard?comissao_paga=true', ()),
+    # Todos os vendedores com todas as tabelas: com estatísticas o SQLite prefere ler vendedor_comissao inteira
+    ('admin', '/api/vendedores', ('vendedor_comissao',)),
+    ('admin', '/api/vendedores/{id_vendedor}', ()),
+]
+
+@pytest.fixture
+def sqlite_apenas(url_banco):
+    if not url_banco.startswith('sqlite'):
+        pytest.skip('EXPLAIN QUERY PLAN só existe no SQLite')
+
+@pytest.fixture
+def base_populada(sqlite_apenas, vendedores):
+    """Vinte vendedores a mais e alguns milhares de vendas, com as estatísticas do ANALYZE"""
+    _, _, gold, silver = vendedores
+    outros = [Vendedor(nome_vendedor=f'Vendedor {i}', email=f'vendedor{i}@exemplo.com') for i in range(20)]
+    db.session.add_all(outros)
+    db.session.flush()
+    comissoes = [gold, silver] + [
+        VendedorComissao(id_vendedor=vendedor.id, nome_tabela=nome_tabela, porcentagem_comissao=porcentagem)
+        for vendedor in outros for nome_tabela, porcentagem in (('Gold', 10), ('Silver', 5))
+    ]
+    db.session.add_all(comissoes)
+    db.session.flush()
+
+    linhas = []
+    for i in range(4000):
+        comissao = comissoes[i % len(comissoes)]
+        valor_venda = 100.0 + i % 50
+        linhas.append({
+            'cpf_cliente': f'000.000.{i // 100:03d}-{i % 100:02d}', 'nome_cliente': f'Cliente {i}',
+            'data_venda': date(2025, 1, 1) + timedelta(days=i % 180), 'valor_venda': valor_venda,
+            'valor_comissao': Venda.calcular_valor_comissao(valor_venda, comissao.porcentagem_comissao),
+            'comissao_paga': i % 3 == 0, 'id_vendedor_comissao': comissao.id, 'fingerprint': f'{i:064d}'
+        })
+    db.session.execute(insert(Venda), linhas)
+    db.session.commit()
+    reconstruir_resumo()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+def _tabelas_por_alias(sql):
+    """Alias -> tabela dos FROM/JOIN da consulta (o plano mostra o alias)"""
+    aliases = {}
+    for tabela, alias in re.findall(r'(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+AS\s+"?(\w+)"?)?', sql, re.IGNORECASE):
+        aliases[alias or tabela] = tabela
+    return aliases
+
+def analisar_plano(conexao, sql, parametros, permitidas):
+    """Retorna (plano, varreduras): as linhas do EXPLAIN QUERY PLAN e as tabelas grandes percorridas sem índice"""
+    plano = [linha[3] for linha in conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parametros)]
+    aliases = _tabelas_por_alias(sql)
+
+    # Sem WHERE a consulta pede a tabela inteira (ex.: exportar tudo); a varredura é esperada
+    varreduras = []
+    if not re.search(r'\bWHERE\b', sql, re.IGNORECASE):
+        return plano, varreduras
+
+    for detalhe in plano:
+        encontrado = re.match(r'SCAN (\w+)$', detalhe)
+        if encontrado:
+            tabela = aliases.get(encontrado.group(1), encontrado.group(1))
+            if tabela in TABELAS_GRANDES and tabela not in permitidas:
+                varreduras.append(tabela)
+
+    return plano, varreduras
+
+class CapturaSQL:
+    """Guarda os SELECTs executados enquanto ativa"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.consultas = []
+
+    def _capturar(self, conexao, cursor, sql, parametros, contexto, executemany):
+        if not executemany and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.consultas.append((sql, parametros))
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._capturar)
+        return self
+
+    def __exit__(self, *excecao):
+        event.remove(self.engine, 'before_cursor_execute', self._capturar)
+
+def varreduras_das_consultas(consultas, permitidas):
+    """Consultas que percorrem inteira alguma tabela grande, com o plano de cada uma"""
+    problemas = []
+    with db.engine.connect() as conexao:
+        for sql, parametros in consultas:
+            plano, varreduras = analisar_plano(conexao, sql, parametros, permitidas)
+            if varreduras:
+                problemas.append((' '.join(sql.split()), plano))
+    return problemas
+
+@pytest.mark.parametrize('perfil, url, permitidas', ENDPOINTS, ids=[url.split('?')[0] for _, url, _ in ENDPOINTS])
+def test_endpoint_usa_indices(cliente, vendedores, cabecalhos, base_populada, perfil, url, permitidas):
+    _, vendedor, _, _ = vendedores
+    url = url.format(id_vendedor=vendedor.id, data_inicio=DATA_INICIO, data_fim=DATA_FIM)
+    db.session.remove()
+
+    with CapturaSQL(db.engine) as captura:
+        resposta = cliente.get(url, headers=cabecalhos[perfil])
+        resposta.get_data()  # Consome respostas em streaming (exportação)
+
+    assert resposta.status_code == 200
+    assert captura.consultas
+    assert varreduras_das_consultas(captura.consultas, permitidas) == []
+
+def test_importacao_usa_indices(base_populada):
+    with CapturaSQL(db.engine) as captura:
+        ResolvedorComissoes()
+        GravadorVendas._fingerprints_existentes([Venda.gerar_fingerprint('000.000.000-00', None, 0, 0)])
+
+    assert captura.consultas
+    assert varreduras_das_consultas(captura.consultas, ()) == []
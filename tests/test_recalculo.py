@@ -0,0 +1,134 @@
+"""
+Recálculo das comissões por faixas de id quando a porcentagem de uma tabela muda.
+"""
+import uuid
+import pytest
+from sqlalchemy import event
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.recalculo_job import RecalculoComissaoJob
+from src.services import recalculo_comissoes
+from src.services.resumo_vendas import verificar_resumo
+
+class ExecutorEmFila:
+    """Substitui o pool de threads: as tarefas rodam quando o teste pede, na ordem em que chegaram"""
+
+    def __init__(self):
+        self.tarefas = []
+
+    def submit(self, funcao, *args):
+        self.tarefas.append((funcao, args))
+
+    def executar(self):
+        while self.tarefas:
+            funcao, args = self.tarefas.pop(0)
+            funcao(*args)
+        db.session.expire_all()
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ExecutorEmFila()
+    monkeypatch.setattr(recalculo_comissoes, '_obter_executor', lambda app: executor)
+    return executor
+
+def alterar_porcentagem_sem_eventos(comissao, porcentagem):
+    # UPDATE em massa: não passa pelos eventos do ORM, então nenhum recálculo é enfileirado
+    VendedorComissao.query.filter_by(id=comissao.id).update({'porcentagem_comissao': porcentagem})
+    db.session.commit()
+
+def comissoes(vendas):
+    return [db.session.get(Venda, venda.id).valor_comissao for venda in vendas]
+
+def test_recalculo_por_faixas_de_id(cliente, cabecalhos, vendedores, vendas, executor):
+    _, _, gold, _ = vendedores
+    alterar_porcentagem_sem_eventos(gold, 20)
+    comandos = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        if sql.lstrip().upper().startswith('UPDATE VENDA '):
+            comandos.append(sql)
+
+    resposta = cliente.post(f'/api/vendedores/comissoes/{gold.id}/recalcular', json={'tamanho_lote': 1}, headers=cabecalhos['admin'])
+    assert resposta.status_code == 202
+    job_id = resposta.get_json()['job']['id']
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        executor.executar()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    # Duas vendas pendentes na Gold, uma faixa (e um UPDATE) para cada; a venda paga não muda
+    assert len(comandos) == 2
+    assert comissoes(vendas) == [200.0, 50.0, 40.0, 20.0]
+    job = db.session.get(RecalculoComissaoJob, job_id)
+    assert (job.status, job.total_vendas, job.vendas_processadas, job.vendas_atualizadas) == ('concluido', 2, 2, 2)
+    assert job.ultimo_id_processado == vendas[2].id
+    assert verificar_resumo() == []
+
+    resposta = cliente.get(f'/api/vendedores/comissoes/recalculos/{job_id}', headers=cabecalhos['admin'])
+    assert resposta.status_code == 200
+    assert resposta.get_json()['progresso']['percentual'] == 100.0
+
+def test_recalculo_retomado_a_partir_do_checkpoint(app, vendedores, vendas):
+    _, _, gold, _ = vendedores
+    alterar_porcentagem_sem_eventos(gold, 20)
+    # Job interrompido depois de confirmar a faixa até a primeira venda pendente
+    job = RecalculoComissaoJob(id=uuid.uuid4().hex, id_vendedor_comissao=gold.id, tamanho_lote=1, total_vendas=2,
+                               porcentagem_comissao=20, vendas_processadas=1, vendas_atualizadas=1,
+                               ultimo_id_processado=vendas[0].id)
+    db.session.add(job)
+    db.session.commit()
+
+    recalculo_comissoes._processar_job(app, job.id)
+    db.session.expire_all()
+
+    # A venda antes do checkpoint não é revisitada
+    assert comissoes(vendas[:3]) == [100.0, 50.0, 40.0]
+    assert (job.status, job.vendas_processadas, job.vendas_atualizadas) == ('concluido', 2, 2)
+
+def test_alterar_porcentagem_enfileira_recalculo(app, vendedores, vendas, executor):
+    _, _, gold, silver = vendedores
+    silver.nome_tabela = 'Prata'
+    db.session.commit()
+    assert executor.tarefas == []
+
+    gold.porcentagem_comissao = 15
+    db.session.commit()
+    assert len(executor.tarefas) == 1
+
+    executor.executar()
+
+    job = RecalculoComissaoJob.query.one()
+    assert (job.id_vendedor_comissao, job.status, job.porcentagem_comissao) == (gold.id, 'concluido', 15)
+    assert comissoes(vendas) == [150.0, 50.0, 30.0, 20.0]
+
+def test_porcentagem_desfeita_nao_enfileira(app, vendedores, executor):
+    _, _, gold, _ = vendedores
+    gold.porcentagem_comissao = 15
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert executor.tarefas == []
+
+@pytest.mark.parametrize('metodo, url', [
+    ('post', '/api/vendedores/comissoes/{id}/recalcular'),
+    ('get', '/api/vendedores/comissoes/recalculos/{job}')
+])
+def test_recalculo_apenas_admin(cliente, cabecalhos, vendedores, executor, metodo, url):
+    _, _, gold, _ = vendedores
+    resposta = getattr(cliente, metodo)(url.format(id=gold.id, job=uuid.uuid4().hex), headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 403
+    assert executor.tarefas == []
+    assert RecalculoComissaoJob.query.count() == 0
+
+@pytest.mark.parametrize('payload', [{'tamanho_lote': 0}, {'apenas_pendentes': 'sim'}, {'data_inicio': '2025-04-01', 'data_fim': '2025-03-01'}])
+def test_parametros_invalidos_retornam_400(cliente, cabecalhos, vendedores, executor, payload):
+    _, _, gold, _ = vendedores
+    resposta = cliente.post(f'/api/vendedores/comissoes/{gold.id}/recalcular', json=payload, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 400
+    assert RecalculoComissaoJob.query.count() == 0
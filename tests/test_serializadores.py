@@ -0,0 +1,78 @@
+"""
+Número de consultas das listagens: fixo, qualquer que seja a quantidade de itens.
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event
+from src.models.user import db
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+from src.models.venda import Venda
+from src.services.serializadores import serializar_vendedores
+
+@contextmanager
+def contar_consultas():
+    """Lista dos comandos SQL executados no engine enquanto ativo"""
+    comandos = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        comandos.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+def criar_vendedores(quantidade):
+    """Vendedores com duas tabelas de comissão cada"""
+    vendedores = [Vendedor(nome_vendedor=f'Vendedor {i}', email=f'vendedor{i}@exemplo.com') for i in range(quantidade)]
+    db.session.add_all(vendedores)
+    db.session.flush()
+
+    db.session.add_all([
+        VendedorComissao(id_vendedor=vendedor.id, nome_tabela=nome_tabela, porcentagem_comissao=porcentagem)
+        for vendedor in vendedores for nome_tabela, porcentagem in (('Gold', 10), ('Silver', 5))
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+def criar_vendas(comissoes, quantidade):
+    """`quantidade` vendas em cada configuração de comissão"""
+    for comissao in comissoes:
+        for i in range(quantidade):
+            venda = Venda(cpf_cliente=f'000.000.000-{i:02d}', nome_cliente=f'Cliente {i}',
+                          data_venda=date(2025, 1, 1) + timedelta(days=i), valor_venda=100.0 * (i + 1),
+                          vendedor_comissao=comissao)
+            db.session.add(venda)
+            venda.calcular_comissao()
+    db.session.commit()
+
+@pytest.mark.parametrize('quantidade', [1, 25])
+def test_serializar_vendedores_usa_duas_consultas(app, quantidade):
+    criar_vendedores(quantidade)
+
+    with contar_consultas() as comandos:
+        dados = serializar_vendedores(Vendedor.query)
+
+    assert len(dados) == quantidade
+    assert all(len(vendedor['comissoes']) == 2 for vendedor in dados)
+    # Vendedores e, num único SELECT ... IN, as comissões de todos eles
+    assert len(comandos) == 2
+
+@pytest.mark.parametrize('vendas_por_tabela', [1, 20])
+def test_dashboard_consultas_fixas(cliente, vendedores, cabecalhos, vendas_por_tabela):
+    _, _, gold, silver = vendedores
+    criar_vendas([gold, silver], vendas_por_tabela)
+    # A primeira requisição põe o token no cache; a contagem é a de uma requisição autenticada pelo cache
+    assert cliente.get('/api/auth/dashboard', headers=cabecalhos['vendedor']).status_code == 200
+    db.session.remove()
+
+    with contar_consultas() as comandos:
+        resposta = cliente.get('/api/auth/dashboard?limite=100', headers=cabecalhos['vendedor'])
+
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['vendas']) == 2 * vendas_por_tabela
+    # Totais pela tabela de resumo e a página de vendas com comissão e vendedor no mesmo SELECT
+    assert len(comandos) == 2
@@ -0,0 +1,38 @@
+"""
+Validação da entrada da simulação de comissões.
+"""
+import pytest
+
+URL = '/api/relatorio/simulacao-comissoes'
+
+@pytest.fixture(autouse=True)
+def numpy():
+    return pytest.importorskip('numpy')
+
+@pytest.mark.parametrize('payload', [
+    {'porcentagens': {'Gold': 20, 'Platinum': 5, 'Bronze': 1}},
+    {'cenarios': [{'porcentagens': {'Gold': 20}}, {'porcentagens': {'Bronze': 1, 'Platinum': 5}}]}
+])
+def test_tabela_desconhecida_retorna_400(cliente, cabecalhos, vendas, payload):
+    resposta = cliente.post(URL, json=payload, headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {
+        'erro': 'Tabelas de comissão desconhecidas: Bronze, Platinum',
+        'tabelas_desconhecidas': ['Bronze', 'Platinum']
+    }
+
+def test_tabela_sem_vendas_no_periodo_e_aceita(cliente, cabecalhos, vendas):
+    # A Silver existe, só não tem vendas em março
+    resposta = cliente.post(URL, json={'porcentagens': {'Silver': 8}, 'data_inicio': '2025-03-01', 'data_fim': '2025-03-31'},
+                            headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['cenarios'][0]['delta'] == 0.0
+
+@pytest.mark.parametrize('corpo', ['[{"porcentagens": {"Gold": 20}}]', '"porcentagens"', '42'])
+def test_corpo_que_nao_e_objeto_retorna_400(cliente, cabecalhos, vendas, corpo):
+    resposta = cliente.post(URL, data=corpo, content_type='application/json', headers=cabecalhos['admin'])
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {'erro': 'O corpo deve ser um objeto JSON'}
@@ -0,0 +1,47 @@
+"""
+GETs condicionais do catálogo: ETag por versão e 304 quando nada mudou.
+"""
+import pytest
+from src.models.user import db
+from src.services.versoes import etag_recurso
+
+@pytest.mark.parametrize('url', ['/api/vendedores', '/api/vendedores/{id_vendedor}'])
+def test_mesma_versao_responde_304(cliente, vendedores, url):
+    _, vendedor, _, _ = vendedores
+    url = url.format(id_vendedor=vendedor.id)
+    resposta = cliente.get(url)
+
+    assert resposta.status_code == 200
+    assert resposta.headers['Cache-Control'] == 'no-cache'
+    etag = resposta.headers['ETag']
+    assert etag == f'"{etag_recurso("vendedores")}"'
+
+    resposta = cliente.get(url, headers={'If-None-Match': etag})
+
+    assert resposta.status_code == 304
+    assert resposta.get_data() == b''
+    assert resposta.headers['ETag'] == etag
+
+def test_alteracao_de_vendedor_muda_o_etag(cliente, vendedores):
+    _, vendedor, _, _ = vendedores
+    etag = cliente.get('/api/vendedores').headers['ETag']
+
+    assert cliente.put(f'/api/vendedores/{vendedor.id}', json={'nome_vendedor': 'Ana Souza'}).status_code == 200
+    resposta = cliente.get('/api/vendedores', headers={'If-None-Match': etag})
+
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert 'Ana Souza' in [item['nome_vendedor'] for item in resposta.get_json()]
+
+def test_etag_muda_no_commit_da_comissao_e_nao_no_rollback(cliente, vendedores):
+    _, _, gold, _ = vendedores
+    etag = cliente.get('/api/vendedores').headers['ETag']
+
+    gold.nome_tabela = 'Gold Plus'
+    db.session.flush()
+    db.session.rollback()
+    assert cliente.get('/api/vendedores', headers={'If-None-Match': etag}).status_code == 304
+
+    gold.nome_tabela = 'Gold Plus'
+    db.session.commit()
+    assert cliente.get('/api/vendedores', headers={'If-None-Match': etag}).status_code == 200
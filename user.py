@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from src.services.banco import SessaoRoteada
 
-db = SQLAlchemy()
+# Sessão que envia as leituras das rotas somente leitura para a réplica (quando configurada)
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
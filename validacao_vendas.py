@@ -0,0 +1,104 @@
+"""
+Validação das linhas da importação de vendas.
+
+Módulo sem dependências da aplicação (Flask, SQLAlchemy, modelos): é o único
+que os processos da validação paralela importam, então eles iniciam rápido e
+sem estado herdado do processo da aplicação.
+"""
+from datetime import date, datetime
+
+# Chave usada pelos leitores para sinalizar uma linha que não pôde ser lida
+ERRO_LEITURA = '_erro_leitura'
+
+def validar_cpf(cpf):
+    """Validação básica de CPF (formato)"""
+    if not cpf:
+        return False
+
+    # Remover caracteres especiais
+    cpf_limpo = ''.join(filter(str.isdigit, str(cpf)))
+
+    # Verificar se tem 11 dígitos
+    if len(cpf_limpo) != 11:
+        return False
+
+    # Verificar se não são todos os dígitos iguais
+    if cpf_limpo == cpf_limpo[0] * 11:
+        return False
+
+    return True
+
+def formatar_cpf(cpf):
+    """Formatar CPF para o padrão XXX.XXX.XXX-XX"""
+    if not cpf:
+        return None
+
+    cpf_limpo = ''.join(filter(str.isdigit, str(cpf)))
+    if len(cpf_limpo) == 11:
+        return f"{cpf_limpo[:3]}.{cpf_limpo[3:6]}.{cpf_limpo[6:9]}-{cpf_limpo[9:]}"
+    return cpf
+
+def validar_linha(row_num, row_data):
+    """
+    Valida e normaliza uma linha da planilha.
+
+    Retorna (dados, None) quando a linha é válida ou (None, erro) com a
+    mensagem no formato "Linha N: ...".
+    """
+    if ERRO_LEITURA in row_data:
+        return None, f'Linha {row_num}: {row_data[ERRO_LEITURA]}'
+
+    # Validar dados obrigatórios
+    if not row_data.get('cpf_cliente') or not row_data.get('nome_cliente') or not row_data.get('valor_venda'):
+        return None, f'Linha {row_num}: Dados obrigatórios faltantes'
+
+    # Validar e formatar CPF
+    cpf = str(row_data['cpf_cliente']).strip()
+    if not validar_cpf(cpf):
+        return None, f'Linha {row_num}: CPF inválido ({cpf})'
+
+    # Validar valor da venda
+    try:
+        valor_venda = float(row_data['valor_venda'])
+    except (ValueError, TypeError):
+        return None, f'Linha {row_num}: Valor da venda inválido'
+
+    if valor_venda <= 0:
+        return None, f'Linha {row_num}: Valor da venda deve ser maior que zero'
+
+    # Processar data da venda
+    data_venda = None
+    if row_data.get('data_venda'):
+        valor_data = row_data['data_venda']
+        try:
+            if isinstance(valor_data, str):
+                data_venda = datetime.strptime(valor_data.strip(), '%Y-%m-%d').date()
+            elif isinstance(valor_data, datetime):
+                data_venda = valor_data.date()
+            elif isinstance(valor_data, date):
+                data_venda = valor_data
+            else:
+                # Números (célula XLSX sem formato de data, inteiro no NDJSON) e outros tipos
+                raise ValueError(valor_data)
+        except ValueError:
+            return None, f'Linha {row_num}: Data inválida (use formato AAAA-MM-DD)'
+
+    return {
+        'cpf_cliente': formatar_cpf(cpf),
+        'nome_cliente': str(row_data['nome_cliente']).strip(),
+        'data_venda': data_venda,
+        'valor_venda': valor_venda,
+        'nome_vendedor': str(row_data['vendedor']).strip(),
+        'nome_tabela': str(row_data['tabela_comissao']).strip(),
+        'usuario_cadastro': str(row_data.get('usuario_cadastro') or 'Importação Excel').strip()
+    }, None
+
+def _validar_linha_segura(row_num, row_data):
+    try:
+        return validar_linha(row_num, row_data)
+    except Exception as e:
+        return None, f'Linha {row_num}: Erro ao processar - {str(e)}'
+
+def validar_lote(lote):
+    """Valida um lote de linhas (executado nos processos da validação paralela)"""
+    return [(row_num,) + _validar_linha_segura(row_num, row_data) for row_num, row_data in lote]
@@ -1,7 +1,16 @@
+import hashlib
 from datetime import datetime
+from sqlalchemy import event, inspect
 from src.models.user import db
 
 class Venda(db.Model):
+    __table_args__ = (
+        db.Index('ix_venda_data_venda_id', 'data_venda', 'id'),  # Ordenação e cursor da paginação
+        db.Index('ix_venda_comissao_id', 'id_vendedor_comissao', 'id'),  # Faixas de id do recálculo de comissões
+        db.Index('ix_venda_comissao_data', 'id_vendedor_comissao', 'data_venda', 'id'),  # Vendas de um vendedor/tabela por período
+        db.Index('ix_venda_paga_data', 'comissao_paga', 'data_venda', 'id'),  # Comissões pagas ou pendentes por período
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     cpf_cliente = db.Column(db.String(14), nullable=False)  # CPF com máscara XXX.XXX.XXX-XX
     nome_cliente = db.Column(db.String(100), nullable=False)
@@ -11,17 +20,42 @@ class Venda(db.Model):
     comissao_paga = db.Column(db.Boolean, nullable=False, default=False)
     id_vendedor_comissao = db.Column(db.Integer, db.ForeignKey('vendedor_comissao.id'), nullable=False)
     usuario_cadastro = db.Column(db.String(100), nullable=True)  # Para controle de quem cadastrou
+    fingerprint = db.Column(db.String(64), nullable=True, unique=True, index=True)  # Identifica a mesma venda em reimportações
     
     def __repr__(self):
         return f'<Venda {self.id} - {self.nome_cliente}>'
 
+    @staticmethod
+    def calcular_valor_comissao(valor_venda, porcentagem_comissao):
+        """Calcula o valor da comissão de uma venda a partir da porcentagem"""
+        return valor_venda * (porcentagem_comissao / 100)
+
+    @staticmethod
+    def gerar_fingerprint(cpf_cliente, data_venda, valor_venda, id_vendedor_comissao):
+        """Impressão digital determinística da venda (CPF, data, valor e vendedor/tabela)"""
+        cpf = ''.join(c for c in str(cpf_cliente or '') if c.isdigit())
+        if isinstance(data_venda, datetime):
+            data_venda = data_venda.date()
+        data = data_venda.isoformat() if data_venda else ''
+        valor = f'{float(valor_venda):.2f}' if valor_venda is not None else ''
+        chave = f'{cpf}|{data}|{valor}|{id_vendedor_comissao}'
+        return hashlib.sha256(chave.encode('utf-8')).hexdigest()
+
+    def atualizar_fingerprint(self):
+        if self.data_venda is None:
+            self.data_venda = datetime.utcnow().date()
+        self.fingerprint = Venda.gerar_fingerprint(self.cpf_cliente, self.data_venda, self.valor_venda, self.id_vendedor_comissao)
+        return self.fingerprint
+
     def calcular_comissao(self):
         """Calcula o valor da comissão baseado na porcentagem da configuração de comissão"""
         if self.vendedor_comissao:
-            self.valor_comissao = self.valor_venda * (self.vendedor_comissao.porcentagem_comissao / 100)
+            self.valor_comissao = Venda.calcular_valor_comissao(self.valor_venda, self.vendedor_comissao.porcentagem_comissao)
         return self.valor_comissao
 
     def to_dict(self):
+        comissao = self.vendedor_comissao
+        vendedor = comissao.vendedor if comissao else None
         return {
             'id': self.id,
             'cpf_cliente': self.cpf_cliente,
@@ -31,9 +65,22 @@ class Venda(db.Model):
             'valor_comissao': self.valor_comissao,
             'comissao_paga': self.comissao_paga,
             'id_vendedor_comissao': self.id_vendedor_comissao,
-            'nome_vendedor': self.vendedor_comissao.vendedor.nome_vendedor if self.vendedor_comissao and self.vendedor_comissao.vendedor else None,
-            'nome_tabela': self.vendedor_comissao.nome_tabela if self.vendedor_comissao else None,
-            'porcentagem_comissao': self.vendedor_comissao.porcentagem_comissao if self.vendedor_comissao else None,
+            'nome_vendedor': vendedor.nome_vendedor if vendedor else None,
+            'nome_tabela': comissao.nome_tabela if comissao else None,
+            'porcentagem_comissao': comissao.porcentagem_comissao if comissao else None,
             'usuario_cadastro': self.usuario_cadastro
         }
 
+CAMPOS_FINGERPRINT = ('cpf_cliente', 'data_venda', 'valor_venda', 'id_vendedor_comissao')
+
+@event.listens_for(Venda, 'before_insert')
+def _fingerprint_ao_inserir(mapper, connection, target):
+    # Inserções em lote (insert(Venda) com executemany) não passam por aqui e calculam o fingerprint por conta própria
+    target.atualizar_fingerprint()
+
+@event.listens_for(Venda, 'before_update')
+def _fingerprint_ao_atualizar(mapper, connection, target):
+    # Só recalcula quando um dos campos da impressão digital mudou (ex.: marcar comissão paga não mexe nele)
+    estado = inspect(target)
+    if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_FINGERPRINT):
+        target.atualizar_fingerprint()
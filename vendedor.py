@@ -1,23 +1,26 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.vendedor import Vendedor
+from src.services.serializadores import serializar_vendedores, carregar_vendedores
+from src.services.versoes import resposta_condicional
 
 vendedor_bp = Blueprint('vendedor', __name__)
 
 @vendedor_bp.route('/vendedores', methods=['GET'])
+@resposta_condicional('vendedores')
 def listar_vendedores():
     """Lista todos os vendedores"""
     try:
-        vendedores = Vendedor.query.all()
-        return jsonify([vendedor.to_dict() for vendedor in vendedores]), 200
+        return jsonify(serializar_vendedores(Vendedor.query)), 200
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 @vendedor_bp.route('/vendedores/<int:id>', methods=['GET'])
+@resposta_condicional('vendedores')
 def obter_vendedor(id):
     """Obtém um vendedor específico"""
     try:
-        vendedor = Vendedor.query.get_or_404(id)
+        vendedor = carregar_vendedores(Vendedor.query).filter_by(id=id).first_or_404()
         return jsonify(vendedor.to_dict()), 200
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
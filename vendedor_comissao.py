@@ -2,7 +2,10 @@ from src.models.user import db
 
 class VendedorComissao(db.Model):
     __tablename__ = 'vendedor_comissao'
-    
+    __table_args__ = (
+        db.Index('ix_vendedor_comissao_vendedor_tabela', 'id_vendedor', 'nome_tabela'),  # Tabelas de um vendedor e busca por nome
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     id_vendedor = db.Column(db.Integer, db.ForeignKey('vendedor.id'), nullable=False)
     nome_tabela = db.Column(db.String(100), nullable=False)
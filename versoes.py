@@ -0,0 +1,89 @@
+"""
+Versões do catálogo (vendedores e configurações de comissão) para GETs condicionais.
+
+Cada modelo do catálogo tem um contador em memória incrementado após o commit
+de qualquer inserção, alteração ou exclusão. O ETag de um recurso é formado
+pelos contadores dos modelos que ele serializa, então um `If-None-Match` com
+o ETag atual é respondido com 304 sem consultar o banco.
+
+Os contadores ficam em memória compartilhada, criada na importação do
+módulo: os workers que o servidor cria por fork depois de carregar a
+aplicação (servidor.py) usam os mesmos contadores e o mesmo identificador,
+então uma alteração feita em um worker muda o ETag em todos. Processos
+iniciados separadamente têm contadores próprios, e o ETag inclui o
+identificador para que um ETag emitido por outro processo nunca seja aceito.
+"""
+import multiprocessing
+import uuid
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from src.models.vendedor import Vendedor
+from src.models.vendedor_comissao import VendedorComissao
+
+# Modelos cujo conteúdo aparece em cada recurso (Vendedor.to_dict inclui as comissões e vice-versa)
+RECURSOS = {
+    'vendedores': (Vendedor, VendedorComissao),
+    'comissoes': (VendedorComissao, Vendedor)
+}
+
+ID_PROCESSO = uuid.uuid4().hex[:12]
+
+# Posição de cada modelo no vetor de contadores compartilhado (com trava entre processos)
+_indices = {nome: i for i, nome in enumerate(sorted({modelo.__name__ for modelos in RECURSOS.values() for modelo in modelos}))}
+_versoes = multiprocessing.Array('q', len(_indices))
+
+def incrementar_versao(modelo):
+    with _versoes.get_lock():
+        _versoes[_indices[modelo.__name__]] += 1
+
+def etag_recurso(recurso):
+    with _versoes.get_lock():
+        versao = '.'.join(str(_versoes[_indices[modelo.__name__]]) for modelo in RECURSOS[recurso])
+    return f'{recurso}-{ID_PROCESSO}-{versao}'
+
+def resposta_condicional(recurso):
+    """
+    Decorator para GETs do catálogo: responde 304 quando o cliente já tem a
+    versão atual e adiciona o ETag (forte) às respostas 200.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            # ETag lido antes da consulta: uma alteração durante a leitura gera um ETag novo no próximo GET
+            etag = etag_recurso(recurso)
+            if request.if_none_match.contains(etag):
+                resposta = make_response('', 304)
+            else:
+                resposta = make_response(f(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+
+            resposta.set_etag(etag)
+            # O navegador guarda a resposta, mas revalida com o servidor a cada uso
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return decorated
+    return decorator
+
+@event.listens_for(Vendedor, 'after_insert')
+@event.listens_for(Vendedor, 'after_update')
+@event.listens_for(Vendedor, 'after_delete')
+@event.listens_for(VendedorComissao, 'after_insert')
+@event.listens_for(VendedorComissao, 'after_update')
+@event.listens_for(VendedorComissao, 'after_delete')
+def _registrar_alteracao(mapper, connection, target):
+    # A versão só muda no commit; antes disso outras requisições ainda leem os dados antigos
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info.setdefault('modelos_catalogo_alterados', set()).add(mapper.class_)
+
+@event.listens_for(Session, 'after_commit')
+def _incrementar_apos_commit(sessao):
+    for modelo in sessao.info.pop('modelos_catalogo_alterados', ()):
+        incrementar_versao(modelo)
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes(sessao):
+    sessao.info.pop('modelos_catalogo_alterados', None)